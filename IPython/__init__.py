@@ -33,6 +33,12 @@ if sys.version[0:3] < '2.6':
     raise ImportError('Python Version 2.6 or above is required for IPython.')
 
 
+# Time the rest of the startup, if asked to (see core/startupprofiler.py).
+# This must happen before anything else of IPython is imported.
+from .core import startupprofiler
+if startupprofiler.requested():
+    startupprofiler.start()
+
 # Make it easy to import extensions - they are always directly on pythonpath.
 # Therefore, non-IPython modules can be added to extensions directory.
 # This should probably be in ipapp.py.
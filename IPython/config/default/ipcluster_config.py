@@ -26,6 +26,7 @@ c = get_config()
 
 # Options are:
 # - LocalEngineSetLauncher
+# - ForkServerEngineSetLauncher (POSIX only, faster for many engines)
 # - MPIExecEngineSetLauncher
 # - PBSEngineSetLauncher
 # - WindowsHPCEngineSetLauncher
@@ -64,6 +65,17 @@ c = get_config()
 # Command line argument passed to the engines.
 # c.LocalEngineSetLauncher.engine_args = ['--log-to-file','--log-level', '40']
 
+# Start the engines in batches of this size (0 means all at once), waiting
+# batch_delay seconds between batches.
+# c.LocalEngineSetLauncher.batch_size = 0
+# c.LocalEngineSetLauncher.batch_delay = 0.5
+
+# The fork server imports IPython once and forks the engines from itself.
+# It takes the same engine_args, batch_size and batch_delay options.
+# c.ForkServerEngineSetLauncher.engine_args = ['--log-to-file','--log-level', '40']
+# c.ForkServerEngineSetLauncher.batch_size = 0
+# c.ForkServerEngineSetLauncher.batch_delay = 0.5
+
 #-----------------------------------------------------------------------------
 # MPIExec launchers
 #-----------------------------------------------------------------------------
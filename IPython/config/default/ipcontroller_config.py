@@ -97,6 +97,20 @@ c = get_config()
 # also pick a specific network port above (FCClientServiceFactory.port).
 # c.FCEngineServiceFactory.reuse_furls = False
 
+# The controller keeps a queue of commands for each engine, and the results of
+# the last commands executed by each engine. By default the queues have no
+# limit. With a limit, a command submitted to a full queue either fails with
+# QueueFull ('reject') or makes the oldest queued command fail ('drop_oldest').
+# from IPython.kernel.engineservice import QueuedEngine
+# QueuedEngine.max_queue_depth = 0
+# QueuedEngine.queue_full_policy = 'reject'
+# QueuedEngine.history_size = 1000
+
+# Tasks are run where the objects named by their locality argument already are
+# (LocalityScheduler), otherwise in the order they were submitted.
+# from IPython.kernel.task import TaskController, FIFOScheduler
+# TaskController.SchedulerClass = FIFOScheduler
+
 #-----------------------------------------------------------------------------
 # Developer level configuration attributes
 #-----------------------------------------------------------------------------
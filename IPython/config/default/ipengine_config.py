@@ -38,6 +38,16 @@ c = get_config()
 # to change to this directory before starting.
 # c.Global.work_dir = os.getcwd()
 
+# Commands run in a worker thread, so that the engine keeps answering the
+# controller while it computes and the running command can be interrupted
+# (see MultiEngineClient.interrupt). Set to False to run them in the
+# reactor thread.
+# c.Global.threaded = True
+
+# Report the peak memory allocated by each command in the stats of its
+# result. This uses tracemalloc, which slows execution down.
+# c.Global.trace_memory = False
+
 #-----------------------------------------------------------------------------
 # MPI configuration
 #-----------------------------------------------------------------------------
@@ -75,6 +75,20 @@ c = get_config()
 
 # c.InteractiveShell.logappend = u'mylog.py'
 
+# Logs are written by a background thread.  When the log file is flushed:
+# 'line' (as soon as it is written), 'interval' or 'exit'.
+# c.InteractiveShell.log_flush = 'line'
+
+# c.InteractiveShell.log_flush_interval = 1.0
+
+# c.InteractiveShell.log_max_output = 10000
+
+# c.InteractiveShell.log_compress = False
+
+# %run keeps the namespace of each script it ran, until the script is run
+# again.  This limits how many are kept (0 for no limit), see %runcache.
+# c.InteractiveShell.main_ns_cache_size = 0
+
 # c.InteractiveShell.object_info_string_level = 0
 
 # c.TerminalInteractiveShell.pager = 'less'
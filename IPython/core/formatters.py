@@ -21,13 +21,15 @@ Authors:
 
 # Stdlib imports
 import abc
+import time
 # We must use StringIO, as cStringIO doesn't handle unicode properly.
 from io import StringIO
 
 # Our own imports
 from IPython.config.configurable import Configurable
 from IPython.external import pretty
-from IPython.utils.traitlets import Bool, Dict, Int, Str
+from IPython.utils.traitlets import Bool, Dict, Float, Int, List, Str
+from IPython.utils.warn import warn
 
 
 #-----------------------------------------------------------------------------
@@ -40,6 +42,20 @@ class DisplayFormatter(Configurable):
     # When set to true only the default plain text formatter will be used.
     plain_text_only = Bool(False, config=True)
 
+    # The format types (MIME types) the frontend can display.  Only these
+    # are computed, plus text/plain, which is always computed.  If empty,
+    # all format types are computed.
+    accepted_types = List(config=True)
+
+    # If a formatter takes longer than this many seconds for an object, it
+    # isn't used again for objects of that class; text/plain falls back to
+    # repr.  Formatters aren't interrupted, so this limits the time spent
+    # on every object but the first of a class.  0 means no limit.
+    time_limit = Float(0.0, config=True)
+
+    # The (format_type, class) pairs that went over the time limit.
+    slow_formatters = Dict()
+
     # A dict of formatter whose keys are format types (MIME types) and whose
     # values are subclasses of BaseFormatter.
     formatters = Dict(config=True)
@@ -99,16 +115,12 @@ class DisplayFormatter(Configurable):
 
         # If plain text only is active
         if self.plain_text_only:
-            formatter = self.formatters['text/plain']
-            try:
-                data = formatter(obj)
-            except:
-                # FIXME: log the exception
-                raise
+            data = self._format(self.formatters['text/plain'], obj)
             if data is not None:
                 format_dict['text/plain'] = data
             return format_dict
 
+        accepted = self.accepted_types
         for format_type, formatter in list(self.formatters.items()):
             if include is not None:
                 if format_type not in include:
@@ -116,21 +128,51 @@ class DisplayFormatter(Configurable):
             if exclude is not None:
                 if format_type in exclude:
                     continue
-            try:
-                data = formatter(obj)
-            except:
-                # FIXME: log the exception
-                raise
+            if accepted and format_type not in accepted and \
+                format_type != 'text/plain':
+                continue
+            data = self._format(formatter, obj)
             if data is not None:
                 format_dict[format_type] = data
         return format_dict
 
+    def _format(self, formatter, obj):
+        """Call formatter on obj, enforcing the time limit."""
+        if not self.time_limit:
+            return formatter(obj)
+        key = (formatter.format_type, getattr(obj, '__class__', None) or type(obj))
+        if key in self.slow_formatters:
+            if formatter.format_type == 'text/plain':
+                return repr_or_empty(obj)
+            return None
+        start = time.time()
+        try:
+            data = formatter(obj)
+        except:
+            # FIXME: log the exception
+            raise
+        elapsed = time.time() - start
+        if elapsed > self.time_limit:
+            if data is not None:
+                warn("Formatting a %s object as %s took %.2f s, it won't be "
+                     "done again." % (key[1].__name__, key[0], elapsed))
+            self.slow_formatters[key] = elapsed
+        return data
+
     @property
     def format_types(self):
         """Return the format types (MIME types) of the active formatters."""
         return list(self.formatters.keys())
 
 
+def repr_or_empty(obj):
+    """Return repr(obj), or '' if that fails."""
+    try:
+        return repr(obj)
+    except Exception:
+        return ''
+
+
 #-----------------------------------------------------------------------------
 # Formatters for specific format types (text, html, svg, etc.)
 #-----------------------------------------------------------------------------
@@ -218,28 +260,66 @@ class BaseFormatter(Configurable):
             obj_id = id(obj)
             try:
                 obj_class = getattr(obj, '__class__', None) or type(obj)
-                if hasattr(obj_class, self.print_method):
-                    printer = getattr(obj_class, self.print_method)
-                    return printer(obj)
+                method, printer = self.lookup(obj_class)
+                if method is not None:
+                    return method(obj)
                 try:
-                    printer = self.singleton_printers[obj_id]
+                    singleton = self.singleton_printers[obj_id]
                 except (TypeError, KeyError):
                     pass
                 else:
+                    return singleton(obj)
+                if printer is not None:
                     return printer(obj)
-                for cls in pretty._get_mro(obj_class):
-                    if cls in self.type_printers:
-                        return self.type_printers[cls](obj)
-                    else:
-                        printer = self._in_deferred_types(cls)
-                        if printer is not None:
-                            return printer(obj)
                 return None
             except Exception:
                 pass
         else:
             return None
 
+    def lookup(self, obj_class):
+        """Return (print method, type printer) for a class.
+
+        Either of them can be None.  The result is cached per class until
+        the registered printers change.
+        """
+        cache = self._printer_cache
+        sizes = (len(self.type_printers), len(self.deferred_printers))
+        if sizes != self._printer_cache_sizes:
+            # The registries were changed without going through for_type
+            cache.clear()
+            self._printer_cache_sizes = sizes
+        try:
+            return cache[obj_class]
+        except (KeyError, TypeError):
+            pass
+        method = getattr(obj_class, self.print_method, None)
+        printer = None
+        for cls in pretty._get_mro(obj_class):
+            if cls in self.type_printers:
+                printer = self.type_printers[cls]
+                break
+            else:
+                printer = self._in_deferred_types(cls)
+                if printer is not None:
+                    break
+        try:
+            cache[obj_class] = (method, printer)
+        except TypeError:
+            pass
+        # Looking in the deferred printers may have moved one of them
+        self._printer_cache_sizes = (len(self.type_printers),
+                                     len(self.deferred_printers))
+        return method, printer
+
+    # {class: (print method, type printer)}, see lookup.
+    _printer_cache = Dict()
+    _printer_cache_sizes = None
+    def _type_printers_changed(self):
+        self._printer_cache.clear()
+    _deferred_printers_changed = _type_printers_changed
+    _print_method_changed = _type_printers_changed
+
     def for_type(self, typ, func):
         """Add a format function for a given type.
 
@@ -259,6 +339,7 @@ class BaseFormatter(Configurable):
             # To support easy restoration of old printers, we need to ignore
             # Nones.
             self.type_printers[typ] = func
+            self._printer_cache.clear()
         return oldfunc
 
     def for_type_by_name(self, type_module, type_name, func):
@@ -285,6 +366,7 @@ class BaseFormatter(Configurable):
             # To support easy restoration of old printers, we need to ignore
             # Nones.
             self.deferred_printers[key] = func
+            self._printer_cache.clear()
         return oldfunc
 
     def _in_deferred_types(self, cls):
@@ -352,6 +434,14 @@ class PlainTextFormatter(BaseFormatter):
     # The newline character.
     newline = Str('\n', config=True)
 
+    # Limits on the output, see IPython.external.pretty.  Sequences and
+    # dicts show at most max_seq_length items, objects nested more than
+    # max_depth levels deep are shown as '...', and formatting stops after
+    # max_output_bytes characters.  0 means no limit.
+    max_seq_length = Int(0, config=True)
+    max_depth = Int(0, config=True)
+    max_output_bytes = Int(1000000, config=True)
+
     # Use the default pretty printers from IPython.external.pretty.
     def _singleton_printers_default(self):
         return pretty._singleton_pprinters.copy()
@@ -378,7 +468,10 @@ class PlainTextFormatter(BaseFormatter):
                 self.max_width, self.newline,
                 singleton_pprinters=self.singleton_printers,
                 type_pprinters=self.type_printers,
-                deferred_pprinters=self.deferred_printers)
+                deferred_pprinters=self.deferred_printers,
+                max_seq_length=self.max_seq_length,
+                max_depth=self.max_depth,
+                max_output_bytes=self.max_output_bytes)
             printer.pretty(obj)
             printer.flush()
             return stream.getvalue()
@@ -53,6 +53,8 @@ class HistoryManager(object):
     shadow_db = None
     # ShadowHist instance with the actual shadow history
     shadow_hist = None
+    # Whether readline's history holds our input history yet
+    readline_populated = False
     
     # Private interface
     # Variables used to store the three last inputs from the user.  On each new
@@ -143,6 +145,7 @@ class HistoryManager(object):
                 if not h.isspace():
                     for line in h.splitlines():
                         self.shell.readline.add_history(line)
+            self.readline_populated = True
 
     def save_history(self):
         """Save input history to a file (via readline library)."""
@@ -159,8 +162,12 @@ class HistoryManager(object):
             self.save_history()
             self.autosave_flag.clear()
         
-    def reload_history(self):
-        """Reload the input history from disk file."""
+    def reload_history(self, populate_readline=True):
+        """Reload the input history from disk file.
+
+        If populate_readline is False, readline's history is not filled;
+        call populate_readline_history() before readline is used.
+        """
 
         with open(self.hist_file,'rt') as hfile:
             try:
@@ -170,7 +177,10 @@ class HistoryManager(object):
             self.input_hist_parsed = hist['parsed']
             self.input_hist_raw = hist['raw']
             if self.shell.has_readline:
-                self.populate_readline_history()
+                if populate_readline:
+                    self.populate_readline_history()
+                else:
+                    self.readline_populated = False
         
     def get_history(self, index=None, raw=False, output=True):
         """Get the history list.
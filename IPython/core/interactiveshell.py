@@ -26,7 +26,7 @@ import tempfile
 import types
 
 from IPython.config.configurable import Configurable
-from IPython.core import debugger, oinspect
+from IPython.core import oinspect
 from IPython.core import history as ipcorehist
 from IPython.core import page
 from IPython.core import prefilter
@@ -62,7 +62,7 @@ from IPython.utils.strdispatch import StrDispatch
 from IPython.utils.syspathcontext import prepended_to_syspath
 from IPython.utils.text import num_ini_spaces, format_screen, LSString, SList
 from IPython.utils.traitlets import (Int, Str, CBool, CaselessStrEnum, Enum,
-                                     List, Instance, Type)
+                                     Float, List, Instance, Type)
 from IPython.utils.warn import warn, error, fatal
 import IPython.core.hooks
 import collections
@@ -100,6 +100,16 @@ def softspace(file, newvalue):
 
 def no_op(*a, **kw): pass
 
+
+def _lazy_completer(name):
+    """Return a completer hook importing IPython.core.completerlib on use."""
+    def completer(self, event):
+        from IPython.core import completerlib
+        return getattr(completerlib, name)(self, event)
+    completer.__name__ = name
+    return completer
+
+
 class SpaceInInput(Exception): pass
 
 class Bunch: pass
@@ -165,6 +175,17 @@ class InteractiveShell(Configurable, Magic):
     logstart = CBool(False, config=True)
     logfile = Str('', config=True)
     logappend = Str('', config=True)
+    # When the log file is flushed: after every input ('line'), at most
+    # every log_flush_interval seconds ('interval') or when logging stops.
+    log_flush = CaselessStrEnum(('line', 'interval', 'exit'),
+                                default_value='line', config=True)
+    log_flush_interval = Float(1.0, config=True)
+    # Logged outputs are cut to this many characters (0 for no limit)
+    log_max_output = Int(10000, config=True)
+    # Whether the old logs of the 'rotate' log mode are gzipped
+    log_compress = CBool(False, config=True)
+    # How many script namespaces %run keeps alive (0 for no limit)
+    main_ns_cache_size = Int(0, config=True)
     object_info_string_level = Enum((0,1,2), default_value=0,
                                     config=True)
     pdb = CBool(False, config=True)
@@ -207,6 +228,8 @@ class InteractiveShell(Configurable, Magic):
     separate_in = SeparateStr('\n', config=True)
     separate_out = SeparateStr('', config=True)
     separate_out2 = SeparateStr('', config=True)
+    # Seconds %whos --memory may spend on the size of each variable
+    whos_memory_time_limit = Float(0.5, config=True)
     wildcards_case_sensitive = CBool(True, config=True)
     xmode = CaselessStrEnum(('Context','Plain', 'Verbose'), 
                             default_value='Context', config=True)
@@ -444,7 +467,10 @@ class InteractiveShell(Configurable, Magic):
 
     def init_logger(self):
         self.logger = Logger(self.home_dir, logfname='ipython_log.py',
-                             logmode='rotate')
+                             logmode='rotate', flush_policy=self.log_flush,
+                             flush_interval=self.log_flush_interval,
+                             max_output_length=self.log_max_output,
+                             compress_rotated=self.log_compress)
 
     def init_logstart(self):
         """Initialize logging in case it was requested at the command line.
@@ -616,10 +642,20 @@ class InteractiveShell(Configurable, Magic):
     # Things related to the "main" module
     #-------------------------------------------------------------------------
 
-    def new_main_mod(self,ns=None):
+    def new_main_mod(self,ns=None,filename=None):
         """Return a new 'main' module object for user code execution.
+
+        With a filename, the module is the one of that script: each script
+        gets its own module, which is cleared and reused when the script is
+        run again.  Otherwise a single shared module is used.
         """
-        main_mod = self._user_main_module
+        if filename is None:
+            main_mod = self._user_main_module
+        else:
+            fname = os.path.abspath(filename)
+            main_mod = self._main_mod_cache.get(fname)
+            if main_mod is None:
+                main_mod = self._main_mod_cache[fname] = FakeModule()
         init_fakemod_dict(main_mod,ns)
         return main_mod
 
@@ -634,17 +670,16 @@ class InteractiveShell(Configurable, Magic):
         This method keeps said reference in a private dict, keyed by the
         absolute path of the module object (which corresponds to the script
         path).  This way, for multiple executions of the same script we only
-        keep one copy of the namespace (the last one), thus preventing memory
-        leaks from old references while allowing the objects from the last
-        execution to be accessible.
+        keep one namespace (the last one), thus preventing memory leaks from
+        old references while allowing the objects from the last execution to
+        be accessible.
 
-        Note: we can not allow the actual FakeModule instances to be deleted,
-        because of how Python tears down modules (it hard-sets all their
-        references to None without regard for reference counts).  This method
-        must therefore make a *copy* of the given namespace, to allow the
-        original module's __dict__ to be cleared and reused.
+        The namespace itself is kept, not a copy, as the modules made by
+        new_main_mod for a script are only cleared when the same script runs
+        again.  Only the namespace of the shared module, which the next %run
+        clears, is copied.  At most main_ns_cache_size namespaces are kept
+        (0 for no limit), the least recently run ones are dropped first.
 
-        
         Parameters
         ----------
           ns : a namespace (a dict, typically)
@@ -662,7 +697,21 @@ class InteractiveShell(Configurable, Magic):
         In [12]: IPython.__file__ in _ip._main_ns_cache
         Out[12]: True
         """
-        self._main_ns_cache[os.path.abspath(fname)] = ns.copy()
+        if ns is self._user_main_module.__dict__:
+            ns = ns.copy()
+        fname = os.path.abspath(fname)
+        self._main_ns_cache.pop(fname, None)
+        self._main_ns_cache[fname] = ns
+        self.trim_main_mod_cache()
+
+    def trim_main_mod_cache(self):
+        """Drop the oldest cached namespaces beyond main_ns_cache_size."""
+        limit = self.main_ns_cache_size
+        while limit > 0 and len(self._main_ns_cache) > limit:
+            fname, ns = self._main_ns_cache.popitem(last=False)
+            main_mod = self._main_mod_cache.get(fname)
+            if main_mod is not None and main_mod.__dict__ is ns:
+                del self._main_mod_cache[fname]
 
     def clear_main_mod_cache(self):
         """Clear the cache of main modules.
@@ -685,6 +734,7 @@ class InteractiveShell(Configurable, Magic):
         Out[19]: True
         """
         self._main_ns_cache.clear()
+        self._main_mod_cache.clear()
 
     #-------------------------------------------------------------------------
     # Things related to debugging
@@ -731,7 +781,8 @@ class InteractiveShell(Configurable, Magic):
             return
 
         # use pydb if available
-        if debugger.has_pydb:
+        from IPython.core.debugger import has_pydb
+        if has_pydb:
             from pydb import pm
         else:
             # fallback to our internal debugger
@@ -812,18 +863,22 @@ class InteractiveShell(Configurable, Magic):
         # To avoid keeping stale modules around (we only need the one from the
         # last run), we use a dict keyed with the full path to the script, so
         # only the last version of the module is held in the cache.  Note,
-        # however, that we must cache the module *namespace contents* (their
-        # __dict__).  Because if we try to cache the actual modules, old ones
-        # (uncached) could be destroyed while still holding references (such as
-        # those held by GUI objects that tend to be long-lived)>
+        # however, that we cache the module *namespace contents* (their
+        # __dict__), as other code may hold them after the module is gone.
+        # Each script has its own module, which is only cleared when the
+        # script is run again, so its namespace is cached without copying it.
         # 
         # The %reset command will flush this cache.  See the cache_main_mod()
-        # and clear_main_mod_cache() methods for details on use.
-
-        # This is the cache used for 'main' namespaces
-        self._main_ns_cache = {}
+        # and clear_main_mod_cache() methods for details on use, and the
+        # %runcache magic to see the memory they use.
+
+        # This is the cache used for 'main' namespaces, least recently run
+        # first
+        self._main_ns_cache = collections.OrderedDict()
+        # The FakeModule of each script run, see new_main_mod()
+        self._main_mod_cache = {}
         # And this is the single instance of FakeModule whose __dict__ we keep
-        # copying and clearing for reuse on each %run
+        # copying and clearing for reuse, for code that isn't a script file
         self._user_main_module = FakeModule()
 
         # A table holding all the namespaces IPython deals with, so that
@@ -1224,10 +1279,11 @@ class InteractiveShell(Configurable, Magic):
             print('Object `%s` not found.' % oname)
             return 'not found'  # so callers can take other action
 
-    def object_inspect(self, oname):
+    def object_inspect(self, oname, detail_level=0):
         info = self._object_find(oname)
         if info.found:
-            return self.inspector.info(info.obj, oname, info=info)
+            return self.inspector.info(info.obj, oname, info=info,
+                                       detail_level=detail_level)
         else:
             return oinspect.object_info(name=oname, found=False)
 
@@ -1538,8 +1594,9 @@ class InteractiveShell(Configurable, Magic):
             # otherwise we end up with a monster history after a while:
             readline.set_history_length(self.history_length)
             try:
-                #print '*** Reading readline history'  # dbg
-                self.reload_history() 
+                # Filling readline's history is left to the first prompt, so
+                # that non-interactive sessions don't pay for it.
+                self.history_manager.reload_history(populate_readline=False)
             except IOError:
                 pass  # It doesn't exist yet.
 
@@ -1586,27 +1643,23 @@ class InteractiveShell(Configurable, Magic):
         either interactively in-process (typically triggered by the readline
         library), programatically (such as in test suites) or out-of-prcess
         (typically over the network by remote frontends).
+
+        The completer itself is only created when it is first used, see the
+        Completer property, as many sessions never complete anything.
         """
-        from IPython.core.completer import IPCompleter
-        from IPython.core.completerlib import (module_completer,
-                                               magic_run_completer, cd_completer)
-        
-        self.Completer = IPCompleter(self,
-                                     self.user_ns,
-                                     self.user_global_ns,
-                                     self.readline_omit__names,
-                                     self.alias_manager.alias_table,
-                                     self.has_readline)
+        self._completer = None
         
         # Add custom completers to the basic ones built into IPCompleter
         sdisp = self.strdispatchers.get('complete_command', StrDispatch())
         self.strdispatchers['complete_command'] = sdisp
-        self.Completer.custom_completers = sdisp
 
+        module_completer = _lazy_completer('module_completer')
         self.set_hook('complete_command', module_completer, str_key = 'import')
         self.set_hook('complete_command', module_completer, str_key = 'from')
-        self.set_hook('complete_command', magic_run_completer, str_key = '%run')
-        self.set_hook('complete_command', cd_completer, str_key = '%cd')
+        self.set_hook('complete_command',
+                      _lazy_completer('magic_run_completer'), str_key = '%run')
+        self.set_hook('complete_command', _lazy_completer('cd_completer'),
+                      str_key = '%cd')
 
         # Only configure readline if we truly are using readline.  IPython can
         # do tab-completion over the network, in GUIs, etc, where readline
@@ -1614,6 +1667,21 @@ class InteractiveShell(Configurable, Magic):
         if self.has_readline:
             self.set_readline_completer()
 
+    @property
+    def Completer(self):
+        """The IPCompleter of this shell, created on first use."""
+        if self._completer is None:
+            from IPython.core.completer import IPCompleter
+            self._completer = IPCompleter(self,
+                                          self.user_ns,
+                                          self.user_global_ns,
+                                          self.readline_omit__names,
+                                          self.alias_manager.alias_table,
+                                          self.has_readline)
+            self._completer.custom_completers = \
+                self.strdispatchers['complete_command']
+        return self._completer
+
     def complete(self, text, line=None, cursor_pos=None):
         """Return the completed text and a list of completions.
 
@@ -1670,7 +1738,11 @@ class InteractiveShell(Configurable, Magic):
 
     def set_readline_completer(self):
         """Reset readline's completer to be our own."""
-        self.readline.set_completer(self.Completer.rlcomplete)
+        self.readline.set_completer(self._readline_complete)
+
+    def _readline_complete(self, text, state):
+        # Going through here lets the completer be created on the first TAB
+        return self.Completer.rlcomplete(text, state)
 
     def set_completer_frame(self, frame=None):
         """Set the frame of the completer."""
@@ -13,11 +13,124 @@
 # Modules and globals
 
 # Python standard modules
+import atexit
 import glob
+import gzip
 import os
+import queue
+import shutil
+import threading
 import time
 
+from IPython.utils.warn import warn
+
 #****************************************************************************
+
+def compress_log(fname):
+    """Compress the file fname with gzip, to fname.gz, and remove it."""
+    with open(fname, 'rb') as src:
+        with gzip.open(fname + '.gz', 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+    os.remove(fname)
+
+
+class LogWriter(threading.Thread):
+    """This thread writes the log entries of a Logger to its file.
+
+    Logger.log_write only queues its entries, the timestamps and output
+    markers are added and the entries are written here, so that the prompt
+    never waits on the disk.
+
+    When the file is flushed depends on the policy:
+
+    - 'line': as soon as no more entries are waiting.
+    - 'interval': at most once every `interval` seconds.
+    - 'exit': only when the writer is stopped (or asked to flush).
+
+    A write error stops the writing; it is kept in `error`, for the Logger
+    to report.
+    """
+    daemon = True
+
+    def __init__(self, logfile, policy='line', interval=1.0):
+        threading.Thread.__init__(self)
+        if policy not in ('line', 'interval', 'exit'):
+            raise ValueError('invalid log flush policy %s given' % policy)
+        self.logfile = logfile
+        self.policy = policy
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.error = None
+        # Ensure everything is written when exiting normally
+        atexit.register(self.stop)
+
+    def run(self):
+        dirty = False
+        last_flush = time.time()
+        while True:
+            if dirty and (self.policy == 'line' and self.queue.empty() or
+                          self.policy == 'interval' and
+                          time.time() - last_flush >= self.interval):
+                self._flush()
+                dirty = False
+                last_flush = time.time()
+            timeout = None
+            if dirty and self.policy == 'interval':
+                timeout = max(0, last_flush + self.interval - time.time())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            try:
+                if item is None:
+                    self._flush()
+                    break
+                elif callable(item):
+                    item()
+                elif self.error is None:
+                    self.logfile.write(self.format(*item))
+                    dirty = True
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def format(self, kind, data, stamp):
+        """Return the text written to the log for one entry."""
+        if kind == 'output':
+            return '%s\n' % '\n'.join(['#[Out]# %s' % s
+                                        for s in data.splitlines()])
+        if stamp is not None:
+            return time.strftime('# %a, %d %b %Y %H:%M:%S\n',
+                                 time.localtime(stamp)) + data
+        return data
+
+    def _flush(self):
+        if self.error is None:
+            try:
+                self.logfile.flush()
+            except Exception as e:
+                self.error = e
+
+    def put(self, item):
+        """Queue an entry, (kind, data, timestamp or None), or a callable."""
+        self.queue.put(item)
+
+    def flush(self):
+        """Write and flush everything queued so far, waiting for it."""
+        if self.is_alive():
+            self.queue.put(self._flush)
+            self.queue.join()
+
+    def stop(self):
+        """Write everything queued so far and stop the thread."""
+        # Don't keep a stopped writer (and its file) alive until exit
+        atexit.unregister(self.stop)
+        if self.is_alive():
+            self.queue.put(None)
+            self.join()
+
+
 # FIXME: This class isn't a mixin anymore, but it still needs attributes from
 # ipython and does input cache management.  Finish cleanup later...
 
@@ -25,7 +138,8 @@ class Logger(object):
     """A Logfile class with different policies for file creation"""
 
     def __init__(self, home_dir, logfname='Logger.log', loghead='',
-                 logmode='over'):
+                 logmode='over', flush_policy='line', flush_interval=1.0,
+                 max_output_length=10000, compress_rotated=False):
 
         # this is the full ipython instance, we need some attributes from it
         # which won't exist until later. What a mess, clean up later...
@@ -35,6 +149,18 @@ class Logger(object):
         self.loghead = loghead
         self.logmode = logmode
         self.logfile = None
+        # The LogWriter thread writing to logfile
+        self.writer = None
+
+        # When the log file is flushed, see LogWriter
+        self.flush_policy = flush_policy
+        self.flush_interval = flush_interval
+
+        # Logged outputs are cut to this many characters (0 for no limit)
+        self.max_output_length = max_output_length
+
+        # Whether to gzip the old logs of the 'rotate' mode
+        self.compress_rotated = compress_rotated
 
         # Whether to log raw or processed input
         self.log_raw_input = False
@@ -84,6 +210,7 @@ class Logger(object):
         # init depending on the log mode requested
         isfile = os.path.isfile
         logmode = self.logmode
+        rotated = None
 
         if logmode == 'append':
             self.logfile = open(self.logfname,'a')
@@ -109,15 +236,20 @@ class Logger(object):
 
         elif logmode == 'rotate':
             if isfile(self.logfname):
-                if isfile(self.logfname+'.001~'): 
-                    old = glob.glob(self.logfname+'.*~')
+                if isfile(self.logfname+'.001~') or \
+                   isfile(self.logfname+'.001~.gz'):
+                    # Old logs are name.NNN~, or name.NNN~.gz if compressed
+                    old = glob.glob(self.logfname+'.*~') + \
+                          glob.glob(self.logfname+'.*~.gz')
                     old.sort()
                     old.reverse()
                     for f in old:
-                        root, ext = os.path.splitext(f)
+                        gz = f.endswith('.gz') and '.gz' or ''
+                        root, ext = os.path.splitext(f[:len(f)-len(gz)])
                         num = int(ext[1:-1])+1
-                        os.rename(f, root+'.'+repr(num).zfill(3)+'~')
-                os.rename(self.logfname, self.logfname+'.001~')
+                        os.rename(f, root+'.'+repr(num).zfill(3)+'~'+gz)
+                rotated = self.logfname+'.001~'
+                os.rename(self.logfname, rotated)
             self.logfile = open(self.logfname,'w')
             
         if logmode != 'append':
@@ -125,6 +257,17 @@ class Logger(object):
 
         self.logfile.flush()
 
+        self.writer = LogWriter(self.logfile, self.flush_policy,
+                                self.flush_interval)
+        if rotated and self.compress_rotated:
+            def compress():
+                try:
+                    compress_log(rotated)
+                except (IOError, OSError) as e:
+                    warn("Couldn't compress old log %s: %s" % (rotated, e))
+            self.writer.put(compress)
+        self.writer.start()
+
     def switch_log(self,val):
         """Switch logging on/off. val should be ONLY a boolean."""
 
@@ -160,6 +303,7 @@ which already exists. But you must first start the logging process with
             print('Output logging :',self.log_output)
             print('Raw input log  :',self.log_raw_input)
             print('Timestamping   :',self.timestamp)
+            print('Flush policy   :',self.flush_policy)
             print('State          :',state)
 
     def log(self, line_mod, line_ori):
@@ -187,17 +331,29 @@ which already exists. But you must first start the logging process with
 
         #print 'data: %r' % data # dbg
         if self.log_active and data:
-            write = self.logfile.write
+            if self.writer.error is not None:
+                self._write_failed()
+                return
             if kind=='input':
-                if self.timestamp:
-                    write(time.strftime('# %a, %d %b %Y %H:%M:%S\n',
-                                        time.localtime()))
-                write(data)
+                stamp = self.timestamp and time.time() or None
+                self.writer.put((kind, data, stamp))
             elif kind=='output' and self.log_output:
-                odata = '\n'.join(['#[Out]# %s' % s
-                                   for s in data.splitlines()])
-                write('%s\n' % odata)
-            self.logfile.flush()
+                limit = self.max_output_length
+                if limit and len(data) > limit:
+                    data = '%s\n[... %i more characters not logged ...]' % \
+                           (data[:limit], len(data) - limit)
+                self.writer.put((kind, data, None))
+
+    def _write_failed(self):
+        """Report a write error of the writer and suspend logging."""
+        warn('Logging suspended, writing to %s failed: %s' %
+             (self.logfname, self.writer.error))
+        self.log_active = False
+
+    def flush(self):
+        """Write all entries logged so far to the log file."""
+        if self.writer is not None:
+            self.writer.flush()
 
     def logstop(self):
         """Fully stop logging and close log file.
@@ -206,6 +362,10 @@ which already exists. But you must first start the logging process with
         made, possibly (though not necessarily) with a new filename, mode and
         other options."""
         
+        self.writer.stop()
+        if self.writer.error is not None and self.log_active:
+            self._write_failed()
+        self.writer = None
         self.logfile.close()
         self.logfile = None
         self.log_active = False
@@ -19,6 +19,7 @@ import builtins
 import bdb
 import inspect
 import os
+import queue
 import sys
 import shutil
 import re
@@ -42,23 +43,26 @@ except ImportError:
         profile = pstats = None
 
 import IPython
-from IPython.core import debugger, oinspect
+from IPython.core import oinspect
 from IPython.core.error import TryNext
 from IPython.core.error import UsageError
 from IPython.core.fakemodule import FakeModule
 from IPython.core.macro import Macro
 from IPython.core import page
+from IPython.core import rehash
 from IPython.core.prefilter import ESC_MAGIC
 from IPython.lib.pylabtools import mpl_runner
-from IPython.external.Itpl import itpl, printpl
-from IPython.testing import decorators as testdec
+from IPython.external.Itpl import printpl
+from IPython.testing.skipdoctest import skip_doctest
 from IPython.utils.io import file_read, nlprint
+from IPython.utils.memory import DeepSizer, MemoryRow, MemoryTable
+from IPython.utils import PyColorize
 import IPython.utils.io
 from IPython.utils.path import get_py_filename
 from IPython.utils.process import arg_split, abbrev_cwd
 from IPython.utils.terminal import set_term_title
 from IPython.utils.text import LSString, SList, format_screen
-from IPython.utils.timing import clock, clock2
+from IPython.utils.timing import clock, clock2, RunTimings
 from IPython.utils.warn import warn, error
 from IPython.utils.ipstruct import Struct
 import IPython.utils.generics
@@ -73,6 +77,11 @@ def on_off(tag):
 
 class Bunch: pass
 
+def rehashx_pre_prompt(self):
+    """pre_prompt_hook defining the aliases found by a background %rehashx."""
+    self._rehashx_define()
+    raise TryNext
+
 def compress_dhist(dh):
     head, tail = dh[:-10], dh[-10:]
 
@@ -446,7 +455,7 @@ Currently the magic system has the following functions:\n"""
             self.shell.automagic = not self.shell.automagic
         print('\n' + Magic.auto_status[self.shell.automagic])
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_autocall(self, parameter_s = ''):
         """Make functions callable without having to type parentheses.
 
@@ -738,7 +747,7 @@ Currently the magic system has the following functions:\n"""
         typelist = parameter_s.split()
         if typelist:
             typeset = set(typelist)
-            out = [i for i in out if type(i).__name__ in typeset]
+            out = [i for i in out if type(user_ns[i]).__name__ in typeset]
 
         out.sort()
         return out
@@ -787,6 +796,8 @@ Currently the magic system has the following functions:\n"""
     def magic_whos(self, parameter_s=''):
         """Like %who, but gives some extra information about each variable.
 
+        %whos [--memory] [type ...]
+
         The same type filtering of %who can be applied here.
 
         For all variables, the type is printed. Additionally it prints:
@@ -797,11 +808,31 @@ Currently the magic system has the following functions:\n"""
           elements, typecode and size in memory.
 
           - Everything else: a string representation, snipping their middle if
-          too long."""
+          too long.
+
+        Options:
+
+          --memory: also compute the memory used by each variable, including
+          everything it refers to (the items of containers, the attributes of
+          instances, the data of arrays), with the largest variables first.
+          The 'Shared' column gives the part of that memory already counted
+          for a variable listed above, and the total counts it once.  Sizes
+          taking longer than whos_memory_time_limit seconds to compute are
+          cut short and shown as lower bounds ('>').
+
+          Instead of being printed, the table is returned, so that it can be
+          used programmatically: its rows are (name, type, size, shared,
+          complete, info) tuples, for example::
+
+            In [1]: t = %whos --memory
+
+            In [2]: [row.name for row in t if row.size > 2**20]
+        """
         
-        varnames = self.magic_who_ls(parameter_s)
+        opts, args = self.parse_options(parameter_s, '', 'memory')
+        varnames = self.magic_who_ls(args)
         if not varnames:
-            if parameter_s:
+            if args:
                 print('No variables match your requested type.')
             else:
                 print('Interactive namespace is empty.')
@@ -810,7 +841,7 @@ Currently the magic system has the following functions:\n"""
         # if we have variables, move on...
 
         # for these types, show len() instead of data:
-        seq_types = [dict,list,tuple]
+        seq_types = ['dict', 'list', 'tuple']
 
         # for numpy/Numeric arrays, display summary info
         try:
@@ -826,17 +857,14 @@ Currently the magic system has the following functions:\n"""
         else:
             array_type = Numeric.ArrayType.__name__
 
-        # Find all variable names and types so we can figure out column sizes
-        def get_vars(i):
-            return self.shell.user_ns[i]
-        
         # some types are well known and can be shorter
         abbrevs = {'IPython.core.macro.Macro' : 'Macro'}
         def type_name(v):
             tn = type(v).__name__
             return abbrevs.get(tn,tn)
             
-        varlist = list(map(get_vars,varnames))
+        user_ns = self.shell.user_ns
+        varlist = [user_ns[name] for name in varnames]
 
         typelist = []
         for vv in varlist:
@@ -848,28 +876,13 @@ Currently the magic system has the following functions:\n"""
             else:
                 typelist.append(tt)
 
-        # column labels and # of spaces as separator
-        varlabel = 'Variable'
-        typelabel = 'Type'
-        datalabel = 'Data/Info'
-        colsep = 3
-        # variable format strings
-        vformat    = "$vname.ljust(varwidth)$vtype.ljust(typewidth)"
-        vfmt_short = '$vstr[:25]<...>$vstr[-25:]'
-        aformat    = "%s: %s elems, type `%s`, %s bytes"
-        # find the size of the columns to format the output nicely
-        varwidth = max(max(list(map(len,varnames))), len(varlabel)) + colsep
-        typewidth = max(max(list(map(len,typelist))), len(typelabel)) + colsep
-        # table header
-        print(varlabel.ljust(varwidth) + typelabel.ljust(typewidth) + \
-              ' '+datalabel+'\n' + '-'*(varwidth+typewidth+len(datalabel)+1))
-        # and the table itself
         kb = 1024
         Mb = 1048576  # kb**2
-        for vname,var,vtype in zip(varnames,varlist,typelist):
-            print(itpl(vformat), end=' ')
+        aformat    = "%s: %s elems, type `%s`, %s bytes"
+        def var_info(var, vtype):
+            """The Data/Info column for var"""
             if vtype in seq_types:
-                print(len(var))
+                return str(len(var))
             elif vtype in [array_type,ndarray_type]:
                 vshape = str(var.shape).replace(',','').replace(' ','x')[1:-1]
                 if vtype==ndarray_type:
@@ -883,25 +896,56 @@ Currently the magic system has the following functions:\n"""
                     vbytes = vsize*var.itemsize()
                     vdtype = var.typecode()
                     
+                info = aformat % (vshape,vsize,vdtype,vbytes)
                 if vbytes < 100000:
-                    print(aformat % (vshape,vsize,vdtype,vbytes))
+                    return info
+                elif vbytes < Mb:
+                    return info + ' (%s kb)' % (vbytes/kb,)
                 else:
-                    print(aformat % (vshape,vsize,vdtype,vbytes), end=' ')
-                    if vbytes < Mb:
-                        print('(%s kb)' % (vbytes/kb,))
-                    else:
-                        print('(%s Mb)' % (vbytes/Mb,))
+                    return info + ' (%s Mb)' % (vbytes/Mb,)
             else:
+                # Big containers and strings aren't rendered entirely
                 try:
-                    vstr = str(var)
+                    vstr = oinspect.bounded_str(var, 50)
                 except UnicodeEncodeError:
-                    vstr = str(var).encode(sys.getdefaultencoding(),
-                                               'backslashreplace')
+                    vstr = oinspect.bounded_str(var, 50).encode(
+                        sys.getdefaultencoding(), 'backslashreplace')
                 vstr = vstr.replace('\n','\\n')
                 if len(vstr) < 50:
-                    print(vstr)
+                    return vstr
                 else:
-                    printpl(vfmt_short)
+                    return vstr[:25] + '<...>' + vstr[-25:]
+
+        if 'memory' in opts:
+            time_limit = self.shell.whos_memory_time_limit
+            # Shared memory is reported for the variables listed last, so
+            # the variables are sized on their own first, to order them.
+            own_size = dict((vname, DeepSizer(time_limit).sizeof(var)[0])
+                            for vname, var in zip(varnames, varlist))
+            sizer = DeepSizer(time_limit)
+            rows = []
+            for vname,var,vtype in sorted(zip(varnames,varlist,typelist),
+                                   key=lambda v: own_size[v[0]], reverse=True):
+                size, shared, complete = sizer.sizeof(var)
+                rows.append(MemoryRow(vname, vtype, size, shared, complete,
+                                      var_info(var, vtype)))
+            return MemoryTable(rows, sort=False)
+
+        # column labels and # of spaces as separator
+        varlabel = 'Variable'
+        typelabel = 'Type'
+        datalabel = 'Data/Info'
+        colsep = 3
+        # find the size of the columns to format the output nicely
+        varwidth = max(max(list(map(len,varnames))), len(varlabel)) + colsep
+        typewidth = max(max(list(map(len,typelist))), len(typelabel)) + colsep
+        # table header
+        print(varlabel.ljust(varwidth) + typelabel.ljust(typewidth) + \
+              ' '+datalabel+'\n' + '-'*(varwidth+typewidth+len(datalabel)+1))
+        # and the table itself
+        for vname,var,vtype in zip(varnames,varlist,typelist):
+            print(vname.ljust(varwidth) + vtype.ljust(typewidth),
+                  var_info(var, vtype))
                 
     def magic_reset(self, parameter_s=''):
         """Resets the namespace by removing all names defined by the user.
@@ -1199,7 +1243,7 @@ Currently the magic system has the following functions:\n"""
         """
         self.shell.debugger(force=True)
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_prun(self, parameter_s ='',user_mode=1,
                    opts=None,arg_lst=None,prog_ns=None):
 
@@ -1372,13 +1416,13 @@ Currently the magic system has the following functions:\n"""
         else:
             return None
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_run(self, parameter_s ='',runner=None,
                   file_finder=get_py_filename):
         """Run the named file inside IPython as a program.
 
         Usage:\\
-          %run [-n -i -t [-N<N>] -d [-b<N>] -p [profile options]] file [args]
+          %run [-n -i -t [-N<N> -f -r] -d [-b<N>] -p [profile options]] file [args]
         
         Parameters after the filename are passed as command-line arguments to
         the program (put in sys.argv). Then, control returns to IPython's
@@ -1420,27 +1464,42 @@ Currently the magic system has the following functions:\n"""
         you an estimated CPU time consumption for your script, which under
         Unix uses the resource module to avoid the wraparound problems of
         time.clock().  Under Unix, an estimate of time spent on system tasks
-        is also given (for Windows platforms this is reported as 0.0).
+        is also given (for Windows platforms this is reported as 0.0).  The
+        wall clock time is given too.
 
         If -t is given, an additional -N<N> option can be given, where <N>
         must be an integer indicating how many times you want the script to
-        run.  The final timing report will include total and per run results.
+        run.  The final timing report will include the total, mean, minimum,
+        median and standard deviation of the times of the runs.  Each run
+        starts from the namespace left by the previous one, unless -f is
+        given: then each run gets a fresh namespace (-f does nothing with
+        -i).
+
+        With -r, the timings are returned as a RunTimings object (see
+        IPython.utils.timing), which has the time of each run and can be
+        saved as JSON with its save method, to compare timings later.
 
         For example (testing the script uniq_stable.py):
 
             In [1]: run -t uniq_stable
 
             IPython CPU timings (estimated):\\
-              User  :    0.19597 s.\\
-              System:        0.0 s.\\
+              User   :    0.19597 s.\\
+              System :          0 s.\\
+            Wall time:   0.196742 s.
 
             In [2]: run -t -N5 uniq_stable
 
             IPython CPU timings (estimated):\\
             Total runs performed: 5\\
-              Times :      Total       Per run\\
-              User  :   0.910862 s,  0.1821724 s.\\
-              System:        0.0 s,        0.0 s.
+              Times :      Total       Per run           Min        Median        Stddev\\
+              Wall  :   0.913671 s,   0.182734 s,       0.18 s,   0.181903 s, 0.00287313 s.\\
+              User  :   0.910862 s,   0.182172 s,   0.179972 s,   0.181972 s, 0.00227177 s.\\
+              System:          0 s,          0 s,          0 s,          0 s,          0 s.
+
+            In [3]: t = %run -t -N5 -f -r uniq_stable
+
+            In [4]: t.save('uniq_stable_timings.json')
 
         -d: run your program under the control of pdb, the Python debugger.
         This allows you to execute your program step by step, watch variables,
@@ -1448,9 +1507,9 @@ Currently the magic system has the following functions:\n"""
         
           pdb.run('execfile("YOURFILENAME")')
 
-        with a breakpoint set on line 1 of your file.  You can change the line
-        number for this automatic breakpoint to be <N> by using the -bN option
-        (where N must be an integer).  For example:
+        with a temporary breakpoint set on line 1 of your file.  You can
+        change the line number for this automatic breakpoint to be <N> by
+        using the -bN option (where N must be an integer).  For example:
 
           %run -d -b40 myscript
 
@@ -1462,6 +1521,10 @@ Currently the magic system has the following functions:\n"""
         first enter 'c' (without qoutes) to start execution up to the first
         breakpoint.
 
+        When continuing, only the functions holding breakpoints are traced
+        line by line, so the script runs to them at close to its normal
+        speed.
+
         Entering 'help' gives information about the use of the debugger.  You
         can easily see pdb's full documentation with "import pdb;pdb.help()"
         at a prompt.
@@ -1485,7 +1548,7 @@ Currently the magic system has the following functions:\n"""
         """
 
         # get arguments and set sys.argv for program to be run.
-        opts,arg_lst = self.parse_options(parameter_s,'nidtN:b:pD:l:rs:T:e',
+        opts,arg_lst = self.parse_options(parameter_s,'nidtN:fb:pD:l:rs:T:e',
                                           mode='list',list_all=1)
 
         try:
@@ -1523,7 +1586,7 @@ Currently the magic system has the following functions:\n"""
             else:
                 name = '__main__'
 
-            main_mod = self.shell.new_main_mod()
+            main_mod = self.shell.new_main_mod(filename=filename)
             prog_ns = main_mod.__dict__
             prog_ns['__name__'] = name
 
@@ -1552,6 +1615,7 @@ Currently the magic system has the following functions:\n"""
                 stats = self.magic_prun('',0,opts,arg_lst,prog_ns)
             else:
                 if 'd' in opts:
+                    from IPython.core import debugger
                     deb = debugger.Pdb(self.shell.colors)
                     # reset Breakpoint state, which is moronically kept
                     # in a class
@@ -1574,13 +1638,17 @@ Currently the magic system has the following functions:\n"""
                                    "with the -b option." % bp)
                             error(msg)
                             return
-                    # if we find a good linenumber, set the breakpoint
-                    deb.do_break('%s:%s' % (filename,bp))
+                    # if we find a good linenumber, set the breakpoint.  It
+                    # is temporary, so that once the script is running it
+                    # only has the user's breakpoints (see Pdb's
+                    # fast_breakpoints)
+                    deb.do_tbreak('%s:%s' % (filename,bp))
                     # Start file run
                     print("NOTE: Enter 'c' at the", end=' ')
                     print("%s prompt to start your script." % deb.prompt)
                     try:
-                        deb.run('execfile("%s")' % filename,prog_ns)
+                        deb.run('exec(compile(open(%r).read(), %r, "exec"))'
+                                % (filename, filename), prog_ns)
                         
                     except:
                         etype, value, tb = sys.exc_info()
@@ -1600,31 +1668,20 @@ Currently the magic system has the following functions:\n"""
                                 return
                         except (KeyError):
                             nruns = 1
-                        if nruns == 1:
-                            t0 = clock2()
-                            runner(filename,prog_ns,prog_ns,
-                                   exit_ignore=exit_ignore)
-                            t1 = clock2()
-                            t_usr = t1[0]-t0[0]
-                            t_sys = t1[1]-t0[1]
-                            print("\nIPython CPU timings (estimated):")
-                            print("  User  : %10s s." % t_usr)
-                            print("  System: %10s s." % t_sys)
-                        else:
-                            runs = list(range(nruns))
-                            t0 = clock2()
-                            for nr in runs:
-                                runner(filename,prog_ns,prog_ns,
-                                       exit_ignore=exit_ignore)
-                            t1 = clock2()
-                            t_usr = t1[0]-t0[0]
-                            t_sys = t1[1]-t0[1]
-                            print("\nIPython CPU timings (estimated):")
-                            print("Total runs performed:",nruns)
-                            print("  Times : %10s    %10s" % ('Total','Per run'))
-                            print("  User  : %10s s, %10s s." % (t_usr,t_usr/nruns))
-                            print("  System: %10s s, %10s s." % (t_sys,t_sys/nruns))
-                            
+                        timings = RunTimings(filename,
+                                        fresh='f' in opts and 'i' not in opts)
+                        for nr in range(nruns):
+                            if nr and timings.fresh:
+                                # Clears prog_ns, which is main_mod's dict
+                                main_mod = self.shell.new_main_mod(
+                                                        filename=filename)
+                                prog_ns['__name__'] = main_mod_name
+                                prog_ns['__file__'] = filename
+                            timings.time(runner,filename,prog_ns,prog_ns,
+                                         exit_ignore=exit_ignore)
+                        print("\n%r" % timings)
+                        if 'r' in opts:
+                            stats = timings
                     else:
                         # regular execution
                         runner(filename,prog_ns,prog_ns,exit_ignore=exit_ignore)
@@ -1669,7 +1726,63 @@ Currently the magic system has the following functions:\n"""
                 
         return stats
 
-    @testdec.skip_doctest
+    def magic_runcache(self, parameter_s=''):
+        """Show the memory used by the namespaces of the scripts %run keeps.
+
+        %runcache [-c] [-l<N>]
+
+        After a script is run, its namespace is kept until the script is run
+        again, so that the functions and classes it defined keep working.
+        This shows a table of these namespaces, with the memory they use
+        (see %whos --memory), the least recently run first.  The 'Shared'
+        column is the part of that memory also used by the interactive
+        namespace or by the namespaces listed above; the total counts it
+        once, so it is the memory the cache keeps alive by itself.
+
+        Options:
+
+          -c: clear the cache.
+
+          -l<N>: keep at most N namespaces (0 for no limit), dropping the
+          least recently run ones.  This sets the main_ns_cache_size
+          configuration option of the shell.
+
+        The table is returned, so that it can be used programmatically like
+        the one of %whos --memory.
+        """
+        opts, args = self.parse_options(parameter_s, 'cl:')
+        shell = self.shell
+        if 'c' in opts:
+            shell.clear_main_mod_cache()
+            return
+        if 'l' in opts:
+            try:
+                limit = int(opts['l'])
+            except ValueError:
+                raise UsageError('%%runcache -l expects an integer, got %r'
+                                 % opts['l'])
+            if limit < 0:
+                raise UsageError('%runcache -l expects a non-negative integer')
+            shell.main_ns_cache_size = limit
+            shell.trim_main_mod_cache()
+            return
+        if not shell._main_ns_cache:
+            print('No %run namespaces are cached.')
+            return
+        sizer = DeepSizer(shell.whos_memory_time_limit)
+        # Count the interactive namespace first, so that what the scripts
+        # put in it shows as shared
+        sizer.sizeof(shell.user_ns)
+        rows = []
+        for fname, ns in list(shell._main_ns_cache.items()):
+            size, shared, complete = sizer.sizeof(ns)
+            rows.append(MemoryRow(os.path.basename(fname), str(len(ns)),
+                                  size, shared, complete,
+                                  os.path.dirname(fname)))
+        return MemoryTable(rows, sort=False,
+            labels=('Script', 'Names', 'Size', 'Shared', 'Directory'))
+
+    @skip_doctest
     def magic_timeit(self, parameter_s =''):
         """Time execution of a Python statement or expression
 
@@ -1806,7 +1919,7 @@ Currently the magic system has the following functions:\n"""
         if tc > tc_min:
             print("Compiler time: %.2f s" % tc)
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_time(self,parameter_s = ''):
         """Time execution of a Python statement or expression.
 
@@ -1898,7 +2011,7 @@ Currently the magic system has the following functions:\n"""
             print("Compiler : %.2f s" % tc)
         return out
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_macro(self,parameter_s = ''):
         """Define a set of input lines as a macro for future re-execution.
 
@@ -2030,7 +2143,7 @@ Currently the magic system has the following functions:\n"""
         """Alias to %edit."""
         return self.magic_edit(parameter_s)
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_edit(self,parameter_s='',last_call=['','']):
         """Bring up an editor and execute the resulting code.
 
@@ -2437,7 +2550,7 @@ Defaulting color scheme to 'NoColor'"""
     #......................................................................
     # Functions to implement unix shell-type things
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_alias(self, parameter_s = ''):
         """Define an alias for a system command.
 
@@ -2524,8 +2637,31 @@ Defaulting color scheme to 'NoColor'"""
     def magic_rehashx(self, parameter_s = ''):
         """Update the alias table with all executable files in $PATH.
 
+        Usage:\\
+          %rehashx [-w -f -c -s]
+
         This version explicitly checks that every entry in $PATH is a file
         with execute access (os.X_OK), so it is much slower than %rehash.
+        The directories are scanned in a background thread, so the prompt
+        comes back at once.  The aliases of the directories scanned so far
+        are defined before each prompt and after each execution.
+
+        The executables found in each directory are cached, with the
+        modification time of the directory, and kept across sessions: only
+        the directories which changed since the last %rehashx are listed
+        again.  Running %rehashx while a rehash is running restarts it.
+
+        Options:
+
+          -w: wait until the rehash is done, then print how long it took.
+
+          -f: list all the directories again, ignoring the cache.
+
+          -c: cancel the rehash in progress.  The aliases already defined
+          are kept.
+
+          -s: print the progress of the current rehash, or the result of
+          the last one.
 
         Under Windows, it checks executability as a match agains a
         '|'-separated string of extensions, stored in the IPython config
@@ -2536,69 +2672,109 @@ Defaulting color scheme to 'NoColor'"""
         """
         from IPython.core.alias import InvalidAliasError
 
+        opts, args = self.parse_options(parameter_s, 'wfcs')
+        rehasher = getattr(self._magic_state, 'rehasher', None)
+        if 'c' in opts or 's' in opts:
+            if rehasher is None:
+                print('No rehash has been run.')
+                return
+            if 'c' in opts:
+                rehasher.cancel()
+                rehasher.wait()
+            self._rehashx_define()
+            print(rehasher.summary())
+            return
+        if rehasher is not None:
+            rehasher.cancel()
+            rehasher.wait()
+            self._rehashx_define()
+
         # for the benefit of module completer in ipy_completers.py
         del self.db['rootmodules']
-        
-        path = [os.path.abspath(os.path.expanduser(p)) for p in 
-            os.environ.get('PATH','').split(os.pathsep)]
-        path = list(filter(os.path.isdir,path))
 
+        path = rehash.path_dirs()
+        alias_manager = self.shell.alias_manager
+        db = self.db
         syscmdlist = []
-        # Now define isexec in a cross platform manner.
+
+        # write the whole function for posix/Windows so we don't have an if
+        # in the innermost part
         if os.name == 'posix':
-            isexec = lambda fname:os.path.isfile(fname) and \
-                     os.access(fname,os.X_OK)
+            def define(names):
+                for ff in names:
+                    try:
+                        # Removes dots from the name since ipython
+                        # will assume names with dots to be python.
+                        alias_manager.define_alias(ff.replace('.',''), ff)
+                    except InvalidAliasError:
+                        pass
+                    else:
+                        syscmdlist.append(ff)
         else:
-            try:
-                winext = os.environ['pathext'].replace(';','|').replace('.','')
-            except KeyError:
-                winext = 'exe|com|bat|py'
-            if 'py' not in winext:
-                winext += '|py'
-            execre = re.compile(r'(.*)\.(%s)$' % winext,re.IGNORECASE)
-            isexec = lambda fname:os.path.isfile(fname) and execre.match(fname)
-        savedir = os.getcwd()
-
-        # Now walk the paths looking for executables to alias.
-        try:
-            # write the whole loop for posix/Windows so we don't have an if in
-            # the innermost part
-            if os.name == 'posix':
-                for pdir in path:
-                    os.chdir(pdir)
-                    for ff in os.listdir(pdir):
-                        if isexec(ff):
-                            try:
-                                # Removes dots from the name since ipython
-                                # will assume names with dots to be python.
-                                self.shell.alias_manager.define_alias(
-                                    ff.replace('.',''), ff)
-                            except InvalidAliasError:
-                                pass
-                            else:
-                                syscmdlist.append(ff)
-            else:
-                no_alias = self.shell.alias_manager.no_alias
-                for pdir in path:
-                    os.chdir(pdir)
-                    for ff in os.listdir(pdir):
-                        base, ext = os.path.splitext(ff)
-                        if isexec(ff) and base.lower() not in no_alias:
-                            if ext.lower() == '.exe':
-                                ff = base
-                                try:
-                                    # Removes dots from the name since ipython
-                                    # will assume names with dots to be python.
-                                    self.shell.alias_manager.define_alias(
-                                        base.lower().replace('.',''), ff)
-                                except InvalidAliasError:
-                                    pass
-                                syscmdlist.append(ff)
-            db = self.db
-            db['syscmdlist'] = syscmdlist
-        finally:
-            os.chdir(savedir)
-        
+            no_alias = alias_manager.no_alias
+            def define(names):
+                for ff in names:
+                    base, ext = os.path.splitext(ff)
+                    if base.lower() not in no_alias and ext.lower() == '.exe':
+                        ff = base
+                        try:
+                            # Removes dots from the name since ipython
+                            # will assume names with dots to be python.
+                            alias_manager.define_alias(
+                                base.lower().replace('.',''), ff)
+                        except InvalidAliasError:
+                            pass
+                        syscmdlist.append(ff)
+
+        # The rehash thread only scans: the alias table is used without
+        # locking, so the aliases are defined in the main thread, by
+        # _rehashx_define, from the names queued here.  None marks the end.
+        found_names = queue.Queue()
+
+        def found(pdir, names):
+            found_names.put(names)
+
+        def finished(rehasher):
+            # Directories no longer in $PATH are dropped from the cache
+            db['rehashx_cache'] = dict((pdir, rehasher.cache[pdir])
+                                       for pdir in path
+                                       if pdir in rehasher.cache)
+            found_names.put(None)
+
+        def define_found():
+            while True:
+                try:
+                    names = found_names.get_nowait()
+                except queue.Empty:
+                    return
+                if names is not None:
+                    define(names)
+                elif not rehasher.cancelled.is_set():
+                    db['syscmdlist'] = syscmdlist
+
+        if not hasattr(self._magic_state, 'rehasher'):
+            self.shell.set_hook('pre_prompt_hook', rehashx_pre_prompt)
+            self.shell.register_post_execute(self._rehashx_define)
+        rehasher = rehash.Rehasher(path, found, finished,
+                                   cache=db.get('rehashx_cache', {}),
+                                   force='f' in opts)
+        self._magic_state.rehasher = rehasher
+        self._magic_state.rehashx_define = define_found
+        rehasher.start()
+        if 'w' in opts:
+            rehasher.wait()
+            self._rehashx_define()
+            print(rehasher.summary())
+
+    def _rehashx_define(self):
+        """Define the aliases found by %rehashx since the last call.
+
+        This runs in the main thread, before each prompt and after each
+        execution, while %rehashx scans $PATH in the background."""
+        define = getattr(self._magic_state, 'rehashx_define', None)
+        if define is not None:
+            define()
+
     def magic_pwd(self, parameter_s = ''):
         """Return the current working directory path."""
         return os.getcwd()
@@ -2799,7 +2975,7 @@ Defaulting color scheme to 'NoColor'"""
                 header = 'Directory history (kept in _dh)',
                 start=ini,stop=fin)
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_sc(self, parameter_s=''):
         """Shell capture - execute a shell command and capture its output.
 
@@ -3059,6 +3235,13 @@ Defaulting color scheme to 'NoColor'"""
                 cont = eval(parameter_s,self.user_ns)
             except NameError:
                 cont = None
+        else:
+            # Files are colored once, while they don't change
+            colored = PyColorize.colored_lines.getlines(filename,
+                                                        self.shell.colors)
+            if colored is not None:
+                page.page(''.join(colored))
+                return
         if cont is None:
             print("Error: no such file or variable")
             return
@@ -3255,7 +3438,7 @@ Defaulting color scheme to 'NoColor'"""
         """Reload an IPython extension by its module name."""
         self.extension_manager.reload_extension(module_str)
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_install_profiles(self, s):
         """Install the default IPython profiles into the .ipython3 dir.
 
@@ -3313,14 +3496,14 @@ Defaulting color scheme to 'NoColor'"""
     # Pylab support: simple wrappers that activate pylab, load gui input
     # handling and modify slightly %run
 
-    @testdec.skip_doctest
+    @skip_doctest
     def _pylab_magic_run(self, parameter_s=''):
         Magic.magic_run(self, parameter_s,
                         runner=mpl_runner(self.shell.safe_execfile))
 
     _pylab_magic_run.__doc__ = magic_run.__doc__
 
-    @testdec.skip_doctest
+    @skip_doctest
     def magic_pylab(self, s):
         """Load numpy and matplotlib to work interactively.
 
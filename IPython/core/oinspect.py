@@ -22,9 +22,11 @@ import io
 import inspect
 import linecache
 import os
+import reprlib
 import sys
 import types
-from collections import namedtuple
+import weakref
+from collections import namedtuple, OrderedDict
 from itertools import zip_longest
 
 # IPython's own
@@ -79,6 +81,11 @@ info_fields = ['type_name', 'base_class', 'string_form', 'namespace',
                'ismagic', 'isalias', 'argspec', 'found', 'name',
                ]
 
+# The detail level of the info requested for call tips: only the definitions
+# and docstrings of the object are computed, never its string form, length or
+# source, which can be slow for big or lazy objects.
+calltip_detail_level = -1
+
 
 def object_info(**kw):
     """Make an object info dict with all fields present."""
@@ -117,6 +124,39 @@ def getdoc(obj):
     return ds
 
 
+def bounded_str(obj, max_len):
+    """Return str(obj), avoiding to build huge strings if possible.
+
+    Builtin strings longer than max_len are cut before anything is copied,
+    to their first and last max_len//2 + 1 characters: the result is still
+    longer than max_len, so that callers know to elide its middle.  Builtin
+    containers are rendered with reprlib, which only looks at their first
+    few items.  Everything else goes through str().
+    """
+    obj_type = type(obj)
+    if obj_type in (str, bytes, bytearray):
+        if len(obj) > max_len:
+            half = max_len//2 + 1
+            obj = obj[:half] + obj[-half:]
+        return str(obj) if obj_type is str else repr(obj)
+    if obj_type in (list, tuple, dict, set, frozenset):
+        limited = reprlib.Repr()
+        limited.maxstring = limited.maxother = max_len
+        limited.maxlist = limited.maxtuple = limited.maxdict = \
+            limited.maxset = limited.maxfrozenset = max(max_len//4, 6)
+        return limited.repr(obj)
+    return str(obj)
+
+
+def module_mtime(obj):
+    """Return the modification time of the file of obj's module, or None."""
+    try:
+        module = sys.modules.get(getattr(obj, '__module__', None))
+        return os.stat(module.__file__).st_mtime
+    except Exception:
+        return None
+
+
 def getsource(obj,is_binary=False):
     """Wrapper around inspect.getsource.
 
@@ -240,13 +280,20 @@ class myStringIO(io.StringIO):
 
 
 class Inspector:
+    # The most call tip infos kept by info()
+    calltip_cache_size = 200
+
     def __init__(self, color_table=InspectColors,
                  code_color_table=PyColorize.ANSICodeColors,
                  scheme='NoColor',
                  str_detail_level=0):
+        # {(id(obj), oname): (weakref to obj, mtime, info)}, in LRU order
+        self._calltip_cache = OrderedDict()
         self.color_table = color_table
         self.parser = PyColorize.Parser(code_color_table,out='str')
         self.format = self.parser.format
+        # Colored lines of the files shown by psource and pfile
+        self.colored_lines = PyColorize.ColoredLinesCache(self.parser)
         self.str_detail_level = str_detail_level
         self.set_active_scheme(scheme)
 
@@ -341,7 +388,24 @@ class Inspector:
         except:
             self.noinfo('source',oname)
         else:
-            page.page(self.format(src))
+            page.page(self._format_source(obj,src))
+
+    def _format_source(self,obj,src):
+        """Color src, the source of obj, with the colored lines of its file.
+
+        The source is colored on its own if it doesn't come from a file."""
+        try:
+            lines, lineno = inspect.getsourcelines(obj)
+            ofile = inspect.getsourcefile(obj)
+        except (TypeError, IOError):
+            ofile = None
+        if ofile and ''.join(lines) == src:
+            first = max(lineno, 1)
+            colored = self.colored_lines.getrange(ofile, first,
+                                                  first + len(lines) - 1)
+            if colored is not None:
+                return ''.join(colored)
+        return self.format(src)
 
     def pfile(self,obj,oname=''):
         """Show the whole file where an object was defined."""
@@ -373,7 +437,11 @@ class Inspector:
             # Print only text files, not extension binaries.  Note that
             # getsourcelines returns lineno with 1-offset and page() uses
             # 0-offset, so we must adjust.
-            page.page(self.format(open(ofile).read()),lineno-1)
+            colored = self.colored_lines.getlines(ofile)
+            if colored is None:
+                page.page(self.format(open(ofile).read()),lineno-1)
+            else:
+                page.page(''.join(colored),lineno-1)
 
     def pinfo(self,obj,oname='',formatter=None,info=None,detail_level=0):
         """Show detailed information about an object.
@@ -441,7 +509,7 @@ class Inspector:
         # String form, but snip if too long in ? form (full in ??)
         if detail_level >= self.str_detail_level:
             try:
-                ostr = str(obj)
+                ostr = str(obj) if detail_level else bounded_str(obj, string_max)
                 str_head = 'String Form:'
                 if not detail_level and len(ostr)>string_max:
                     ostr = ostr[:shalf] + ' <...> ' + ostr[-shalf:]
@@ -610,9 +678,45 @@ class Inspector:
         - info: a structure with some information fields which may have been
         precomputed already.
 
-        - detail_level: if set to 1, more information is given.
+        - detail_level: if set to 1, more information is given.  If set to
+        calltip_detail_level (-1), only the fields needed for a call tip are
+        computed, and they are cached until obj's module changes on disk.
         """
-
+        if detail_level != calltip_detail_level or formatter is not None or \
+            (info is not None and (info.ismagic or info.isalias)):
+            return self._info(obj, oname, formatter, info, detail_level)
+
+        # Bound methods are created anew on every attribute access
+        target = getattr(obj, '__func__', obj)
+        # The cache mustn't keep the objects alive: those which can't be
+        # weakly referenced aren't cached, except builtin functions, which
+        # live as long as their module anyway.
+        try:
+            ref = weakref.ref(target)
+        except TypeError:
+            if not isinstance(target, types.BuiltinFunctionType):
+                return self._info(obj, oname, formatter, info, detail_level)
+            ref = lambda: target
+        key = (id(target), oname)
+        mtime = module_mtime(target)
+        cache = self._calltip_cache
+        entry = cache.pop(key, None)
+        if entry is None or entry[0]() is not target or entry[1] != mtime:
+            entry = (ref, mtime, self._info(obj, oname, formatter, info,
+                                            detail_level))
+        cache[key] = entry
+        while len(cache) > self.calltip_cache_size:
+            cache.popitem(last=False)
+
+        out = dict(entry[2])
+        # call_tip() modifies the argspec
+        if out['argspec'] is not None:
+            out['argspec'] = dict(out['argspec'])
+        return out
+
+    def _info(self, obj, oname, formatter, info, detail_level):
+        """Compute the object info dict, see info()."""
+        calltip = detail_level == calltip_detail_level
         obj_type = type(obj)
 
         header = self.__head
@@ -663,9 +767,9 @@ class Inspector:
         except: pass
 
         # String form, but snip if too long in ? form (full in ??)
-        if detail_level >= self.str_detail_level:
+        if not calltip and detail_level >= self.str_detail_level:
             try:
-                ostr = str(obj)
+                ostr = str(obj) if detail_level else bounded_str(obj, string_max)
                 str_head = 'string_form'
                 if not detail_level and len(ostr)>string_max:
                     ostr = ostr[:shalf] + ' <...> ' + ostr[-shalf:]
@@ -684,29 +788,32 @@ class Inspector:
             out['namespace'] = ospace
 
         # Length (for strings and lists)
-        try:
-            out['length'] = str(len(obj))
-        except: pass
+        if not calltip:
+            try:
+                out['length'] = str(len(obj))
+            except: pass
 
-        # Filename where object was defined
+        # Filename where object was defined (not needed for call tips)
         binary_file = False
-        try:
+        if not calltip:
             try:
-                fname = inspect.getabsfile(obj)
-            except TypeError:
-                # For an instance, the file that matters is where its class was
-                # declared.
-                if hasattr(obj,'__class__'):
-                    fname = inspect.getabsfile(obj.__class__)
-            if fname.endswith('<string>'):
-                fname = 'Dynamically generated function. No source code available.'
-            if (fname.endswith('.so') or fname.endswith('.dll')):
+                try:
+                    fname = inspect.getabsfile(obj)
+                except TypeError:
+                    # For an instance, the file that matters is where its
+                    # class was declared.
+                    if hasattr(obj,'__class__'):
+                        fname = inspect.getabsfile(obj.__class__)
+                if fname.endswith('<string>'):
+                    fname = 'Dynamically generated function. ' \
+                            'No source code available.'
+                if (fname.endswith('.so') or fname.endswith('.dll')):
+                    binary_file = True
+                out['file'] = fname
+            except:
+                # if anything goes wrong, we don't want to show source, so
+                # it's as if the file was binary
                 binary_file = True
-            out['file'] = fname
-        except:
-            # if anything goes wrong, we don't want to show source, so it's as
-            # if the file was binary
-            binary_file = True
 
         # reconstruct the function definition and print it:
         defln = self._getdef(obj, oname)
@@ -715,11 +822,11 @@ class Inspector:
 
         # Docstrings only in detail 0 mode, since source contains them (we
         # avoid repetitions).  If source fails, we add them back, see below.
-        if ds and detail_level == 0:
+        if ds and detail_level <= 0:
                 out['docstring'] = ds
                 
         # Original source code for any callable
-        if detail_level:
+        if detail_level > 0:
             # Flush the source cache because inspect can return out-of-date
             # source
             linecache.checkcache()
@@ -0,0 +1,164 @@
+# encoding: utf-8
+"""Finding the executables in $PATH, for %rehashx.
+
+The directories are listed with os.scandir, without changing the working
+directory, and the executables found in each one are cached with its
+modification time.  A directory whose mtime hasn't changed isn't listed again,
+so that with a warm cache a rehash only stats the directories of $PATH.
+"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import os
+import re
+import threading
+import time
+
+#-----------------------------------------------------------------------------
+# Code
+#-----------------------------------------------------------------------------
+
+def path_dirs(path=None):
+    """Return the existing directories of path, $PATH by default.
+
+    The directories are absolute, in the order of path, without duplicates.
+    """
+    if path is None:
+        path = os.environ.get('PATH', '')
+    dirs = []
+    for p in path.split(os.pathsep):
+        p = os.path.abspath(os.path.expanduser(p))
+        if p not in dirs and os.path.isdir(p):
+            dirs.append(p)
+    return dirs
+
+
+def exec_test():
+    """Return a function telling if an os.DirEntry is an executable file.
+
+    Under Windows, executability is a match against the extensions in
+    %PATHEXT%, which defaults to 'exe|com|bat|py'.
+    """
+    if os.name == 'posix':
+        return lambda entry: entry.is_file() and \
+                   os.access(entry.path, os.X_OK)
+    try:
+        winext = os.environ['pathext'].replace(';','|').replace('.','')
+    except KeyError:
+        winext = 'exe|com|bat|py'
+    if 'py' not in winext:
+        winext += '|py'
+    execre = re.compile(r'(.*)\.(%s)$' % winext,re.IGNORECASE)
+    return lambda entry: entry.is_file() and execre.match(entry.name)
+
+
+def scan_dir(pdir, isexec=None):
+    """Return the sorted names of the executables in the directory pdir."""
+    if isexec is None:
+        isexec = exec_test()
+    with os.scandir(pdir) as entries:
+        return sorted(entry.name for entry in entries if isexec(entry))
+
+
+class Rehasher(threading.Thread):
+    """This thread finds the executables of a list of directories.
+
+    For each directory, in order, found(pdir, names) is called in this
+    thread with the names of its executables, as soon as they are known.
+
+    cache is a dict {directory: (mtime, names)}, which is updated in place:
+    the directories whose mtime is the cached one aren't listed again,
+    unless force is True.  Directories that can't be listed are skipped.
+    finished(rehasher), if given, is called in this thread when the rehash
+    stops, cancelled or not.
+
+    A rehash is stopped by `cancel`; `done` is set once it has stopped,
+    cancelled or not.  The counters `ndirs` (directories done), `nscanned`
+    (directories listed) and `nexec` (executables found) and `elapsed`
+    (seconds) can be read while it runs.
+    """
+    daemon = True
+
+    def __init__(self, dirs, found, finished=None, cache=None, force=False,
+                 isexec=None):
+        threading.Thread.__init__(self)
+        self.dirs = list(dirs)
+        self.found = found
+        self.finished = finished
+        self.cache = {} if cache is None else cache
+        self.force = force
+        self.isexec = exec_test() if isexec is None else isexec
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.error = None
+        self.ndirs = self.nscanned = self.nexec = 0
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    def run(self):
+        self.start_time = time.time()
+        try:
+            for pdir in self.dirs:
+                if self.cancelled.is_set():
+                    break
+                try:
+                    mtime = os.stat(pdir).st_mtime
+                    cached = self.cache.get(pdir)
+                    if cached is not None and cached[0] == mtime and \
+                           not self.force:
+                        names = cached[1]
+                    else:
+                        names = scan_dir(pdir, self.isexec)
+                        self.cache[pdir] = (mtime, names)
+                        self.nscanned += 1
+                except OSError:
+                    continue
+                self.found(pdir, names)
+                self.ndirs += 1
+                self.nexec += len(names)
+            if self.finished is not None:
+                self.finished(self)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.end_time = time.time()
+            self.done.set()
+
+    def cancel(self):
+        """Stop after the current directory."""
+        self.cancelled.set()
+
+    def wait(self, timeout=None):
+        """Wait until the rehash has stopped; return True if it has."""
+        return self.done.wait(timeout)
+
+    def summary(self):
+        """Return a line reporting the progress, or the result, of the rehash.
+        """
+        if not self.done.is_set():
+            state = 'running'
+        elif self.error is not None:
+            state = 'failed (%s)' % self.error
+        elif self.cancelled.is_set() and self.ndirs < len(self.dirs):
+            state = 'cancelled'
+        else:
+            state = 'done'
+        return ('%s: %i executables in %i/%i directories '
+                '(%i rescanned) in %.3f s' %
+                (state, self.nexec, self.ndirs, len(self.dirs),
+                 self.nscanned, self.elapsed))
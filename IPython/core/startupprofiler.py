@@ -0,0 +1,222 @@
+# encoding: utf-8
+"""
+Measure where the time goes when IPython starts.
+
+Start ipython with ``--profile-startup`` (or with the environment variable
+``IPYTHON_PROFILE_STARTUP`` set) and, once the shell is ready, a report is
+printed of how long each initialization step of the application and the
+shell took, and of the modules that were slowest to import.
+
+The profiler is started by the top level IPython package before it imports
+anything else, so that all of IPython's own imports are timed.  It only uses
+the standard library for the same reason.
+"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import types
+from functools import wraps
+
+#-----------------------------------------------------------------------------
+# Module globals
+#-----------------------------------------------------------------------------
+
+#: The running StartupProfiler, if startup profiling was asked for
+profiler = None
+
+#-----------------------------------------------------------------------------
+# Classes and functions
+#-----------------------------------------------------------------------------
+
+def requested(argv=None, environ=None):
+    """Return whether startup profiling was asked for."""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    return '--profile-startup' in argv or \
+        bool(environ.get('IPYTHON_PROFILE_STARTUP'))
+
+
+class _TimedLoader(object):
+    """Wrap a module loader to time the execution of its modules."""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._profiler.timing_import(module.__name__):
+            self._loader.exec_module(module)
+
+
+class _TimingFinder(object):
+    """A meta path finder that hands out timed loaders.
+
+    It asks the other finders on sys.meta_path for the module and wraps the
+    loader they find in a `_TimedLoader`.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self.profiler)
+        return spec
+
+
+class _Timing(object):
+    """Context manager adding the time spent in it to a profiler record."""
+
+    def __init__(self, records, name):
+        self.records = records
+        self.name = name
+
+    def __enter__(self):
+        records = self.records
+        self.order = records.started
+        records.started += 1
+        self.depth = len(records.stack)
+        self.children = 0.0
+        records.stack.append(self)
+        self.start = time.time()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.time() - self.start
+        stack = self.records.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        self.records.items.append((self.order, self.name, self.depth,
+                                   elapsed, elapsed - self.children))
+
+
+class _Records(object):
+    """The timings of one kind, steps or imports."""
+
+    def __init__(self):
+        self.stack = []
+        self.started = 0
+        # (start order, name, nesting depth, cumulative time, own time)
+        self.items = []
+
+
+class StartupProfiler(object):
+    """Record the duration of startup steps and module imports."""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.end_time = None
+        self.steps = _Records()
+        self.imports = _Records()
+        self._finder = None
+        self._instrumented = [] # (cls, name, original or None)
+
+    def timing_import(self, name):
+        return _Timing(self.imports, name)
+
+    def timing_step(self, name):
+        return _Timing(self.steps, name)
+
+    def start(self):
+        """Start timing imports."""
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def stop(self):
+        """Stop timing, undoing all instrumentation."""
+        if self.end_time is None:
+            self.end_time = time.time()
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+        for cls, name, original in reversed(self._instrumented):
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        self._instrumented = []
+
+    def instrument(self, cls, prefixes):
+        """Time the methods of cls whose names start with one of prefixes."""
+        for name in dir(cls):
+            if not name.startswith(tuple(prefixes)):
+                continue
+            # Only plain methods, not class or static methods
+            for klass in cls.__mro__:
+                if name in klass.__dict__:
+                    method = klass.__dict__[name]
+                    break
+            if not isinstance(method, types.FunctionType):
+                continue
+            self._instrumented.append((cls, name, cls.__dict__.get(name)))
+            setattr(cls, name, self._timed(method, '%s.%s' % (cls.__name__,
+                                                              name)))
+
+    def _timed(self, method, name):
+        profiler = self
+        @wraps(method)
+        def timed(*args, **kw):
+            with profiler.timing_step(name):
+                return method(*args, **kw)
+        return timed
+
+    def report(self, nimports=20, stream=None):
+        """Print the steps and the nimports slowest imports to stream."""
+        if stream is None:
+            stream = sys.stderr
+        end = self.end_time or time.time()
+        imports = self.imports.items
+        write = stream.write
+        write('Startup profile: %.3f s in total, %.3f s importing %i modules\n'
+              % (end - self.start_time, sum(item[4] for item in imports),
+                 len(imports)))
+        if self.steps.items:
+            write('\nInitialization steps (cumulative time):\n')
+            for order, name, depth, total, own in sorted(self.steps.items):
+                write('%9.4f s  %s%s\n' % (total, '  '*depth, name))
+        if imports and nimports:
+            slowest = sorted(imports, key=lambda item: item[4],
+                             reverse=True)[:nimports]
+            write('\nSlowest imports (own time, cumulative time):\n')
+            for order, name, depth, total, own in slowest:
+                write('%9.4f s %9.4f s  %s\n' % (own, total, name))
+        stream.flush()
+
+
+def start():
+    """Start the startup profiler, if it isn't running already."""
+    global profiler
+    if profiler is None:
+        profiler = StartupProfiler()
+        profiler.start()
+    return profiler
@@ -0,0 +1,54 @@
+"""Tests for the fast breakpoints of the IPython debugger.
+"""
+
+import sys
+from io import StringIO
+
+import nose.tools as nt
+
+from IPython.core import debugger
+
+def target():
+    x = 1
+    return x
+
+def caller():
+    y = target()
+    y += 1
+    return y
+
+class RecordingPdb(debugger.Pdb):
+    """Record the lines the debugger stops at."""
+    def print_stack_entry(self, frame_lineno, *args, **kw):
+        self.stops.append(frame_lineno[1])
+
+def run_caller(fast, commands):
+    deb = RecordingPdb(stdin=StringIO(commands), stdout=StringIO())
+    deb.fast_breakpoints = fast
+    deb.stops = []
+    deb.set_break(target.__code__.co_filename,
+                  target.__code__.co_firstlineno + 1)
+    try:
+        deb.runcall(caller)
+    finally:
+        sys.settrace(None)
+    return deb.stops
+
+def test_break_anywhere():
+    deb = debugger.Pdb(stdin=StringIO(), stdout=StringIO())
+    deb.set_break(target.__code__.co_filename,
+                  target.__code__.co_firstlineno + 1)
+    frame = sys._getframe()
+    nt.assert_false(deb.break_anywhere(frame))
+    deb.fast_breakpoints = False
+    nt.assert_true(deb.break_anywhere(frame))
+
+def test_fast_breakpoints_stepping():
+    # Continue to the breakpoint, then step back up into caller
+    commands = 'c\nn\nn\nn\nc\n'
+    first = caller.__code__.co_firstlineno
+    stops = run_caller(True, commands)
+    nt.assert_equal(stops, run_caller(False, commands))
+    nt.assert_equal(stops[0], first + 1)
+    nt.assert_equal(stops[1], target.__code__.co_firstlineno + 1)
+    nt.assert_equal(stops[-1], first + 2)
@@ -3,7 +3,10 @@
 
 import nose.tools as nt
 
-from IPython.core.formatters import FormatterABC, DefaultFormatter
+from IPython.core.formatters import (
+    FormatterABC, PlainTextFormatter as DefaultFormatter, HTMLFormatter,
+    DisplayFormatter
+)
 
 class A(object):
     def __repr__(self):
@@ -28,3 +31,60 @@ def test_pretty():
 def test_deferred():
     f = DefaultFormatter()
 
+
+class C(object):
+    def __html__(self):
+        return '<b>C</b>'
+
+def test_lookup_cache():
+    f = HTMLFormatter()
+    nt.assert_equals(f(A()), None)
+    f.for_type(A, lambda obj: 'an A')
+    nt.assert_equals(f(B()), 'an A')
+    f.type_printers[B] = lambda obj: 'a B'
+    nt.assert_equals(f(B()), 'a B')
+    nt.assert_equals(f(C()), '<b>C</b>')
+
+def test_accepted_types():
+    f = DisplayFormatter()
+    nt.assert_equals(sorted(f.format(C())), ['text/html', 'text/plain'])
+    f.accepted_types = ['image/png']
+    nt.assert_equals(list(f.format(C())), ['text/plain'])
+
+def test_time_limit():
+    f = DisplayFormatter(time_limit=1e-9)
+    f.formatters['text/html'].for_type(A, lambda obj: 'slow')
+    nt.assert_equals(f.format(A())['text/html'], 'slow')
+    data = f.format(A())
+    nt.assert_false('text/html' in data)
+    nt.assert_equals(data['text/plain'], 'A()')
+
+def test_max_seq_length():
+    f = DefaultFormatter(max_seq_length=3)
+    nt.assert_equals(f(list(range(10))), '[0, 1, 2, ...]')
+    nt.assert_equals(f(dict.fromkeys(range(10), 0)), '{0: 0, 1: 0, 2: 0, ...}')
+    nt.assert_equals(f((1,)), '(1,)')
+
+def test_max_depth():
+    f = DefaultFormatter(max_depth=2)
+    nt.assert_equals(f([[1, [2, [3]]]]), '[[1, [..., ...]]]')
+
+def test_max_output_bytes():
+    f = DefaultFormatter(max_output_bytes=20)
+    out = f(list(range(1000)))
+    nt.assert_equals(len(out), 23)
+    nt.assert_true(out.endswith('...'))
+    nt.assert_equals(f('x'*100), "'" + 'x'*19 + '...')
+
+def test_max_output_bytes_exact_fit():
+    # Output of exactly max_output_bytes characters isn't truncated
+    f = DefaultFormatter(max_output_bytes=30)
+    s = 'x'*28
+    nt.assert_equals(f(s), repr(s))
+    nt.assert_equals(f(s + 'x'), "'" + 'x'*29 + '...')
+    l = list(range(10))
+    f = DefaultFormatter(max_output_bytes=len(repr(l)))
+    nt.assert_equals(f(l), repr(l))
+    # Only the closing bracket is cut
+    f = DefaultFormatter(max_output_bytes=len(repr(l))-1)
+    nt.assert_equals(f(l), repr(l)[:-1] + '...')
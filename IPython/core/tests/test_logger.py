@@ -0,0 +1,64 @@
+"""Tests for the IPython logger.
+"""
+
+import gc
+import gzip
+import os
+import shutil
+import tempfile
+import weakref
+
+import nose.tools as nt
+
+from IPython.core.logger import Logger
+
+def read(fname):
+    with open(fname) as f:
+        return f.read()
+
+def test_log_write():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'log.py')
+        logger = Logger(tmpdir, fname, loghead='# head\n', logmode='over',
+                        flush_policy='exit', max_output_length=10)
+        logger.logstart(log_output=True)
+        logger.log('a = 1\n', 'a=1\n')
+        logger.log_write('x'*15, 'output')
+        logger.flush()
+        nt.assert_equals(read(fname), '# head\na = 1\n#[Out]# xxxxxxxxxx\n'
+                         '#[Out]# [... 5 more characters not logged ...]\n')
+        logger.log_write('b = 2\n')
+        logger.logstop()
+        nt.assert_true(read(fname).endswith('b = 2\n'))
+    finally:
+        shutil.rmtree(tmpdir)
+
+def test_rotate_compressed():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'log.py')
+        logger = Logger(tmpdir, fname, logmode='rotate', compress_rotated=True)
+        for i in range(3):
+            logger.logstart()
+            logger.log_write('# log %i\n' % i)
+            logger.logstop()
+        nt.assert_equals(sorted(os.listdir(tmpdir)),
+                         ['log.py', 'log.py.001~.gz', 'log.py.002~.gz'])
+        with gzip.open(fname + '.002~.gz', 'rt') as f:
+            nt.assert_equals(f.read(), '# log 0\n')
+        nt.assert_equals(read(fname), '# log 2\n')
+    finally:
+        shutil.rmtree(tmpdir)
+
+def test_stopped_writer_released():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        logger = Logger(tmpdir, os.path.join(tmpdir, 'log.py'))
+        logger.logstart()
+        writer = weakref.ref(logger.writer)
+        logger.logstop()
+        gc.collect()
+        nt.assert_true(writer() is None)
+    finally:
+        shutil.rmtree(tmpdir)
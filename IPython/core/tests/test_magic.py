@@ -9,6 +9,7 @@ Needs to be run by nose (to make ipython session available).
 #-----------------------------------------------------------------------------
 
 import os
+import shutil
 import sys
 import tempfile
 import types
@@ -29,7 +30,7 @@ def test_rehashx():
     _ip.alias_manager.alias_table.clear()
     del _ip.db['syscmdlist']
     
-    _ip.magic('rehashx')
+    _ip.magic('rehashx -w')
     # Practically ALL ipython development systems will have more than 10 aliases
 
     yield (nt.assert_true, len(_ip.alias_manager.alias_table) > 10)
@@ -42,6 +43,52 @@ def test_rehashx():
     yield (nt.assert_true, len(scoms) > 10)
 
 
+@dec.skip_win32
+def test_rehashx_cache():
+    _ip = get_ipython()
+    tmpdir = tempfile.mkdtemp()
+    savepath = os.environ.get('PATH', '')
+    cwd = os.getcwd()
+    def add_exec(name):
+        fname = os.path.join(tmpdir, name)
+        open(fname, 'w').close()
+        os.chmod(fname, 0o755)
+    try:
+        add_exec('ipy_rehash_a')
+        open(os.path.join(tmpdir, 'ipy_rehash_data'), 'w').close()
+        os.environ['PATH'] = tmpdir
+        _ip.magic('rehashx -w')
+        nt.assert_equal(os.getcwd(), cwd)
+        nt.assert_true('ipy_rehash_a' in _ip.alias_manager)
+        nt.assert_false('ipy_rehash_data' in _ip.alias_manager)
+        cache = _ip.db['rehashx_cache']
+        nt.assert_equal(list(cache), [tmpdir])
+        nt.assert_equal(cache[tmpdir][1], ['ipy_rehash_a'])
+        # An unchanged directory isn't listed again
+        _ip.magic('rehashx -w')
+        nt.assert_equal(_ip._magic_state.rehasher.nscanned, 0)
+        # A changed one is
+        add_exec('ipy_rehash_b')
+        os.utime(tmpdir, (0, 0))
+        _ip.magic('rehashx -w')
+        nt.assert_equal(_ip._magic_state.rehasher.nscanned, 1)
+        nt.assert_true('ipy_rehash_b' in _ip.alias_manager)
+        nt.assert_equal(_ip.db['syscmdlist'], ['ipy_rehash_a', 'ipy_rehash_b'])
+        # In the background, the aliases are only defined in the main thread
+        _ip.alias_manager.undefine_alias('ipy_rehash_b')
+        _ip.magic('rehashx')
+        _ip._magic_state.rehasher.wait()
+        nt.assert_false('ipy_rehash_b' in _ip.alias_manager)
+        _ip._rehashx_define()
+        nt.assert_true('ipy_rehash_b' in _ip.alias_manager)
+    finally:
+        os.environ['PATH'] = savepath
+        _ip.alias_manager.undefine_alias('ipy_rehash_a')
+        _ip.alias_manager.undefine_alias('ipy_rehash_b')
+        del _ip.db['rehashx_cache']
+        shutil.rmtree(tmpdir)
+
+
 def test_magic_parse_options():
     """Test that we don't mangle paths when parsing magic options."""
     ip = get_ipython()
@@ -362,3 +409,44 @@ def test_xmode():
     for i in range(3):
         _ip.magic("xmode")
     nt.assert_equal(_ip.InteractiveTB.mode, xmode)
+
+def test_who_ls_types():
+    _ip.user_ns['who_ls_int'] = 1
+    _ip.user_ns['who_ls_str'] = 'a'
+    try:
+        out = _ip.magic('who_ls int')
+        nt.assert_true('who_ls_int' in out)
+        nt.assert_false('who_ls_str' in out)
+    finally:
+        del _ip.user_ns['who_ls_int'], _ip.user_ns['who_ls_str']
+
+def test_whos_memory():
+    big = list(range(1000))
+    _ip.user_ns['whos_big'] = big
+    _ip.user_ns['whos_same'] = big
+    try:
+        table = _ip.magic('whos --memory list')
+        rows = dict((row.name, row) for row in table)
+        nt.assert_equal(rows['whos_big'].size, rows['whos_same'].size)
+        nt.assert_true(rows['whos_big'].size > sys.getsizeof(big))
+        # The second one is entirely shared with the first
+        nt.assert_equal(max(row.shared for row in table), rows['whos_big'].size)
+        nt.assert_true('whos_big' in repr(table))
+    finally:
+        del _ip.user_ns['whos_big'], _ip.user_ns['whos_same']
+
+
+def test_whos_memory_shared_order():
+    s = list(range(1000))
+    _ip.user_ns['whos_a'] = [s]
+    _ip.user_ns['whos_b'] = [s] + list(range(50000))
+    try:
+        table = _ip.magic('whos --memory list')
+        names = [row.name for row in table]
+        nt.assert_true(names.index('whos_b') < names.index('whos_a'))
+        # What both share is counted for the first one listed
+        rows = dict((row.name, row) for row in table)
+        nt.assert_equal(rows['whos_b'].shared, 0)
+        nt.assert_true(rows['whos_a'].shared > sys.getsizeof(s))
+    finally:
+        del _ip.user_ns['whos_a'], _ip.user_ns['whos_b']
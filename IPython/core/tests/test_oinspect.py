@@ -14,6 +14,8 @@
 
 
 # Stdlib imports
+import gc
+import weakref
 
 # Third-party imports
 import nose.tools as nt
@@ -87,3 +89,67 @@ def test_calltip_function2():
 
 def test_calltip_builtin():
     check_calltip(sum, 'sum', None, sum.__doc__)
+
+
+def test_calltip_detail_level():
+    level = oinspect.calltip_detail_level
+    info = inspector.info(f, 'f', detail_level=level)
+    nt.assert_equal(info['docstring'], f.__doc__)
+    nt.assert_equal(info['string_form'], None)
+    nt.assert_equal(info['length'], None)
+    nt.assert_equal(info['source'], None)
+    call_line, ds = oinspect.call_tip(info)
+    nt.assert_equal(call_line, 'f(x, y=2, *a, **kw)')
+    c = Call(1)
+    call_line, ds = oinspect.call_tip(inspector.info(c.method, 'c.method',
+                                                     detail_level=level))
+    nt.assert_equal(call_line, 'c.method(x, z=2)')
+
+
+def test_calltip_cache():
+    level = oinspect.calltip_detail_level
+    insp = oinspect.Inspector()
+    c = Call(1)
+    call_tip = oinspect.call_tip(insp.info(c.method, 'c.method',
+                                           detail_level=level))
+    # Bound methods are cached by their function, and call_tip() must not
+    # change the cached argspec.
+    nt.assert_equal(list(insp._calltip_cache), [(id(Call.method), 'c.method')])
+    nt.assert_equal(oinspect.call_tip(insp.info(c.method, 'c.method',
+                                                detail_level=level)),
+                    call_tip)
+    nt.assert_equal(len(insp._calltip_cache), 1)
+    insp.calltip_cache_size = 1
+    insp.info(f, 'f', detail_level=level)
+    nt.assert_equal(list(insp._calltip_cache), [(id(f), 'f')])
+
+
+def test_bounded_str():
+    nt.assert_equal(oinspect.bounded_str('abc', 10), 'abc')
+    # Long strings are kept longer than max_len, for callers to elide them
+    cut = oinspect.bounded_str('a'*5000 + 'b'*5000, 200)
+    nt.assert_equal(cut, 'a'*101 + 'b'*101)
+    nt.assert_true(len(oinspect.bounded_str(list(range(100000)), 200)) < 300)
+    nt.assert_equal(oinspect.bounded_str(Call, 200), str(Call))
+
+
+def test_long_string_form():
+    info = inspector.info('a'*5000 + 'b'*5000, 's')
+    ostr = info['string_form']
+    nt.assert_true(' <...> ' in ostr)
+    nt.assert_true(ostr.startswith('a') and ostr.endswith('b'))
+    nt.assert_true(len(ostr) < 210)
+
+
+def test_calltip_cache_weak():
+    level = oinspect.calltip_detail_level
+    insp = oinspect.Inspector()
+    c = Call(1)
+    insp.info(c, 'c', detail_level=level)
+    ref = weakref.ref(c)
+    del c
+    gc.collect()
+    nt.assert_true(ref() is None)
+    # Objects which can't be weakly referenced aren't cached
+    insp.info([1, 2], 'l', detail_level=level)
+    nt.assert_equal(len(insp._calltip_cache), 1)
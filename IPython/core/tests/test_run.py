@@ -155,6 +155,45 @@ class TestMagicRunSimple(tt.TempFileMixin):
         _ip.runlines('t = isinstance(f(), foo)')
         nt.assert_true(_ip.user_ns['t'])
 
+    def test_run_timings(self):
+        """Test the timings of repeated runs returned by %run -t -r."""
+        self.mktmp("n = globals().get('n', 0) + 1\n")
+        t = _ip.magic('run -t -N3 -r %s' % self.fname)
+        nt.assert_equals(len(t), 3)
+        nt.assert_false(t.fresh)
+        nt.assert_equals(_ip.user_ns['n'], 3)
+        # Each run starts from a fresh namespace with -f
+        t = _ip.magic('run -t -N3 -f -r %s' % self.fname)
+        nt.assert_equals(len(t), 3)
+        nt.assert_true(t.fresh)
+        nt.assert_equals(_ip.user_ns['n'], 1)
+        nt.assert_equals(_ip.magic('run -t %s' % self.fname), None)
+
+    def test_main_ns_cache(self):
+        """Test that %run caches script namespaces without copying them."""
+        self.mktmp("x = 1\n")
+        fname = os.path.abspath(self.fname)
+        _ip.magic('run %s' % self.fname)
+        ns = _ip._main_ns_cache[fname]
+        nt.assert_equals(ns['x'], 1)
+        nt.assert_true(ns is _ip._main_mod_cache[fname].__dict__)
+        # Running the script again reuses its namespace
+        _ip.magic('run %s' % self.fname)
+        nt.assert_true(_ip._main_ns_cache[fname] is ns)
+        table = _ip.magic('runcache')
+        nt.assert_true(os.path.basename(fname) in [row.name for row in table])
+        size = _ip.main_ns_cache_size
+        try:
+            _ip.magic('runcache -l1')
+            _ip.cache_main_mod({}, 'other.py')
+            nt.assert_equals(list(_ip._main_ns_cache),
+                             [os.path.abspath('other.py')])
+            nt.assert_false(fname in _ip._main_mod_cache)
+        finally:
+            _ip.main_ns_cache_size = size
+            _ip.magic('runcache -c')
+        nt.assert_equals(len(_ip._main_ns_cache), 0)
+
     # We have to skip these in win32 because getoutputerr() crashes,
     # due to the fact that subprocess does not support close_fds when
     # redirecting stdout/err.  So unless someone who knows more tells us how to
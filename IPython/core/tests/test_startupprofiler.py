@@ -0,0 +1,64 @@
+"""Tests for the startup profiler.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from io import StringIO
+
+import nose.tools as nt
+
+from IPython.core import startupprofiler
+
+class Steps(object):
+    def init_a(self):
+        self.init_b()
+        return 'a'
+
+    def init_b(self):
+        return 'b'
+
+    def other(self):
+        return 'other'
+
+def test_requested():
+    nt.assert_true(startupprofiler.requested(['ipython', '--profile-startup'],
+                                             {}))
+    nt.assert_true(startupprofiler.requested(['ipython'],
+                                             {'IPYTHON_PROFILE_STARTUP': '1'}))
+    nt.assert_false(startupprofiler.requested(['ipython'], {}))
+
+def test_instrument():
+    profiler = startupprofiler.StartupProfiler()
+    profiler.instrument(Steps, ['init_'])
+    nt.assert_equals(Steps().init_a(), 'a')
+    nt.assert_equals(Steps().other(), 'other')
+    names = [(name, depth) for order, name, depth, total, own
+             in sorted(profiler.steps.items)]
+    nt.assert_equals(names, [('Steps.init_a', 0), ('Steps.init_b', 1)])
+    profiler.stop()
+    nt.assert_equals(Steps.__dict__['init_a'].__name__, 'init_a')
+    nt.assert_false(hasattr(Steps.__dict__['init_a'], '__wrapped__'))
+    stream = StringIO()
+    profiler.report(stream=stream)
+    nt.assert_true('  Steps.init_b' in stream.getvalue())
+
+def test_import_timing():
+    tmpdir = tempfile.mkdtemp()
+    sys.path.insert(0, tmpdir)
+    profiler = startupprofiler.StartupProfiler()
+    try:
+        with open(os.path.join(tmpdir, '_ip_startup_mod.py'), 'w') as f:
+            f.write('x = 1\n')
+        profiler.start()
+        import _ip_startup_mod
+        profiler.stop()
+        nt.assert_true(profiler._finder is None)
+        names = [item[1] for item in profiler.imports.items]
+        nt.assert_equals(names, ['_ip_startup_mod'])
+    finally:
+        profiler.stop()
+        sys.path.remove(tmpdir)
+        sys.modules.pop('_ip_startup_mod', None)
+        shutil.rmtree(tmpdir)
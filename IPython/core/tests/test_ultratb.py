@@ -0,0 +1,50 @@
+"""Tests for the limits on the size of verbose tracebacks.
+"""
+
+import sys
+
+import nose.tools as nt
+
+from IPython.core import ultratb
+
+def recurse(n):
+    if n == 0:
+        raise ValueError('bottom')
+    recurse(n-1)
+
+def get_exc_info(f, *args):
+    try:
+        f(*args)
+    except ValueError:
+        return sys.exc_info()
+
+def test_elide_repeated_frames():
+    etype, evalue, etb = get_exc_info(recurse, 100)
+    records = ultratb._fixed_getinnerframes(etb)
+    elided = ultratb.elide_repeated_frames(records)
+    markers = [r for r in elided if isinstance(r, ultratb.RepeatedFrames)]
+    nt.assert_equals(len(markers), 1)
+    nt.assert_equals(markers[0].cycle, 1)
+    nt.assert_equals(markers[0].repeats, 99)
+    # get_exc_info, one recurse frame, the marker and the innermost frame
+    nt.assert_equals(len(elided), 4)
+
+def test_value_repr():
+    tb = ultratb.VerboseTB(color_scheme='NoColor')
+    tb.max_repr_length = 50
+    nt.assert_equals(len(tb.value_repr('x'*1000)), 50)
+    nt.assert_true(len(tb.value_repr(list(range(1000)))) <= 50)
+    nt.assert_equals(tb.value_repr(12), '12')
+    tb.max_repr_length = 0
+    nt.assert_equals(tb.value_repr('x'*1000), repr('x'*1000))
+
+def test_traceback_budget():
+    tb = ultratb.VerboseTB(color_scheme='NoColor')
+    exc_info = get_exc_info(recurse, 100)
+    text = tb.text(*exc_info)
+    nt.assert_true('repeated 99 more times' in text)
+    tb.max_cycle_length = 0
+    tb.max_traceback_bytes = 2000
+    text = tb.text(*exc_info)
+    nt.assert_true('outer frames not shown' in text)
+    nt.assert_true("raise ValueError('bottom')" in text)
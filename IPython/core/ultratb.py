@@ -77,6 +77,7 @@ import linecache
 import os
 import pydoc
 import re
+import reprlib
 import sys
 import time
 import tokenize
@@ -89,7 +90,7 @@ from inspect import getsourcefile, getfile, getmodule,\
 
 # IPython's own modules
 # Modified pdb which doesn't damage IPython's readline handling
-from IPython.core import debugger, ipapi
+from IPython.core import ipapi
 from IPython.core.display_trap import DisplayTrap
 from IPython.core.excolors import exception_colors
 from IPython.utils import PyColorize
@@ -250,6 +251,43 @@ def _fixed_getinnerframes(etb, context=1,tb_offset=0):
         records[i] = tuple(buf)
     return records[tb_offset:]
 
+class RepeatedFrames(object):
+    """Marks frames elided from a traceback because they repeat.
+
+    The `cycle` frames before it are repeated `repeats` more times.
+    """
+    def __init__(self, cycle, repeats):
+        self.cycle = cycle
+        self.repeats = repeats
+
+
+def elide_repeated_frames(records, max_cycle=10, min_repeats=3):
+    """Collapse runs of frames repeated by recursion.
+
+    A block of up to max_cycle frames (same code and line number) that is
+    repeated at least min_repeats times in a row is kept once, followed by
+    a `RepeatedFrames` marker standing for the other repetitions.  Returns
+    a new list of records and markers.
+    """
+    keys = [(record[0].f_code, record[2]) for record in records]
+    result = []
+    i, n = 0, len(records)
+    while i < n:
+        for cycle in range(1, min(max_cycle, (n - i)//min_repeats) + 1):
+            block = keys[i:i+cycle]
+            repeats = 1
+            while keys[i+repeats*cycle:i+(repeats+1)*cycle] == block:
+                repeats += 1
+            if repeats >= min_repeats:
+                result.extend(records[i:i+cycle])
+                result.append(RepeatedFrames(cycle, repeats-1))
+                i += repeats*cycle
+                break
+        else:
+            result.append(records[i])
+            i += 1
+    return result
+
 # Helper function -- largely belongs to VerboseTB, but we need the same
 # functionality to produce a pseudo verbose TB for SyntaxErrors, so that they
 # can be recognized properly by ipython.el's py-traceback-line-re
@@ -331,6 +369,8 @@ class TBTools(object):
         self.old_scheme = color_scheme  # save initial value for toggles
 
         if call_pdb:
+            # The debugger is imported on demand, to keep startup fast
+            from IPython.core import debugger
             self.pdb = debugger.Pdb(self.color_scheme_table.active_scheme_name)
         else:
             self.pdb = None
@@ -628,7 +668,23 @@ class VerboseTB(TBTools):
 
     Modified version which optionally strips the topmost entries from the
     traceback, to be used with alternate interpreters (because their own code
-    would appear in the traceback)."""
+    would appear in the traceback).
+
+    To keep tracebacks of deep recursion or huge data short, frames repeated
+    by recursion are elided (see `elide_repeated_frames`), the values of
+    variables are shown with at most `max_repr_length` characters (big NumPy
+    arrays only by shape and dtype), and once the frames take more than
+    `max_traceback_bytes` characters the outer ones are left out.  Set any of
+    these to 0 to turn the limit off."""
+
+    # The longest repeated block of frames that is elided
+    max_cycle_length = 10
+    # The longest repr of a variable's value
+    max_repr_length = 1000
+    # NumPy arrays with more elements than this are summarized
+    max_array_size = 1000
+    # The size budget of all the frames of a traceback
+    max_traceback_bytes = 100000
 
     def __init__(self,color_scheme = 'Linux', call_pdb=False, ostream=None,
                  tb_offset=0, long_header=False, include_vars=True,
@@ -653,6 +709,35 @@ class VerboseTB(TBTools):
             check_cache = linecache.checkcache
         self.check_cache = check_cache
 
+    def value_repr(self, value, repr_=None):
+        """Return a repr of value of at most max_repr_length characters."""
+        numpy = sys.modules.get('numpy')
+        if numpy is not None and isinstance(value, numpy.ndarray) and \
+            self.max_array_size and value.size > self.max_array_size:
+            # Don't even let numpy format a summary of a huge array
+            return '<%s shape=%s dtype=%s>' % (type(value).__name__,
+                                                value.shape, value.dtype)
+        if repr_ is None:
+            repr_ = self._limited_repr().repr
+        r = repr_(value)
+        limit = self.max_repr_length
+        if limit and len(r) > limit:
+            r = r[:max(limit-3, 0)] + '...'
+        return r
+
+    def _limited_repr(self):
+        """A reprlib.Repr that stops at about max_repr_length characters."""
+        limited = reprlib.Repr()
+        if self.max_repr_length:
+            limited.maxstring = limited.maxother = limited.maxlong = \
+                self.max_repr_length
+            limited.maxlist = limited.maxtuple = limited.maxset = \
+                limited.maxfrozenset = limited.maxdeque = limited.maxarray = \
+                limited.maxdict = max(self.max_repr_length//10, 6)
+        else:
+            limited.repr = repr
+        return limited
+
     def structured_traceback(self, etype, evalue, etb, tb_offset=None,
                              context=5):
         """Return a nice text document describing the traceback."""
@@ -700,7 +785,17 @@ class VerboseTB(TBTools):
                         raise
                     except:
                         return 'UNRECOVERABLE REPR FAILURE'
-        def eqrepr(value, repr=text_repr): return '=%s' % repr(value)
+        value_repr = self.value_repr
+        limited_repr = self._limited_repr().repr
+        def local_repr(value):
+            try:
+                return value_repr(value, limited_repr)
+            except KeyboardInterrupt:
+                raise
+            except:
+                return value_repr(value, text_repr)
+        def eqrepr(value, repr=text_repr):
+            return '=%s' % value_repr(value, repr)
         def nullrepr(value, repr=text_repr): return ''
 
         # meat of the code begins
@@ -766,7 +861,7 @@ class VerboseTB(TBTools):
 
         # now, loop over all records printing context and info
         abspath = os.path.abspath
-        for frame, file, lnum, func, lines, index in records:
+        def format_record(frame, file, lnum, func, lines, index):
             #print '*** record:',file,lnum,func,lines,index  # dbg
             try:
                 file = file and abspath(file) or '?'
@@ -892,7 +987,7 @@ class VerboseTB(TBTools):
                     if name_base in frame.f_code.co_varnames:
                         if name_base in locals:
                             try:
-                                value = repr(eval(name_full,locals))
+                                value = local_repr(eval(name_full,locals))
                             except:
                                 value = undefined
                         else:
@@ -901,7 +996,7 @@ class VerboseTB(TBTools):
                     else:
                         if name_base in frame.f_globals:
                             try:
-                                value = repr(eval(name_full,frame.f_globals))
+                                value = local_repr(eval(name_full,frame.f_globals))
                             except:
                                 value = undefined
                         else:
@@ -916,11 +1011,36 @@ class VerboseTB(TBTools):
             level = '%s %s\n' % (link,call)
 
             if index is None:
-                frames.append(level)
+                return level
             else:
-                frames.append('%s%s' % (level,''.join(
+                return '%s%s' % (level,''.join(
                     _format_traceback_lines(lnum,index,lines,Colors,lvals,
-                                            col_scheme))))
+                                            col_scheme)))
+
+        if self.max_cycle_length:
+            records_shown = elide_repeated_frames(records,
+                                                  self.max_cycle_length)
+        else:
+            records_shown = records
+        # Format the innermost frames first, so that they are the ones kept
+        # when the traceback goes over its size budget.
+        size = 0
+        for n, record in enumerate(reversed(records_shown)):
+            if isinstance(record, RepeatedFrames):
+                frame_text = '%s[... skipping %i frames: the %i above repeated '\
+                    '%i more times ...]%s\n' % (Colors.em,
+                    record.cycle*record.repeats, record.cycle, record.repeats,
+                    ColorsNormal)
+            else:
+                frame_text = format_record(*record)
+            size += len(frame_text)
+            if self.max_traceback_bytes and frames and \
+                size > self.max_traceback_bytes:
+                frames.append('%s[... %i outer frames not shown ...]%s\n' % (
+                    Colors.em, len(records_shown) - n, ColorsNormal))
+                break
+            frames.append(frame_text)
+        frames.reverse()
 
         # Get (safely) a string form of the exception info
         try:
@@ -969,6 +1089,7 @@ class VerboseTB(TBTools):
 
         if force or self.call_pdb:
             if self.pdb is None:
+                from IPython.core import debugger
                 self.pdb = debugger.Pdb(
                     self.color_scheme_table.active_scheme_name)
             # the system displayhook may have changed, restore the original
@@ -97,12 +97,35 @@
     Or under python2.4 you might want to modify ``p.indentation`` by hand but
     this is rather ugly.
 
+
+    Limiting the output
+    ===================
+
+    Huge or deeply nested objects can be shortened with the `max_seq_length`,
+    `max_depth` and `max_output_bytes` arguments of `pretty`, `pprint` and
+    `RepresentationPrinter`.  Sequences and dicts with more items than
+    `max_seq_length` only show that many, followed by ``...``; objects nested
+    more than `max_depth` levels deep are shown as ``...``; and once
+    `max_output_bytes` characters have been produced, formatting stops and
+    ``...`` is appended.  Zero means no limit.  Printers for containers
+    should use `p.max_seq_length` and `p.too_long` to do the same::
+
+        for idx, item in enumerate(self):
+            if idx:
+                p.text(',')
+                p.breakable()
+            if p.too_long(idx):
+                p.text('...')
+                break
+            p.pretty(item)
+
     :copyright: 2007 by Armin Ronacher.
                 Portions (c) 2009 by Robert Kern.
     :license: BSD License.
 """
 
 from contextlib import contextmanager
+import heapq
 import sys
 import types
 import re
@@ -118,22 +141,27 @@ __all__ = ['pretty', 'pprint', 'PrettyPrinter', 'RepresentationPrinter',
 _re_pattern_type = type(re.compile(''))
 
 
-def pretty(obj, verbose=False, max_width=79, newline='\n'):
+def pretty(obj, verbose=False, max_width=79, newline='\n', **limits):
     """
     Pretty print the object's representation.
+
+    The `max_seq_length`, `max_depth` and `max_output_bytes` keyword
+    arguments limit the output, see `RepresentationPrinter`.
     """
     stream = StringIO()
-    printer = RepresentationPrinter(stream, verbose, max_width, newline)
+    printer = RepresentationPrinter(stream, verbose, max_width, newline,
+                                    **limits)
     printer.pretty(obj)
     printer.flush()
     return stream.getvalue()
 
 
-def pprint(obj, verbose=False, max_width=79, newline='\n'):
+def pprint(obj, verbose=False, max_width=79, newline='\n', **limits):
     """
     Like `pretty` but print to stdout.
     """
-    printer = RepresentationPrinter(sys.stdout, verbose, max_width, newline)
+    printer = RepresentationPrinter(sys.stdout, verbose, max_width, newline,
+                                    **limits)
     printer.pretty(obj)
     printer.flush()
     sys.stdout.write(newline)
@@ -304,14 +332,27 @@ class RepresentationPrinter(PrettyPrinter):
     output.  For example the default instance repr prints all attributes and
     methods that are not prefixed by an underscore if the printer is in
     verbose mode.
+
+    The output can be limited: sequences and dicts show at most
+    `max_seq_length` items, objects nested deeper than `max_depth` are
+    replaced by ``...`` and formatting stops after `max_output_bytes`
+    characters.  Zero means no limit.
     """
 
     def __init__(self, output, verbose=False, max_width=79, newline='\n',
-        singleton_pprinters=None, type_pprinters=None, deferred_pprinters=None):
+        singleton_pprinters=None, type_pprinters=None, deferred_pprinters=None,
+        max_seq_length=0, max_depth=0, max_output_bytes=0):
 
         PrettyPrinter.__init__(self, output, max_width, newline)
         self.verbose = verbose
         self.stack = []
+        self.max_seq_length = max_seq_length
+        self.max_depth = max_depth
+        self.max_output_bytes = max_output_bytes
+        if max_output_bytes:
+            self.output = _LimitedOutput(output, max_output_bytes)
+        # Set once max_output_bytes has been reached
+        self.truncated = False
         if singleton_pprinters is None:
             singleton_pprinters = _singleton_pprinters.copy()
         self.singleton_pprinters = singleton_pprinters
@@ -322,8 +363,48 @@ class RepresentationPrinter(PrettyPrinter):
             deferred_pprinters = _deferred_type_pprinters.copy()
         self.deferred_pprinters = deferred_pprinters
 
+    def too_long(self, idx):
+        """Whether the item at index idx of a sequence should be elided."""
+        return (self.max_seq_length and idx >= self.max_seq_length) or \
+            self.truncated
+
+    def text(self, obj):
+        """Add literal text to the output, up to max_output_bytes."""
+        if self.truncated:
+            return
+        PrettyPrinter.text(self, obj)
+        if self.max_output_bytes and self.output.full:
+            self.truncated = True
+            raise _OutputLimitReached()
+
+    def breakable(self, sep=' '):
+        if not self.truncated:
+            PrettyPrinter.breakable(self, sep)
+
     def pretty(self, obj):
         """Pretty print the given object."""
+        if self.truncated:
+            return
+        if not self.stack and self.max_output_bytes:
+            # This is the outermost object: stop at the output limit.  The
+            # buffer is flushed here, as its text may not fit either.
+            try:
+                self._pretty(obj)
+                self.flush()
+            except _OutputLimitReached:
+                pass
+            if self.output.full:
+                self.truncated = True
+                self.output.stream.write('...')
+                self.buffer.clear()
+                self.buffer_width = 0
+            return
+        if self.max_depth and len(self.stack) > self.max_depth:
+            self.text('...')
+            return
+        self._pretty(obj)
+
+    def _pretty(self, obj):
         obj_id = id(obj)
         cycle = obj_id in self.stack
         self.stack.append(obj_id)
@@ -369,6 +450,26 @@ class RepresentationPrinter(PrettyPrinter):
         return printer
 
 
+class _OutputLimitReached(Exception):
+    """Raised by `RepresentationPrinter.text` to stop formatting."""
+
+
+class _LimitedOutput(object):
+    """A stream wrapper that drops everything after the first nbytes."""
+
+    def __init__(self, stream, nbytes):
+        self.stream = stream
+        self.remaining = nbytes
+        self.full = False
+
+    def write(self, data):
+        if len(data) > self.remaining:
+            data = data[:self.remaining]
+            self.full = True
+        self.remaining -= len(data)
+        self.stream.write(data)
+
+
 class Printable(object):
 
     def output(self, stream, output_width):
@@ -504,6 +605,9 @@ def _seq_pprinter_factory(start, end):
             if idx:
                 p.text(',')
                 p.breakable()
+            if p.too_long(idx):
+                p.text('...')
+                break
             p.pretty(x)
         if len(obj) == 1 and type(obj) is tuple:
             # Special case for 1-item tuples.
@@ -521,16 +625,22 @@ def _dict_pprinter_factory(start, end):
         if cycle:
             return p.text('{...}')
         p.begin_group(1, start)
-        keys = list(obj.keys())
         try:
-            keys.sort()
+            if p.max_seq_length and len(obj) > p.max_seq_length:
+                # Only the keys that will be shown need sorting.
+                keys = heapq.nsmallest(p.max_seq_length + 1, obj)
+            else:
+                keys = sorted(obj)
         except Exception as e:
             # Sometimes the keys don't sort.
-            pass
+            keys = list(obj.keys())
         for idx, key in enumerate(keys):
             if idx:
                 p.text(',')
                 p.breakable()
+            if p.too_long(idx):
+                p.text('...')
+                break
             p.pretty(key)
             p.text(': ')
             p.pretty(obj[key])
@@ -92,6 +92,13 @@ class TerminalInteractiveShell(InteractiveShell):
         self.init_usage(usage)
         self.init_banner(banner1, banner2, display_banner)
 
+    def init_display_formatter(self):
+        super(TerminalInteractiveShell, self).init_display_formatter()
+        # The terminal only shows plain text, so don't compute the other
+        # formats unless the user asked for them.
+        if 'accepted_types' not in self.config.DisplayFormatter:
+            self.display_formatter.accepted_types = ['text/plain']
+
     #-------------------------------------------------------------------------
     # Things related to the terminal
     #-------------------------------------------------------------------------
@@ -221,6 +228,8 @@ class TerminalInteractiveShell(InteractiveShell):
         builtins.__dict__['__IPYTHON__active'] += 1
         
         if self.has_readline:
+            if not self.history_manager.readline_populated:
+                self.history_manager.populate_readline_history()
             self.readline_startup_hook(self.pre_readline)
         # exit_now is set by a call to %Exit or %Quit, through the
         # ask_exit callback.
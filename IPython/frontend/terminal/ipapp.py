@@ -28,7 +28,7 @@ import logging
 import os
 import sys
 
-from IPython.core import release
+from IPython.core import release, startupprofiler
 from IPython.core.crashhandler import CrashHandler
 from IPython.core.application import Application, BaseAppConfigLoader
 from IPython.frontend.terminal.interactiveshell import TerminalInteractiveShell
@@ -221,6 +221,12 @@ class IPAppConfigLoader(BaseAppConfigLoader):
         paa('--quick',
             action='store_true', dest='Global.quick',
             help="Enable quick startup with no config files.")
+        paa('--profile-startup',
+            action='store_true', dest='Global.profile_startup',
+            help=
+            """Print how long each startup step and the slowest imports took,
+            once IPython is ready.  Setting the IPYTHON_PROFILE_STARTUP
+            environment variable does the same.""")
         paa('--readline',
             action='store_true', dest='InteractiveShell.readline_use',
             help="Enable readline for command line usage.")
@@ -654,10 +660,29 @@ def load_default_config(ipython_dir=None):
     return config
 
 
+#: The methods of IPythonApp and TerminalInteractiveShell that are timed by
+#: --profile-startup
+app_startup_steps = ('create_', 'pre_', 'load_', 'post_', 'find_', 'merge_',
+                     'construct', '_enable_gui_pylab', '_load_extensions',
+                     '_run_')
+shell_startup_steps = ('__init__', 'init_')
+
+
 def launch_new_instance():
     """Create and run a full blown IPython instance"""
     app = IPythonApp()
-    app.start()
+    profiler = startupprofiler.profiler
+    if profiler is None:
+        app.start()
+        return
+    profiler.instrument(IPythonApp, app_startup_steps)
+    profiler.instrument(TerminalInteractiveShell, shell_startup_steps)
+    try:
+        app.initialize()
+    finally:
+        profiler.stop()
+        profiler.report()
+    app.start_app()
 
 
 if __name__ == '__main__':
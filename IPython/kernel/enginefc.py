@@ -39,12 +39,16 @@ from IPython.kernel.controllerservice import IControllerBase
 from IPython.kernel.engineservice import (
     IEngineBase,
     IEngineQueued,
+    IEngineThreaded,
     StrictDict
 )
+from IPython.kernel.error import FunctionCacheMiss
 from IPython.kernel.pickleutil import (
     can,
     canDict,
     canSequence,
+    canned_hashes,
+    CannedFunctionRef,
     uncan,
     uncanDict,
     uncanSequence
@@ -136,14 +140,14 @@ class FCEngineReferenceFromService(Referenceable, object):
     def remote_push_function(self, pNamespace):
         try:
             namespace = pickle.loads(pNamespace)
-        except:
-            return defer.fail(failure.Failure()).addErrback(packageFailure)
-        else:
             # The usage of globals() here is an attempt to bind any pickled functions
             # to the globals of this module.  What we really want is to have it bound
             # to the globals of the callers module.  This will require walking the 
             # stack.  BG 10/3/07.
             namespace = uncanDict(namespace, globals())
+        except:
+            return defer.fail(failure.Failure()).addErrback(packageFailure)
+        else:
             return self.service.push_function(namespace).addErrback(packageFailure)
     
     def remote_pull_function(self, keys):
@@ -172,6 +176,16 @@ class FCEngineReferenceFromService(Referenceable, object):
     def remote_keys(self):
         return list(self.service.keys()).addErrback(packageFailure)
     
+    def remote_interrupt(self):
+        if not IEngineThreaded.providedBy(self.service):
+            return False
+        return self.service.interrupt().addErrback(packageFailure)
+    
+    def remote_running_command(self):
+        if not IEngineThreaded.providedBy(self.service):
+            return None
+        return self.service.running_command().addErrback(packageFailure)
+    
     #---------------------------------------------------------------------------
     # push/pull_serialized
     #---------------------------------------------------------------------------
@@ -253,6 +267,9 @@ class EngineFromReference(object):
         self._id = None
         self._properties = StrictDict()
         self.currentCommand = None
+        # Hashes of the functions the engine has received in full
+        self._known_functions = set()
+        self.function_cache_stats = dict(sent=0, referenced=0, misses=0)
     
     def callRemote(self, *args, **kwargs):
         try:
@@ -345,16 +362,44 @@ class EngineFromReference(object):
     #---------------------------------------------------------------------------
     
     def push_function(self, namespace):
+        """Push functions, sending only the hash of those the engine has.
+
+        If the engine has dropped a function from its cache, the namespace
+        is sent again with that function in full.
+        """
+        d = self._push_function(namespace)
+        d.addErrback(self._resend_functions, namespace)
+        return d
+
+    def _push_function(self, namespace):
         try:
-            package = pickle.dumps(canDict(namespace), 2)
+            canned = canDict(dict(namespace), self._known_functions)
+            package = pickle.dumps(canned, 2)
         except:
             return defer.fail(failure.Failure())
         else:
             if isinstance(package, failure.Failure):
                 return defer.fail(package)
             else:
+                sent = canned_hashes(canned)
+                refs = [v for v in canned.values() if isinstance(v, CannedFunctionRef)]
+                self.function_cache_stats['sent'] += len(sent)
+                self.function_cache_stats['referenced'] += len(refs)
                 d = self.callRemote('push_function', package)
-                return d.addCallback(self.checkReturnForFailure)    
+                d.addCallback(self.checkReturnForFailure)
+                d.addCallback(self._functions_received, sent)
+                return d
+
+    def _functions_received(self, result, hashes):
+        self._known_functions.update(hashes)
+        return result
+
+    def _resend_functions(self, reason, namespace):
+        reason.trap(FunctionCacheMiss)
+        # The engine's cache doesn't match what we think it has, so start over
+        self.function_cache_stats['misses'] += 1
+        self._known_functions.clear()
+        return self._push_function(namespace)
     
     def pull_function(self, keys):
         d = self.callRemote('pull_function', keys)
@@ -398,6 +443,14 @@ class EngineFromReference(object):
     def keys(self):
         return self.callRemote('keys').addCallback(self.checkReturnForFailure)
     
+    def interrupt(self):
+        d = self.callRemote('interrupt')
+        return d.addCallback(self.checkReturnForFailure)
+    
+    def running_command(self):
+        d = self.callRemote('running_command')
+        return d.addCallback(self.checkReturnForFailure)
+    
     #---------------------------------------------------------------------------
     # Properties methods
     #---------------------------------------------------------------------------
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+A fork server that starts a set of engines from a pre-imported template.
+
+Starting many engines as separate processes means every one of them imports
+IPython, Twisted and Foolscap from scratch.  This program imports the bulk
+of that once and then forks the engines from itself, in batches, so that
+they share the imported modules and don't all hit the controller at once.
+It is started by :class:`IPython.kernel.launcher.ForkServerEngineSetLauncher`
+and only works on POSIX systems.
+
+Everything after ``--`` on the command line is passed to each engine.
+"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2008-2009  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import errno
+import os
+import signal
+import sys
+import time
+
+from IPython.external.argparse import ArgumentParser
+
+#-----------------------------------------------------------------------------
+# Module level variables
+#-----------------------------------------------------------------------------
+
+#: Modules imported by the template before forking.  None of them may
+#: install the Twisted reactor, as a reactor can't be shared by the engines.
+preimport_modules = [
+    'IPython',
+    'IPython.kernel.clusterdir',
+    'IPython.kernel.core.interpreter',
+    'zope.interface',
+    'twisted.application.service',
+    'twisted.python.log',
+]
+
+#-----------------------------------------------------------------------------
+# The fork server
+#-----------------------------------------------------------------------------
+
+
+def preimport(modules):
+    """Import modules, making sure that none of them installs the reactor."""
+    for name in modules:
+        __import__(name)
+        if 'twisted.internet.reactor' in sys.modules:
+            raise RuntimeError("importing %r installed the Twisted reactor, "
+                               "which the forked engines can't share" % name)
+
+
+def fork_engine(engine_argv):
+    """Fork a child that runs an engine with engine_argv and return its pid."""
+    pid = os.fork()
+    if pid:
+        return pid
+    # We are in the child now.  Never return into the fork server's loop.
+    status = 1
+    try:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+        sys.argv = ['ipengine'] + engine_argv
+        from IPython.kernel.ipengineapp import launch_new_instance
+        launch_new_instance()
+        status = 0
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+
+
+class ForkServer(object):
+    """Fork n engines in batches and wait for them to exit."""
+
+    def __init__(self, n, engine_argv, batch_size=0, batch_delay=0.0):
+        self.n = n
+        self.engine_argv = engine_argv
+        self.batch_size = batch_size or n
+        self.batch_delay = batch_delay
+        self.children = {} # {pid:index}
+
+    def forward_signal(self, signum, frame):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                pass
+
+    def start(self):
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.forward_signal)
+        start = time.time()
+        for i in range(self.n):
+            if i and not i % self.batch_size:
+                time.sleep(self.batch_delay)
+            pid = fork_engine(self.engine_argv)
+            self.children[pid] = i
+        print("Forked %i engines in %.3f s" % (self.n, time.time()-start))
+        sys.stdout.flush()
+
+    def wait(self):
+        """Wait for all the children, returning the number that failed."""
+        failed = 0
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                break
+            if self.children.pop(pid, None) is not None and status:
+                failed += 1
+        return failed
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if '--' in argv:
+        i = argv.index('--')
+        argv, engine_argv = argv[:i], argv[i+1:]
+    else:
+        engine_argv = []
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, dest='n', default=2,
+        help='The number of engines to start.')
+    parser.add_argument('--batch-size', type=int, default=0,
+        help='Fork this many engines at a time (default: all at once).')
+    parser.add_argument('--batch-delay', type=float, default=0.0,
+        help='Seconds to wait between batches.')
+    args = parser.parse_args(argv)
+
+    preimport(preimport_modules)
+    server = ForkServer(args.n, engine_argv, args.batch_size, args.batch_delay)
+    server.start()
+    return server.wait()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -38,8 +38,13 @@ __test__ = {}
 # Imports
 #-------------------------------------------------------------------------------
 
+import ast
 import copy
 import sys
+from collections import deque, OrderedDict
+import threading
+import time
+import tracemalloc
 import pickle as pickle
 
 from twisted.application import service
@@ -211,11 +216,23 @@ class IEngineQueued(IEngineBase):
     
 
 class IEngineThreaded(zi.Interface):
-    """A place holder for threaded commands.  
+    """Interface for engines that run commands in a worker thread.
+    
+    While a command runs in the worker thread, the reactor stays free to
+    answer the controller, so that the running command can be inspected and
+    interrupted.
     
     All methods should return deferreds.
     """
-    pass
+    
+    def interrupt():
+        """Raise KeyboardInterrupt in the running command.
+        
+        Returns True if a command was interrupted, False if none was running.
+        """
+    
+    def running_command():
+        """Get a dict describing the running command, or None."""
 
 
 #-------------------------------------------------------------------------------
@@ -564,7 +581,111 @@ def queue(methodToQueue):
         name = methodToQueue.__name__
         return this.submitCommand(Command(name, *args, **kwargs))
     return queuedMethod
+
+
+class _BoundNames(ast.NodeVisitor):
+    """Collect the global names bound and deleted by a module."""
+    
+    def __init__(self):
+        self.bound = set()
+        self.deleted = set()
+    
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store):
+            self.bound.add(node.id)
+            self.deleted.discard(node.id)
+        elif isinstance(node.ctx, ast.Del):
+            self.deleted.add(node.id)
+            self.bound.discard(node.id)
+    
+    def visit_alias(self, node):
+        if node.name != '*':
+            name = node.asname or node.name.split('.')[0]
+            self.bound.add(name)
+            self.deleted.discard(name)
+    
+    def _bind_only(self, node):
+        # The body of a function or class has its own scope
+        self.bound.add(node.name)
+        self.deleted.discard(node.name)
+    
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = _bind_only
+    
+    def _skip(self, node):
+        pass
+    
+    visit_Lambda = visit_ListComp = visit_SetComp = visit_DictComp = \
+        visit_GeneratorExp = _skip
+
+
+def bound_names(lines):
+    """Return (bound, deleted), the sets of global names that lines binds
+    and deletes.
+    
+    Only the statements of lines are looked at, not what the functions they
+    call do, and the names bound by star imports are not known.
+    """
+    try:
+        tree = ast.parse(lines)
+    except (SyntaxError, ValueError, TypeError):
+        return set(), set()
+    visitor = _BoundNames()
+    visitor.visit(tree)
+    return visitor.bound, visitor.deleted
+
+
+class QueueStats(object):
+    """Counters and timings of the commands that went through a queue.
+    
+    The wait of a command is the time it spent in the queue, its run time
+    the time from its start to its result (or failure).
+    """
     
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_wait = 0.0
+        self.last_wait = None
+        self.last_run = None
+    
+    def record(self, cmd, failed=False):
+        """Record the timings of cmd, which just finished."""
+        now = time.time()
+        wait = cmd.started - cmd.submitted
+        run = now - cmd.started
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self.total_wait += wait
+        self.total_run += run
+        self.max_wait = max(self.max_wait, wait)
+        self.last_wait = wait
+        self.last_run = run
+    
+    def summary(self, depth):
+        """Return the stats as a dict, depth being the current queue depth."""
+        finished = self.completed + self.failed
+        return {'depth': depth,
+                'max_depth': self.max_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'dropped': self.dropped,
+                'mean_wait': self.total_wait/finished if finished else None,
+                'mean_run': self.total_run/finished if finished else None,
+                'max_wait': self.max_wait,
+                'last_wait': self.last_wait,
+                'last_run': self.last_run}
+
+
 class QueuedEngine(object):
     """Adapt an IEngineBase to an IEngineQueued by wrapping it.
     
@@ -576,16 +697,35 @@ class QueuedEngine(object):
     mix-in intefaces.  The problem I have with this is adpatation is
     more difficult and complicated because there can be can multiple
     original and final Interfaces. 
+    
+    The queue holds at most max_queue_depth commands (0 for no limit).  When
+    it is full, queue_full_policy says what happens to a new command:
+    'reject' fails it with QueueFull, 'drop_oldest' fails the oldest queued
+    command instead.  The results of the last history_size executed
+    commands are kept for get_result.  The defaults are the class attributes
+    below, so they can be set for all the engines of a controller in its
+    config file.
+    
+    `resident` is the set of names known to be in the engine's namespace:
+    the names pushed to it and the global names bound by the code it
+    executed (see `bound_names`).  The task scheduler uses it to run tasks
+    where their data already is.  It is a best guess, as names bound by
+    the functions the code calls are not seen.
     """
     
     zi.implements(IEngineQueued)
     
-    def __init__(self, engine):
+    max_queue_depth = 0
+    queue_full_policy = 'reject'
+    history_size = 1000
+    
+    def __init__(self, engine, max_queue_depth=None, queue_full_policy=None,
+                 history_size=None):
         """Create a QueuedEngine object from an engine
         
         engine:       An implementor of IEngineCore and IEngineSerialized
-        keepUpToDate: whether to update the remote status when the 
-                      queue is empty.  Defaults to False.
+        max_queue_depth, queue_full_policy, history_size: see the class
+                      docstring, the class attributes are used if None.
         """
         
         # This is the right way to do these tests rather than 
@@ -593,14 +733,27 @@ class QueuedEngine(object):
         # picks of the interfaces that are directly declared by engine.
         assert IEngineBase.providedBy(engine), \
             "engine passed to QueuedEngine doesn't provide IEngineBase"
-            
+        
+        if max_queue_depth is not None:
+            self.max_queue_depth = max_queue_depth
+        if queue_full_policy is not None:
+            self.queue_full_policy = queue_full_policy
+        if self.queue_full_policy not in ('reject', 'drop_oldest'):
+            raise ValueError("invalid queue_full_policy: %r" %
+                             self.queue_full_policy)
+        if history_size is not None:
+            self.history_size = history_size
+        
         self.engine = engine
         self.id = engine.id
-        self.queued = []
-        self.history = {}
+        self.queued = deque()
+        # number -> result of the last executed commands, oldest first
+        self.history = OrderedDict()
         self.engineStatus = {}
         self.currentCommand = None
         self.failureObservers = []
+        self.stats = QueueStats()
+        self.resident = set()
     
     def _get_properties(self):
         return self.engine.properties
@@ -613,6 +766,8 @@ class QueuedEngine(object):
         
         d = defer.Deferred()
         cmd.setDeferred(d)
+        cmd.submitted = time.time()
+        self.stats.submitted += 1
         if self.currentCommand is not None:
             if self.currentCommand.finished:
                 # log.msg("Running command immediately: %r" % cmd)
@@ -621,17 +776,34 @@ class QueuedEngine(object):
             else:  # command is still running  
                 # log.msg("Command is running: %r" % self.currentCommand)
                 # log.msg("Queueing: %r" % cmd)
-                self.queued.append(cmd)
+                self.queueCommand(cmd)
         else:
             # log.msg("No current commands, running: %r" % cmd)
             self.currentCommand = cmd
             self.runCurrentCommand()
         return d
     
+    def queueCommand(self, cmd):
+        """Put cmd at the end of the queue, applying queue_full_policy."""
+        
+        if self.max_queue_depth and len(self.queued) >= self.max_queue_depth:
+            msg = "the queue of engine %r is full (%i commands)" % \
+                  (self.id, len(self.queued))
+            if self.queue_full_policy == 'reject':
+                self.stats.rejected += 1
+                cmd.handleError(failure.Failure(error.QueueFull(msg)))
+                return
+            self.stats.dropped += 1
+            dropped = self.queued.popleft()
+            dropped.handleError(failure.Failure(error.QueueFull(msg)))
+        self.queued.append(cmd)
+        self.stats.max_depth = max(self.stats.max_depth, len(self.queued))
+    
     def runCurrentCommand(self):
         """Run current command."""
         
         cmd = self.currentCommand
+        cmd.started = time.time()
         f = getattr(self.engine, cmd.remoteMethod, None)
         if f:
             d = f(*cmd.args, **cmd.kwargs)
@@ -645,24 +817,43 @@ class QueuedEngine(object):
     def _flushQueue(self):
         """Pop next command in queue and run it."""
         
-        if len(self.queued) > 0:
-            self.currentCommand = self.queued.pop(0)
+        if self.queued:
+            self.currentCommand = self.queued.popleft()
             self.runCurrentCommand()
     
     def saveResult(self, result):
         """Put the result in the history."""
+        self.history.pop(result['number'], None)
         self.history[result['number']] = result
+        while len(self.history) > self.history_size:
+            self.history.popitem(last=False)
         return result
     
     def finishCommand(self, result):
         """Finish currrent command."""
         
+        self.stats.record(self.currentCommand)
+        self._update_resident(self.currentCommand)
         # The order of these commands is absolutely critical.
         self.currentCommand.handleResult(result)
         self.currentCommand.finished = True
         self._flushQueue()
         return result
     
+    def _update_resident(self, cmd):
+        """Update the names resident in the engine after cmd succeeded."""
+        method = cmd.remoteMethod
+        if method in ('push', 'push_function', 'push_serialized'):
+            self.resident.update(cmd.args[0] if cmd.args else
+                                 cmd.kwargs.get('namespace', ()))
+        elif method == 'execute':
+            bound, deleted = bound_names(cmd.args[0] if cmd.args else
+                                         cmd.kwargs.get('lines', ''))
+            self.resident.update(bound)
+            self.resident.difference_update(deleted)
+        elif method in ('reset', 'kill'):
+            self.resident.clear()
+    
     def abortCommand(self, reason):
         """Abort current command.
         
@@ -679,6 +870,7 @@ class QueuedEngine(object):
         # otherwise the errback chain could trigger new commands to be added to the 
         # queue before we clear it.  We should clear ONLY the commands that were in
         # the queue when the error occured. 
+        self.stats.record(self.currentCommand, failed=True)
         self.currentCommand.finished = True
         s = "%r %r %r" % (self.currentCommand.remoteMethod, self.currentCommand.args, self.currentCommand.kwargs)
         self.clear_queue(msg=s)
@@ -711,8 +903,8 @@ class QueuedEngine(object):
         pass        
 
     def get_result(self, i=None):
-        if i is None:
-            i = max(list(self.history.keys())+[None])
+        if i is None and self.history:
+            i = next(reversed(self.history))
 
         cmd = self.history.get(i, None)
         # Uncomment this line to disable chaching of results
@@ -724,7 +916,7 @@ class QueuedEngine(object):
         
     def reset(self):
         self.clear_queue()
-        self.history = {}  # reset the cache - I am not sure we should do this
+        self.history.clear()  # reset the cache - I am not sure we should do this
         return self.submitCommand(Command('reset'))
     
     def kill(self):
@@ -778,9 +970,10 @@ class QueuedEngine(object):
     def clear_queue(self, msg=''):
         """Clear the queue, but doesn't cancel the currently running commmand."""
         
-        for cmd in self.queued:
+        queued = self.queued
+        self.queued = deque()
+        for cmd in queued:
             cmd.deferred.errback(failure.Failure(error.QueueCleared(msg)))
-        self.queued = []
         return defer.succeed(None)
     
     def queue_status(self):
@@ -791,7 +984,8 @@ class QueuedEngine(object):
                 pending = repr(self.currentCommand)
         else:
             pending = repr(None)
-        dikt = {'queue':list(map(repr,self.queued)), 'pending':pending}
+        dikt = {'queue':list(map(repr,self.queued)), 'pending':pending,
+                'stats':self.stats.summary(len(self.queued))}
         return defer.succeed(dikt)
         
     def register_failure_observer(self, obs):
@@ -800,6 +994,27 @@ class QueuedEngine(object):
     def unregister_failure_observer(self, obs):
         self.failureObservers.remove(obs)
     
+    #---------------------------------------------------------------------------
+    # IEngineThreaded methods
+    #---------------------------------------------------------------------------
+    
+    def interrupt(self):
+        """Interrupt the running command, without going through the queue.
+        
+        Only engines running their commands in a thread (see IEngineThreaded)
+        can be interrupted.  The interrupted command fails with
+        KeyboardInterrupt, which clears the queue like other failures.
+        """
+        if self.currentCommand is None or self.currentCommand.finished or \
+               not hasattr(self.engine, 'interrupt'):
+            return defer.succeed(False)
+        return self.engine.interrupt()
+    
+    def running_command(self):
+        if not hasattr(self.engine, 'running_command'):
+            return defer.succeed(None)
+        return self.engine.running_command()
+    
 
 # Now register QueuedEngine as an adpater class that makes an IEngineBase into a
 # IEngineQueued.  
@@ -822,6 +1037,9 @@ class Command(object):
         self.args = args
         self.kwargs = kwargs
         self.finished = False
+        # When the command was submitted to and started by a QueuedEngine
+        self.submitted = None
+        self.started = None
     
     def setDeferred(self, d):
         """Sets the deferred attribute of the Command."""  
@@ -849,28 +1067,125 @@ class Command(object):
         
         self.deferred.errback(reason)
 
+
+def _set_async_exc(ident, exc):
+    """Raise exc in the thread ident, or cancel a pending one if exc is None."""
+    import ctypes
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident),
+        exc is not None and ctypes.py_object(exc) or None)
+
+
+def _max_rss():
+    """Return the peak resident memory of the process in bytes, or None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux counts in kilobytes, OS X in bytes
+    return sys.platform == 'darwin' and rss or rss*1024
+
+
 class ThreadedEngineService(EngineService):
-    """An EngineService subclass that defers execute commands to a separate 
-    thread.
-    
-    ThreadedEngineService uses twisted.internet.threads.deferToThread to 
-    defer execute requests to a separate thread. GUI frontends may want to 
-    use ThreadedEngineService as the engine in an 
-    IPython.frontend.frontendbase.FrontEndBase subclass to prevent
-    block execution from blocking the GUI thread.
+    """An EngineService subclass that runs commands in a worker thread.
+    
+    The commands using the shell (execute, push, pull, ...) run one at a
+    time in a worker thread, so that the reactor keeps answering the
+    controller while user code runs: the properties methods,
+    `running_command` and `interrupt` are handled right away.  GUI frontends
+    may want to use ThreadedEngineService as the engine in an
+    IPython.frontend.frontendbase.FrontEndBase subclass to prevent block
+    execution from blocking the GUI thread.
+    
+    The result of execute has a 'stats' entry, a dict with the wall and CPU
+    time of the command in seconds ('wall_time', 'cpu_time'), the peak
+    resident memory of the engine in bytes ('max_rss') and, if trace_memory
+    is true, the peak memory allocated by the command ('peak_memory', from
+    tracemalloc, which slows execution down).  The stats of the last
+    command, whatever it was, are in `command_stats`.
     """
     
-    zi.implements(IEngineBase)
+    zi.implements(IEngineBase, IEngineThreaded)
+    
+    # The commands run in the reactor thread, they don't use the shell
+    control_methods = frozenset(['set_properties', 'get_properties',
+                                 'del_properties', 'has_properties',
+                                 'clear_properties'])
 
-    def __init__(self, shellClass=Interpreter, mpi=None):
+    def __init__(self, shellClass=Interpreter, mpi=None, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.command_stats = None
+        self.threadpool = None
+        # Guards _running, so that a command isn't interrupted once it has
+        # finished.
+        self._lock = threading.Lock()
+        # (thread id, msg, start time) of the running command
+        self._running = None
+        self._interrupted = False
         EngineService.__init__(self, shellClass, mpi)
     
-    def wrapped_execute(self, msg, lines):
-        """Wrap self.shell.execute to add extra information to tracebacks"""
+    def _get_threadpool(self):
+        if self.threadpool is None:
+            from twisted.python import threadpool
+            self.threadpool = threadpool.ThreadPool(1, 1, 'EngineService')
+            self.threadpool.start()
+            reactor.addSystemEventTrigger('during', 'shutdown',
+                                          self._stop_threadpool)
+        return self.threadpool
+    
+    def _stop_threadpool(self):
+        if self.threadpool is not None:
+            self.interrupt()
+            self.threadpool.stop()
+            self.threadpool = None
+    
+    def stopService(self):
+        self._stop_threadpool()
+        return EngineService.stopService(self)
+    
+    def executeAndRaise(self, msg, callable, *args, **kwargs):
+        """Call a method of self.shell in the worker thread.
         
+        The commands in control_methods are called right away.
+        """
+        if msg['method'] in self.control_methods:
+            return EngineService.executeAndRaise(self, msg, callable,
+                                                 *args, **kwargs)
+        from twisted.internet import threads
+        return threads.deferToThreadPool(reactor, self._get_threadpool(),
+            self._run_command, msg, callable, args, kwargs)
+    
+    def _run_command(self, msg, callable, args, kwargs):
+        """Run a command in the worker thread and record its stats."""
+        ident = threading.current_thread().ident
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start_cpu = time.thread_time()
+        start = time.time()
+        with self._lock:
+            self._running = (ident, msg, start)
+            self._interrupted = False
         try:
-            result = self.shell.execute(lines)
-        except Exception as e:
+            try:
+                result = callable(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running = None
+                    if self._interrupted:
+                        # The interrupt may not have been raised yet
+                        _set_async_exc(ident, None)
+                stats = {'wall_time': time.time() - start,
+                         'cpu_time': time.thread_time() - start_cpu,
+                         'max_rss': _max_rss(),
+                         'peak_memory': None}
+                if self.trace_memory:
+                    stats['peak_memory'] = \
+                        tracemalloc.get_traced_memory()[1] - start_memory
+                self.command_stats = stats
+        except:
             # This gives the following:
             # et=exception class
             # ev=exception class instance
@@ -879,25 +1194,37 @@ class ThreadedEngineService(EngineService):
             # This call adds attributes to the exception value
             et,ev,tb = self.shell.format_traceback(et,ev,tb,msg)
             # Add another attribute
-            
-            # Create a new exception with the new attributes
-            e = et(ev._ipython_traceback_text)
-            e._ipython_engine_info = msg
-            
-            # Re-raise
-            raise e
-        
+            ev._ipython_engine_info = msg
+            raise ev.with_traceback(tb)
+        if msg['method'] == 'execute':
+            result['stats'] = stats
         return result
     
+    #---------------------------------------------------------------------------
+    # IEngineThreaded methods
+    #---------------------------------------------------------------------------
     
-    def execute(self, lines):
-        # Only import this if we are going to use this class
-        from twisted.internet import threads
+    def interrupt(self):
+        """Raise KeyboardInterrupt in the running command.
         
-        msg = {'engineid':self.id,
-               'method':'execute',
-               'args':[lines]}
-        
-        d = threads.deferToThread(self.wrapped_execute, msg, lines)
-        d.addCallback(self.addIDToResult)
-        return d
+        Like Ctrl-C in a terminal, this only takes effect when the command
+        runs Python code: a long call into an extension module finishes
+        first.
+        """
+        with self._lock:
+            if self._running is None:
+                return defer.succeed(False)
+            ident, msg = self._running[:2]
+            self._interrupted = True
+            _set_async_exc(ident, KeyboardInterrupt)
+        log.msg("Interrupting %s(%s)" % (msg['method'],
+                                         ', '.join(msg['args'])))
+        return defer.succeed(True)
+    
+    def running_command(self):
+        running = self._running
+        if running is None:
+            return defer.succeed(None)
+        ident, msg, start = running
+        return defer.succeed({'method': msg['method'], 'args': msg['args'],
+                              'elapsed': time.time() - start})
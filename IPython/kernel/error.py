@@ -45,6 +45,10 @@ class QueueCleared(KernelError):
     pass
 
 
+class QueueFull(KernelError):
+    pass
+
+
 class IdInUse(KernelError):
     pass
 
@@ -112,6 +116,16 @@ class UnpickleableException(KernelError):
     pass
 
 
+class FunctionCacheMiss(KernelError):
+    """A function was sent by hash, but the receiver doesn't have it."""
+    def __init__(self, hash):
+        self.hash = hash
+        self.args = (hash,)
+
+    def __str__(self):
+        return "function %s is not in the cache" % self.hash
+
+
 class AbortedPendingDeferredError(KernelError):
     pass
 
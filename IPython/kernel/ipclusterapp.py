@@ -18,6 +18,7 @@ The ipcluster application.
 import logging
 import os
 import signal
+import time
 
 if os.name=='posix':
     from twisted.scripts._twistd_unix import daemonize
@@ -365,8 +366,25 @@ class IPClusterApp(ApplicationWithClusterDir):
             config.Global.n,
             cluster_dir=config.Global.cluster_dir
         )
+        if hasattr(self.engine_launcher, 'observe_ready'):
+            d.addCallback(self.observe_engines_ready)
         return d
 
+    def observe_engines_ready(self, r=None):
+        # Don't hold up the startup on this, just report when they are ready.
+        self._engines_start_time = self.engine_launcher.start_time
+        d = self.engine_launcher.observe_ready()
+        d.addCallback(self.ready_message)
+        return r
+
+    def ready_message(self, ready_times):
+        times = sorted(ready_times.values())
+        if times:
+            log.msg("IPython cluster: %i engines ready in %.3f s "
+                    "(per engine: min %.3f s, max %.3f s)" % (len(times), 
+                    time.time() - self._engines_start_time, times[0], times[-1]))
+        return ready_times
+
     def stop_controller(self, r=None):
         # log.msg("In stop_controller")
         if self.controller_launcher.running:
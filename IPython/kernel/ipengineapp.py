@@ -27,7 +27,7 @@ from IPython.kernel.clusterdir import (
     ClusterDirConfigLoader
 )
 from IPython.kernel.engineconnector import EngineConnector
-from IPython.kernel.engineservice import EngineService
+from IPython.kernel.engineservice import EngineService, ThreadedEngineService
 from IPython.kernel.fcutil import Tub
 from IPython.utils.importstring import import_item
 
@@ -87,10 +87,26 @@ class IPEngineAppConfigLoader(ClusterDirConfigLoader):
             type=str, dest='MPI.use',
             help='How to enable MPI (mpi4py, pytrilinos, or empty string to disable).',
             metavar='MPI.use')
+        # Execution
+        paa('--no-threads',
+            action='store_false', dest='Global.threaded',
+            help='Run commands in the reactor thread. By default they run in '
+            'a worker thread, so that the engine keeps answering the '
+            'controller and can be interrupted while it computes.')
+        paa('--trace-memory',
+            action='store_true', dest='Global.trace_memory',
+            help='Measure the peak memory allocated by each command with '
+            'tracemalloc (slows execution down). Needs threads.')
         # Global config
         paa('--log-to-file',
             action='store_true', dest='Global.log_to_file',
             help='Log to a file in the log directory (default is stdout)')
+        paa('--ready-fd',
+            type=int, dest='Global.ready_fd',
+            help='A file descriptor on which to write "ready <pid>" once the '
+            'engine has registered with the controller. Used by launchers '
+            'to measure startup time.',
+            metavar='Global.ready_fd')
 
 
 #-----------------------------------------------------------------------------
@@ -116,6 +132,9 @@ class IPEngineApp(ApplicationWithClusterDir):
         # Global config attributes
         self.default_config.Global.exec_lines = []
         self.default_config.Global.shell_class = 'IPython.kernel.core.interpreter.Interpreter'
+        # Whether commands run in a worker thread, see ThreadedEngineService
+        self.default_config.Global.threaded = True
+        self.default_config.Global.trace_memory = False
 
         # Configuration related to the controller
         # This must match the filename (path not included) that the controller
@@ -130,6 +149,10 @@ class IPEngineApp(ApplicationWithClusterDir):
         self.default_config.Global.connect_delay = 0.1
         self.default_config.Global.connect_max_tries = 15
 
+        # If non-negative, the file descriptor used to tell the launcher
+        # that this engine has registered.
+        self.default_config.Global.ready_fd = -1
+
         # MPI related config attributes
         self.default_config.MPI.use = ''
         self.default_config.MPI.mpi4py = mpi4py_init
@@ -167,7 +190,11 @@ class IPEngineApp(ApplicationWithClusterDir):
 
         # Create the underlying shell class and EngineService
         shell_class = import_item(self.master_config.Global.shell_class)
-        self.engine_service = EngineService(shell_class, mpi=mpi)
+        if self.master_config.Global.threaded:
+            self.engine_service = ThreadedEngineService(shell_class, mpi=mpi,
+                trace_memory=self.master_config.Global.trace_memory)
+        else:
+            self.engine_service = EngineService(shell_class, mpi=mpi)
 
         self.exec_lines()
 
@@ -203,7 +230,18 @@ class IPEngineApp(ApplicationWithClusterDir):
             log.msg(f.getErrorMessage())
             reactor.callLater(0.1, reactor.stop)
 
-        d.addErrback(handle_error)
+        d.addCallbacks(self.notify_ready, handle_error)
+
+    def notify_ready(self, r=None):
+        """Tell the launcher on Global.ready_fd that we have registered."""
+        fd = self.master_config.Global.ready_fd
+        if fd >= 0:
+            try:
+                os.write(fd, ('ready %i\n' % os.getpid()).encode('ascii'))
+                os.close(fd)
+            except OSError:
+                log.msg("Could not write to ready fd %i" % fd)
+        return r
 
     def start_mpi(self):
         global mpi
@@ -18,10 +18,11 @@ Facilities for launching IPython processes asynchronously.
 import os
 import re
 import sys
+import time
 
 from IPython.config.configurable import Configurable
 from IPython.external import Itpl
-from IPython.utils.traitlets import Str, Int, List, Unicode
+from IPython.utils.traitlets import Str, Int, Float, Bool, List, Unicode
 from IPython.utils.path import get_ipython_module_path
 from IPython.utils.process import find_cmd, pycmd2argv, FindCmdError
 from IPython.kernel.twistedutil import (
@@ -35,7 +36,7 @@ from IPython.kernel.winhpcjob import (
 )
 
 from twisted.internet import reactor, defer
-from twisted.internet.defer import inlineCallbacks
+from twisted.internet.defer import inlineCallbacks, returnValue
 from twisted.internet.protocol import ProcessProtocol
 from twisted.internet.utils import getProcessOutput
 from twisted.internet.error import ProcessDone, ProcessTerminated
@@ -60,6 +61,14 @@ ipcontroller_cmd_argv = pycmd2argv(get_ipython_module_path(
     'IPython.kernel.ipcontrollerapp'
 ))
 
+engineforkserver_cmd_argv = pycmd2argv(get_ipython_module_path(
+    'IPython.kernel.engineforkserver'
+))
+
+# The file descriptor on which engines report that they have registered.
+# See the --ready-fd option of ipengine.
+READY_FD = 3
+
 #-----------------------------------------------------------------------------
 # Base launchers and errors
 #-----------------------------------------------------------------------------
@@ -246,6 +255,12 @@ class LocalProcessLauncherProtocol(ProcessProtocol):
             raise UnknownStatus("Unknown exit status, this is probably a "
                                 "bug in Twisted")
 
+    def childDataReceived(self, childFD, data):
+        if childFD == self.process_launcher.ready_fd:
+            self.process_launcher.notify_ready(data)
+        else:
+            ProcessProtocol.childDataReceived(self, childFD, data)
+
     def outReceived(self, data):
         log.msg(data)
 
@@ -264,12 +279,22 @@ class LocalProcessLauncher(BaseLauncher):
     # spawnProcess.
     cmd_and_args = List([])
 
+    # If not None, a pipe is connected to this file descriptor of the child,
+    # on which it (or its own children) write "ready <pid>" lines.  The
+    # number of such lines to wait for is given by expected_ready.
+    ready_fd = None
+    expected_ready = 1
+
     def __init__(self, work_dir='', config=None):
         super(LocalProcessLauncher, self).__init__(
             work_dir=work_dir, config=config
         )
         self.process_protocol = None
         self.start_deferred = None
+        self.start_time = None
+        self.ready_times = {} # {pid:seconds from start to ready}
+        self.ready_deferreds = []
+        self._ready_buffer = b''
 
     def find_args(self):
         return self.cmd_and_args
@@ -278,12 +303,17 @@ class LocalProcessLauncher(BaseLauncher):
         if self.state == 'before':
             self.process_protocol = LocalProcessLauncherProtocol(self)
             self.start_deferred = defer.Deferred()
+            childFDs = None
+            if self.ready_fd is not None:
+                childFDs = {0:'w', 1:'r', 2:'r', self.ready_fd:'r'}
+            self.start_time = time.time()
             self.process_transport = reactor.spawnProcess(
                 self.process_protocol,
                 str(self.args[0]),  # twisted expects these to be str, not unicode
                 [str(a) for a in self.args],  # str expected, not unicode
                 env=os.environ,
-                path=self.work_dir  # start in the work_dir
+                path=self.work_dir,  # start in the work_dir
+                childFDs=childFDs
             )
             return self.start_deferred
         else:
@@ -294,6 +324,36 @@ class LocalProcessLauncher(BaseLauncher):
         super(LocalProcessLauncher, self).notify_start(data)
         self.start_deferred.callback(data)
 
+    def notify_ready(self, data):
+        """Record the time to ready of processes reporting on ready_fd."""
+        lines = (self._ready_buffer + data).split(b'\n')
+        self._ready_buffer = lines.pop()
+        for line in lines:
+            parts = line.split()
+            if len(parts) == 2 and parts[0] == b'ready' and \
+                   parts[1].isdigit():
+                pid = int(parts[1])
+                self.ready_times[pid] = time.time() - self.start_time
+                log.msg('Process %i ready after %.3f s' % 
+                        (pid, self.ready_times[pid]))
+        if len(self.ready_times) >= self.expected_ready:
+            for i in range(len(self.ready_deferreds)):
+                d = self.ready_deferreds.pop()
+                d.callback(dict(self.ready_times))
+
+    def observe_ready(self):
+        """Get a deferred that fires once the process has reported ready.
+
+        It fires with a dict mapping pids to the seconds each process took
+        from being started to being ready.  It never fires if ready_fd is
+        None or if the process dies before becoming ready.
+        """
+        if len(self.ready_times) >= self.expected_ready:
+            return defer.succeed(dict(self.ready_times))
+        d = defer.Deferred()
+        self.ready_deferreds.append(d)
+        return d
+
     def stop(self):
         return self.interrupt_then_kill()
 
@@ -337,12 +397,18 @@ class LocalEngineLauncher(LocalProcessLauncher):
         ['--log-to-file','--log-level', '40'], config=True
     )
 
+    # Have the engine report when it has registered, see observe_ready.
+    report_ready = Bool(True, config=True)
+
     def find_args(self):
         return self.engine_cmd + self.engine_args
 
     def start(self, cluster_dir):
         """Start the engine by cluster_dir."""
         self.engine_args.extend(['--cluster-dir', cluster_dir])
+        if self.report_ready and os.name == 'posix':
+            self.ready_fd = READY_FD
+            self.engine_args.extend(['--ready-fd', str(READY_FD)])
         self.cluster_dir = str(cluster_dir)
         return super(LocalEngineLauncher, self).start()
 
@@ -354,32 +420,60 @@ class LocalEngineSetLauncher(BaseLauncher):
     engine_args = List(
         ['--log-to-file','--log-level', '40'], config=True
     )
+    # Start the engines in batches of this size (0 means all at once),
+    # waiting batch_delay seconds between batches, so that they don't all
+    # import IPython and register with the controller at the same moment.
+    batch_size = Int(0, config=True)
+    batch_delay = Float(0.5, config=True)
 
     def __init__(self, work_dir='', config=None):
         super(LocalEngineSetLauncher, self).__init__(
             work_dir=work_dir, config=config
         )
         self.launchers = []
+        self.start_time = None
 
+    @inlineCallbacks
     def start(self, n, cluster_dir):
         """Start n engines by profile or cluster_dir."""
         self.cluster_dir = str(cluster_dir)
+        self.start_time = time.time()
+        batch_size = self.batch_size or n
         dlist = []
         for i in range(n):
+            if i and not i % batch_size:
+                yield sleep_deferred(self.batch_delay)
             el = LocalEngineLauncher(work_dir=self.work_dir, config=self.config)
             # Copy the engine args over to each engine launcher.
-            import copy
-            el.engine_args = copy.deepcopy(self.engine_args)
+            el.engine_args = list(self.engine_args)
             d = el.start(cluster_dir)
             if i==0:
                 log.msg("Starting LocalEngineSetLauncher: %r" % el.args)
             self.launchers.append(el)
             dlist.append(d)
         # The consumeErrors here could be dangerous
+        data = yield gatherBoth(dlist, consumeErrors=True)
+        returnValue(self.notify_start(data))
+
+    def observe_ready(self):
+        """Get a deferred that fires once all the engines have registered.
+
+        It fires with a dict mapping engine pids to the seconds each took to
+        become ready.  Call this after the deferred from start has fired.
+        """
+        dlist = [el.observe_ready() for el in self.launchers]
         dfinal = gatherBoth(dlist, consumeErrors=True)
-        dfinal.addCallback(self.notify_start)
+        dfinal.addCallback(self._merge_ready_times)
         return dfinal
 
+    def _merge_ready_times(self, ready_list):
+        ready_times = {}
+        for r in ready_list:
+            ready_times.update(r)
+        log.msg('%i engines ready after %.3f s' % 
+                (len(ready_times), time.time() - self.start_time))
+        return ready_times
+
     def find_args(self):
         return ['engine set']
 
@@ -409,6 +503,60 @@ class LocalEngineSetLauncher(BaseLauncher):
         return dfinal
 
 
+class ForkServerEngineSetLauncher(LocalProcessLauncher):
+    """Launch a set of engines forked from a pre-imported template process.
+
+    A single :mod:`IPython.kernel.engineforkserver` process imports IPython
+    and the kernel once, then forks the engines from itself in batches.
+    This is much faster than :class:`LocalEngineSetLauncher` for large
+    numbers of engines, but only works on POSIX systems.
+    """
+
+    forkserver_cmd = List(engineforkserver_cmd_argv, config=True)
+    # Command line arguments for each ipengine.
+    engine_args = List(
+        ['--log-to-file','--log-level', '40'], config=True
+    )
+    # Fork the engines in batches of this size (0 means all at once),
+    # waiting batch_delay seconds between batches.
+    batch_size = Int(0, config=True)
+    batch_delay = Float(0.5, config=True)
+
+    def __init__(self, work_dir='', config=None):
+        super(ForkServerEngineSetLauncher, self).__init__(
+            work_dir=work_dir, config=config
+        )
+        self.n = 0
+
+    def find_args(self):
+        return self.forkserver_cmd + [
+            '-n', str(self.n),
+            '--batch-size', str(self.batch_size),
+            '--batch-delay', str(self.batch_delay),
+            '--'] + self.engine_args
+
+    def start(self, n, cluster_dir):
+        """Start n engines by profile or cluster_dir."""
+        self.n = n
+        self.expected_ready = n
+        self.ready_fd = READY_FD
+        self.engine_args.extend(['--cluster-dir', cluster_dir,
+                                 '--ready-fd', str(READY_FD)])
+        self.cluster_dir = str(cluster_dir)
+        log.msg("Starting ForkServerEngineSetLauncher: %r" % self.args)
+        return super(ForkServerEngineSetLauncher, self).start()
+
+    def observe_ready(self):
+        d = super(ForkServerEngineSetLauncher, self).observe_ready()
+        d.addCallback(self._log_ready)
+        return d
+
+    def _log_ready(self, ready_times):
+        log.msg('%i engines ready after %.3f s' % 
+                (len(ready_times), max(list(ready_times.values()) or [0])))
+        return ready_times
+
+
 #-----------------------------------------------------------------------------
 # MPIExec launchers
 #-----------------------------------------------------------------------------
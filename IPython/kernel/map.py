@@ -58,22 +58,13 @@ class Map:
         if p<0 or p>=q:
           print("No partition exists.")
           return
-          
-        remainder = len(seq)%q
-        basesize = len(seq)/q
-        hi = []
-        lo = []
-        for n in range(q):
-            if n < remainder:
-                lo.append(n * (basesize + 1))
-                hi.append(lo[-1] + basesize + 1)
-            else:
-                lo.append(n*basesize + remainder)
-                hi.append(lo[-1] + basesize)
-
         
-        result = seq[lo[p]:hi[p]]
-        return result
+        # The first `remainder` partitions get one extra element, so the
+        # boundaries of partition p can be computed directly.
+        basesize, remainder = divmod(len(seq), q)
+        lo = p*basesize + min(p, remainder)
+        hi = lo + basesize + (p < remainder)
+        return seq[lo:hi]
            
     def joinPartitions(self, listOfPartitions):
         return self.concatenate(listOfPartitions)
@@ -92,30 +83,99 @@ class Map:
         return listOfPartitions
 
 class RoundRobinMap(Map):
-    """Partitions a sequence in a roun robin fashion.
+    """Partitions a sequence in a round robin fashion.
     
-    This currently does not work!
+    Element i of the sequence goes to partition i%q, which spreads
+    neighbouring (and often similarly expensive) elements across engines.
     """
 
     def getPartition(self, seq, p, q):
+        if p<0 or p>=q:
+          print("No partition exists.")
+          return
         return seq[p:len(seq):q]
-        #result = []
-        #for i in range(p,len(seq),q):
-        #    result.append(seq[i])
-        #return result
 
     def joinPartitions(self, listOfPartitions):
-        #lengths = [len(x) for x in listOfPartitions]
-        #maxPartitionLength = len(listOfPartitions[0])
-        #numberOfPartitions = len(listOfPartitions)
-        #concat = self.concatenate(listOfPartitions)
-        #totalLength = len(concat)
-        #result = []
-        #for i in range(maxPartitionLength):
-        #    result.append(concat[i:totalLength:maxPartitionLength])
-        return self.concatenate(listOfPartitions)
-        
-dists = {'b':Map}
+        """Interleave the partitions back into the original order."""
+        testObject = listOfPartitions[0]
+        q = len(listOfPartitions)
+        # Array types: concatenate to get a result of the right type and
+        # dtype, then scatter the elements back into their original slots.
+        for m in arrayModules:
+            if isinstance(testObject, m['type']):
+                flat = m['module'].concatenate(listOfPartitions)
+                result = flat.copy()
+                start = 0
+                for p, part in enumerate(listOfPartitions):
+                    result[p::q] = flat[start:start+len(part)]
+                    start += len(part)
+                return result
+        if not isinstance(testObject, (list, tuple)):
+            return listOfPartitions
+        total = sum(len(part) for part in listOfPartitions)
+        result = [None]*total
+        for p, part in enumerate(listOfPartitions):
+            result[p:total:q] = part
+        return result
 
-    
-    
+def engine_weight(properties):
+    """Return the relative speed of an engine from its properties dict.
+
+    An explicit ``weight`` property wins; otherwise the weight is
+    ``speed * ncores``, where each missing factor defaults to 1.
+    """
+    if 'weight' in properties:
+        return float(properties['weight'])
+    return float(properties.get('speed', 1))*properties.get('ncores', 1)
+
+class WeightedMap(Map):
+    """Partitions a sequence into contiguous blocks sized by weight.
+
+    Partition p receives a share of the sequence proportional to
+    ``weights[p]``.  Without weights (or with weights that do not match
+    the number of partitions) this behaves exactly like `Map`.
+    """
+
+    # Tells scatter/gather to fetch engine properties and build the weights
+    # with `engine_weight`.
+    uses_properties = True
+
+    def __init__(self, weights=None):
+        if weights is not None:
+            weights = [float(w) for w in weights]
+            if min(weights) < 0 or sum(weights) <= 0:
+                raise ValueError("weights must be non-negative with a "
+                                 "positive sum: %r" % weights)
+        self.weights = weights
+        self._bounds = {}
+
+    @classmethod
+    def from_properties(cls, properties):
+        """Create a WeightedMap from a list of engine properties dicts."""
+        return cls([engine_weight(props) for props in properties])
+
+    def _boundaries(self, n, q):
+        """Cumulative partition boundaries for a length n sequence."""
+        key = (n, q)
+        bounds = self._bounds.get(key)
+        if bounds is None:
+            bounds = [0]
+            acc = 0.0
+            total = sum(self.weights)
+            for w in self.weights[:-1]:
+                acc += w
+                bounds.append(int(n*acc/total + 0.5))
+            bounds.append(n)
+            self._bounds[key] = bounds
+        return bounds
+
+    def getPartition(self, seq, p, q):
+        if self.weights is None or len(self.weights) != q:
+            return Map.getPartition(self, seq, p, q)
+        if p<0 or p>=q:
+          print("No partition exists.")
+          return
+        bounds = self._boundaries(len(seq), q)
+        return seq[bounds[p]:bounds[p+1]]
+
+dists = {'b':Map, 'r':RoundRobinMap, 'w':WeightedMap}
@@ -96,8 +96,8 @@ class MultiEngineMapper(object):
             multiengine : `IMultiEngine` implementer
                 The multiengine to use for running the map commands
             dist : str
-                The type of decomposition to use.  Only block ('b') is
-                supported currently
+                The type of decomposition to use: block ('b'), round robin
+                ('r') or weighted block ('w')
             targets : (str, int, tuple of ints)
                 The engines to use in the map
             block : boolean
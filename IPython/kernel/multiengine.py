@@ -172,6 +172,13 @@ class IEngineMultiplexer(Interface):
     def clear_queue(targets='all'):
         """Clear the queue of pending command for targets."""
         
+    def interrupt(targets='all'):
+        """Interrupt the command running on targets.
+        
+        Only engines running their commands in a thread can be interrupted,
+        see `IPython.kernel.engineservice.ThreadedEngineService`.
+        """
+        
     def queue_status(targets='all'):
         """Get the status of the queue on the targets."""
     
@@ -395,6 +402,9 @@ class MultiEngine(ControllerAdapterBase):
     def clear_queue(self, targets='all'):
         return self._performOnEnginesAndGatherBoth('clear_queue', targets=targets)         
     
+    def interrupt(self, targets='all'):
+        return self._performOnEnginesAndGatherBoth('interrupt', targets=targets)
+    
     def queue_status(self, targets='all'):
         log.msg("Getting queue status on %r" % targets)
         try:
@@ -519,6 +529,12 @@ class ISynchronousMultiEngine(ISynchronousEngineMultiplexer):
     def get_pending_deferred(deferredID, block=True):
         """"""
     
+    def wait_pending_deferreds(deferred_ids, wait_all=False, timeout=None):
+        """Return a deferred to a dict of the completed results of deferred_ids.
+        
+        See `PendingDeferredManager.wait_pending_deferreds`.
+        """
+    
     def clear_pending_deferreds():
         """"""
 
@@ -595,6 +611,10 @@ class SynchronousMultiEngine(PendingDeferredManager):
     def clear_queue(self, targets='all'):
         return self.multiengine.clear_queue(targets)
     
+    @two_phase
+    def interrupt(self, targets='all'):
+        return self.multiengine.interrupt(targets)
+    
     @two_phase
     def queue_status(self, targets='all'):
         return self.multiengine.queue_status(targets)
@@ -668,6 +688,27 @@ class IMultiEngineCoordinator(Interface):
         and `map` methods for an API that follows that of the builtin
         `map`.
         """
+    
+    def reduce(func, key, partitioned=True, targets='all'):
+        """
+        Reduce the object key of targets with func, moving one value per engine.
+        
+        If partitioned is true, key is a sequence on each engine (like the
+        partitions made by `scatter`) and each engine reduces its elements
+        first.  Otherwise the values of key on the engines are reduced.
+        The values of the engines are then combined pairwise, in a tree.
+        
+        func takes two arguments and must be associative.  It can be a
+        function, a builtin or a NumPy ufunc, or the name of one that both
+        the engines and the client can import ('max', 'operator.add',
+        'numpy.add').  Arrays are reduced with a ufunc's `reduce` method and
+        accumulated in place.
+        """
+    
+    def allreduce(func, key, result_key, partitioned=True, targets='all'):
+        """
+        Like `reduce`, but also push the result to targets as result_key.
+        """
 
 
 class ISynchronousMultiEngineCoordinator(IMultiEngineCoordinator):
@@ -694,6 +735,13 @@ class ISynchronousMultiEngineCoordinator(IMultiEngineCoordinator):
         and `map` methods for an API that follows that of the builtin
         `map`.
         """
+    
+    def reduce(func, key, partitioned=True, targets='all', block=True):
+        """Reduce the object key of targets with func, see `IMultiEngineCoordinator`."""
+    
+    def allreduce(func, key, result_key, partitioned=True, targets='all',
+                  block=True):
+        """Like `reduce`, but also push the result to targets as result_key."""
 
 
 #-------------------------------------------------------------------------------
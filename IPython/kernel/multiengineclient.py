@@ -17,6 +17,7 @@ __docformat__ = "restructuredtext en"
 #-------------------------------------------------------------------------------
 
 import sys
+import time
 import warnings
 
 from twisted.python import components
@@ -148,11 +149,32 @@ class PendingResult(object):
             self.raised = True
             raise
         else:
-            for cb in self.callbacks:
-                result = cb[0](result, *cb[1], **cb[2])
-            self.result = result
-            self.called = True
-            return result
+            return self._set_result(result)
+    
+    def _set_result(self, result):
+        """Record a result delivered by the client and run the callbacks.
+        
+        A `Failure` is recorded as an exception that `get_result` reraises.
+        """
+        if isinstance(result, Failure):
+            try:
+                result.raiseException()
+            except:
+                self.result = sys.exc_info()
+                self.called = True
+                self.raised = True
+                raise
+        for cb in self.callbacks:
+            result = cb[0](result, *cb[1], **cb[2])
+        self.result = result
+        self.called = True
+        return result
+    
+    def _get_done(self):
+        return self.called
+    
+    done = property(_get_done)
+    """True once the result (or exception) has been retrieved."""
         
     def add_callback(self, f, *args, **kwargs):
         """Add a callback that is called with the result.
@@ -241,6 +263,13 @@ class QueueStatusList(list):
             output.append("    Pending: %s\n" % repr(e[1]['pending']))
             for q in e[1]['queue']:
                 output.append("    Command: %s\n" % repr(q))
+            stats = e[1].get('stats')
+            if stats and stats['mean_wait'] is not None:
+                output.append("    Completed: %i, failed: %i, rejected: %i, "
+                              "mean wait: %.3f s, mean run: %.3f s\n" %
+                              (stats['completed'], stats['failed'],
+                               stats['rejected'], stats['mean_wait'],
+                               stats['mean_run']))
         return ''.join(output)
 
 
@@ -396,6 +425,84 @@ class FullBlockingMultiEngineClient(InteractiveMultiEngineClient):
     def get_pending_deferred(self, deferredID, block):
         return self._bcft(self.smultiengine.get_pending_deferred, deferredID, block)
     
+    def _check_pending_results(self, pendingResults):
+        prList = list(pendingResults)
+        for pr in prList:
+            if not isinstance(pr, PendingResult):
+                raise error.NotAPendingResult("Objects passed to barrier must be PendingResult instances")
+        return prList
+    
+    def wait(self, pendingResults, wait_all=True, timeout=None):
+        """Wait for a set of `PendingResult` objects to complete.
+        
+        The controller is asked for all the results in a single call, which
+        returns as soon as one (``wait_all=False``) or all of them are ready,
+        instead of polling each `PendingResult` in turn.  Retrieved results
+        are removed from the controller and recorded in their
+        `PendingResult`, so `get_result` and `r` return them (or reraise
+        their exceptions) without contacting the controller again.
+        
+        :Parameters:
+            pendingResults : sequence of `PendingResult`
+                The results to wait on.
+            wait_all : boolean
+                Wait for all the results rather than the first one.
+            timeout : float or None
+                The maximum number of seconds to wait.
+        
+        :Returns: A tuple ``(done, not_done)`` of lists of `PendingResult`.
+        """
+        prList = self._check_pending_results(pendingResults)
+        waiting = dict((pr.result_id, pr) for pr in prList if not pr.called)
+        already_done = len(waiting) < len(prList)
+        if waiting and (wait_all or not already_done):
+            completed = self._bcft(self.smultiengine.wait_pending_deferreds,
+                list(waiting.keys()), wait_all, timeout)
+            for did, result in completed.items():
+                try:
+                    waiting[did]._set_result(result)
+                except Exception:
+                    # Recorded in the PendingResult, reraised by get_result
+                    pass
+        done = [pr for pr in prList if pr.called]
+        not_done = [pr for pr in prList if not pr.called]
+        return done, not_done
+    
+    def wait_any(self, pendingResults, timeout=None):
+        """Wait until at least one of pendingResults is done.
+        
+        See `wait` for details.
+        """
+        return self.wait(pendingResults, False, timeout)
+    
+    def wait_all(self, pendingResults, timeout=None):
+        """Wait until all of pendingResults are done.
+        
+        See `wait` for details.
+        """
+        return self.wait(pendingResults, True, timeout)
+    
+    def as_completed(self, pendingResults, timeout=None):
+        """Iterate over pendingResults, yielding each one as it completes.
+        
+        Results that are already done are yielded first.  If timeout seconds
+        elapse before all the results are done, `ResultNotCompleted` is raised.
+        """
+        not_done = self._check_pending_results(pendingResults)
+        if timeout is not None:
+            deadline = time.time() + timeout
+        while not_done:
+            remaining = None
+            if timeout is not None:
+                remaining = max(deadline - time.time(), 0)
+            done, not_done = self.wait(not_done, False, remaining)
+            if not done:
+                raise error.ResultNotCompleted(
+                    "%i results not completed after %r seconds" % 
+                    (len(not_done), timeout))
+            for pr in done:
+                yield pr
+    
     def barrier(self, pendingResults):
         """Synchronize a set of `PendingResults`.
         
@@ -403,9 +510,7 @@ class FullBlockingMultiEngineClient(InteractiveMultiEngineClient):
         `PendingResult` objects to complete.  More specifically, barier does
         the following.
         
-        * The `PendingResult`s are sorted by result_id.
-        * The `get_result` method is called for each `PendingResult` sequentially
-          with block=True.
+        * All of the results are waited for with a single `wait_all` call.
         * If a `PendingResult` gets a result that is an exception, it is 
           trapped and can be re-raised later by calling `get_result` again.
         * The `PendingResult`s are flushed from the controller.
@@ -414,21 +519,7 @@ class FullBlockingMultiEngineClient(InteractiveMultiEngineClient):
         be retrieved by calling `get_result` again or accesing the `r` attribute
         of the instance.
         """
-        
-        # Convert to list for sorting and check class type 
-        prList = list(pendingResults)
-        for pr in prList:
-            if not isinstance(pr, PendingResult):
-                raise error.NotAPendingResult("Objects passed to barrier must be PendingResult instances")
-                            
-        # Sort the PendingResults so they are in order
-        prList.sort()
-        # Block on each PendingResult object
-        for pr in prList:
-            try:
-                result = pr.get_result(block=True)
-            except Exception:
-                pass
+        self.wait_all(pendingResults)
     
     def flush(self):
         """
@@ -664,6 +755,25 @@ class FullBlockingMultiEngineClient(InteractiveMultiEngineClient):
         targets, block = self._findTargetsAndBlock(targets, block)
         return self._blockFromThread(self.smultiengine.clear_queue, targets=targets, block=block)
     
+    def interrupt(self, targets=None, block=None):
+        """
+        Interrupt the command running on engines, like Ctrl-C would.
+        
+        The interrupted commands fail with a KeyboardInterrupt, which also
+        clears the queues of their engines.  Only engines running their
+        commands in a thread (the default for ipengine) can be interrupted.
+        
+        :Parameters:
+            targets : id or list of ids
+                The engine to use for the execution
+            block : boolean
+                If False, this method will return the actual result.  If False,
+                a `PendingResult` is returned which can be used to get the result
+                at a later time.
+        """
+        targets, block = self._findTargetsAndBlock(targets, block)
+        return self._blockFromThread(self.smultiengine.interrupt, targets=targets, block=block)
+    
     def queue_status(self, targets=None, block=None):
         """
         Get the status of an engines queue.
@@ -754,6 +864,49 @@ class FullBlockingMultiEngineClient(InteractiveMultiEngineClient):
         return self._blockFromThread(self.smultiengine.raw_map, func, seq, 
             dist, targets=targets, block=block)
     
+    def reduce(self, func, key, partitioned=True, targets=None, block=None):
+        """
+        Reduce the object key on a set of engines, moving one value per engine.
+        
+        This is much cheaper than gathering the data and reducing it locally:
+        each engine reduces its own data and only the results are sent back
+        and combined.
+        
+        :Parameters:
+            func : function, builtin, ufunc or str
+                An associative function of two arguments, or the name of one
+                that both the engines and the client can import, like
+                'operator.add' or 'numpy.add'.  With a NumPy ufunc, arrays
+                are reduced with its `reduce` method and accumulated in
+                place.
+            key : str
+                The name of the object to reduce on the engines
+            partitioned : boolean
+                If True, key is a sequence on each engine, like the
+                partitions made by `scatter`, whose elements are reduced.
+                If False, the values of key on the engines are reduced.
+            targets : id or list of ids
+                The engine to use for the execution
+            block : boolean
+                If False, this method will return the actual result.  If False,
+                a `PendingResult` is returned which can be used to get the result
+                at a later time.
+        """
+        targets, block = self._findTargetsAndBlock(targets, block)
+        return self._blockFromThread(self.smultiengine.reduce, func, key,
+            partitioned, targets=targets, block=block)
+    
+    def allreduce(self, func, key, result_key, partitioned=True, targets=None, block=None):
+        """
+        Reduce the object key on a set of engines and push the result to them.
+        
+        The result is pushed as result_key and also returned.  See `reduce`
+        for the other arguments.
+        """
+        targets, block = self._findTargetsAndBlock(targets, block)
+        return self._blockFromThread(self.smultiengine.allreduce, func, key,
+            result_key, partitioned, targets=targets, block=block)
+    
     def map(self, func, *sequences):
         """
         A parallel version of Python's builtin `map` function.
@@ -777,8 +930,8 @@ class FullBlockingMultiEngineClient(InteractiveMultiEngineClient):
         
         :Parameters:
             dist : str
-                What decomposition to use, 'b' is the only one supported
-                currently
+                What decomposition to use: 'b' (block), 'r' (round robin)
+                or 'w' (blocks weighted by engine properties)
             targets : str, int, sequence of ints
                 Which engines to use for the map
             block : boolean
@@ -802,8 +955,8 @@ class FullBlockingMultiEngineClient(InteractiveMultiEngineClient):
         
         :Parameters:
             dist : str
-                What decomposition to use, 'b' is the only one supported
-                currently
+                What decomposition to use: 'b' (block), 'r' (round robin)
+                or 'w' (blocks weighted by engine properties)
             targets : str, int, sequence of ints
                 Which engines to use for the map
             block : boolean
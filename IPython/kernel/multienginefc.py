@@ -18,10 +18,12 @@ __docformat__ = "restructuredtext en"
 #-------------------------------------------------------------------------------
 
 import pickle as pickle
+import time
 from types import FunctionType
 
 from zope.interface import Interface, implements
 from twisted.internet import defer
+from twisted.internet.defer import inlineCallbacks, returnValue
 from twisted.python import components, failure
 
 try:
@@ -31,6 +33,7 @@ except ImportError:
 
 from IPython.kernel import error 
 from IPython.kernel import map as Map
+from IPython.kernel import reduction
 from IPython.kernel.parallelfunction import ParallelFunction
 from IPython.kernel.mapper import (
     MultiEngineMapper, 
@@ -44,7 +47,7 @@ from IPython.kernel.multiengine import (
     ISynchronousMultiEngine)
 from IPython.kernel.pendingdeferred import PendingDeferredManager
 from IPython.kernel.pickleutil import (
-    canDict,
+    canDict, canned_hashes,
     canSequence, uncanDict, uncanSequence
 )
 
@@ -127,6 +130,27 @@ class FCSynchronousMultiEngineFromMultiEngine(Referenceable):
             d.addCallback(callback[0], *callback[1], **callback[2])
         return d
        
+    @packageResult
+    def remote_wait_pending_deferreds(self, deferred_ids, wait_all, timeout):
+        d = self.smultiengine.wait_pending_deferreds(deferred_ids, wait_all, timeout)
+        d.addCallback(self._process_completed)
+        return d
+    
+    def _process_completed(self, completed):
+        """Apply any deferred id callbacks and clean up failures."""
+        for did, result in list(completed.items()):
+            callback = self._deferredIDCallbacks.pop(did, None)
+            if isinstance(result, failure.Failure):
+                result.cleanFailure()
+            elif callback is not None:
+                try:
+                    result = callback[0](result, *callback[1], **callback[2])
+                except Exception:
+                    result = failure.Failure()
+                    result.cleanFailure()
+            completed[did] = result
+        return completed
+    
     @packageResult
     def remote_clear_pending_deferreds(self):
         return defer.maybeDeferred(self.smultiengine.clear_pending_deferreds)
@@ -161,11 +185,10 @@ class FCSynchronousMultiEngineFromMultiEngine(Referenceable):
     @packageResult    
     def remote_push_function(self, binaryNS, targets, block):
         try:
-            namespace = pickle.loads(binaryNS)
+            namespace = uncanDict(pickle.loads(binaryNS))
         except:
             d = defer.fail(failure.Failure())
         else:
-            namespace = uncanDict(namespace)
             d = self.smultiengine.push_function(namespace, targets=targets, block=block)
         return d
     
@@ -224,6 +247,10 @@ class FCSynchronousMultiEngineFromMultiEngine(Referenceable):
     def remote_clear_queue(self, targets, block):
         return self.smultiengine.clear_queue(targets=targets, block=block)
     
+    @packageResult
+    def remote_interrupt(self, targets, block):
+        return self.smultiengine.interrupt(targets=targets, block=block)
+    
     @packageResult
     def remote_queue_status(self, targets, block):
         return self.smultiengine.queue_status(targets=targets, block=block)
@@ -296,6 +323,10 @@ class FCFullSynchronousMultiEngineClient(object):
         IMapper
     )
     
+    # The longest wait on the controller while local results are also
+    # waited on, see _wait_any_mixed
+    wait_poll_interval = 0.1
+    
     def __init__(self, remote_reference):
         self.remote_reference = remote_reference
         self._deferredIDCallbacks = {}
@@ -303,6 +334,8 @@ class FCFullSynchronousMultiEngineClient(object):
         # is required for methods like gather/scatter as it enables us to
         # create our own pending deferreds for composite operations.
         self.pdm = PendingDeferredManager()
+        # Hashes of the functions the controller has received in full
+        self._known_functions = set()
     
     #---------------------------------------------------------------------------
     # Non interface methods
@@ -334,6 +367,74 @@ class FCFullSynchronousMultiEngineClient(object):
                 d.addCallback(callback[0], *callback[1], **callback[2])
             return d
     
+    def wait_pending_deferreds(self, deferred_ids, wait_all=False, timeout=None):
+        
+        # Ids of scatter/gather results live in self.pdm, the rest on the
+        # controller.
+        local_ids = [did for did in deferred_ids if self.pdm.quick_has_id(did)]
+        remote_ids = [did for did in deferred_ids if not self.pdm.quick_has_id(did)]
+        if not local_ids:
+            return self._wait_remote(remote_ids, wait_all, timeout)
+        if not remote_ids:
+            return self.pdm.wait_pending_deferreds(local_ids, wait_all, timeout)
+        if wait_all:
+            d = gatherBoth([self.pdm.wait_pending_deferreds(local_ids, True, timeout),
+                            self._wait_remote(remote_ids, True, timeout)],
+                           fireOnOneErrback=0,
+                           consumeErrors=1,
+                           logErrors=0)
+            d.addCallback(error.collect_exceptions, 'wait_pending_deferreds')
+            d.addCallback(self._merge_completed)
+            return d
+        return self._wait_any_mixed(local_ids, remote_ids, timeout)
+    
+    @inlineCallbacks
+    def _wait_any_mixed(self, local_ids, remote_ids, timeout):
+        """Wait for any of local_ids or remote_ids to complete.
+        
+        A wait on the controller can't be called off when a local result
+        arrives, so the controller is asked with waits of at most
+        `wait_poll_interval` seconds, and the local results are checked
+        between them.
+        """
+        if timeout is not None:
+            deadline = time.time() + timeout
+        interval = 0
+        while True:
+            remote = yield self._wait_remote(remote_ids, False, interval)
+            local = yield self.pdm.wait_pending_deferreds(local_ids, False, 0)
+            if remote or local:
+                break
+            interval = self.wait_poll_interval
+            if timeout is not None:
+                interval = min(interval, deadline - time.time())
+                if interval <= 0:
+                    break
+        returnValue(self._merge_completed([local, remote]))
+    
+    def _wait_remote(self, deferred_ids, wait_all, timeout):
+        d = self.remote_reference.callRemote('wait_pending_deferreds', 
+            deferred_ids, wait_all, timeout)
+        d.addCallback(self.unpackage)
+        d.addCallback(self._process_completed)
+        return d
+    
+    def _process_completed(self, completed):
+        for did in completed:
+            callback = self._deferredIDCallbacks.pop(did, None)
+            if callback is not None and not isinstance(completed[did], failure.Failure):
+                try:
+                    completed[did] = callback[0](completed[did], *callback[1], **callback[2])
+                except Exception:
+                    completed[did] = failure.Failure()
+        return completed
+    
+    def _merge_completed(self, completed_list):
+        merged = {}
+        for completed in completed_list:
+            merged.update(completed)
+        return merged
+    
     def clear_pending_deferreds(self):
         
         # This clear both the local (self.pdm) and remote pending deferreds
@@ -367,11 +468,28 @@ class FCFullSynchronousMultiEngineClient(object):
         return d
     
     def push_function(self, namespace, targets='all', block=True):
-        cannedNamespace = canDict(namespace)
+        # Functions the controller already has are sent by hash.  If it
+        # has lost any of them, send everything in full again.
+        def resend(reason):
+            reason.trap(error.FunctionCacheMiss)
+            self._known_functions.clear()
+            return self._push_function(namespace, targets, block)
+        d = self._push_function(namespace, targets, block)
+        d.addErrback(resend)
+        return d
+
+    def _push_function(self, namespace, targets, block):
+        cannedNamespace = canDict(dict(namespace), self._known_functions)
         serial = pickle.dumps(cannedNamespace, 2)
+        sent = canned_hashes(cannedNamespace)
         d = self.remote_reference.callRemote('push_function', serial, targets, block)
         d.addCallback(self.unpackage)
+        d.addCallback(self._functions_received, sent)
         return d
+
+    def _functions_received(self, result, hashes):
+        self._known_functions.update(hashes)
+        return result
     
     def pull_function(self, keys, targets='all', block=True):
         def uncan_functions(r, keys):
@@ -427,6 +545,11 @@ class FCFullSynchronousMultiEngineClient(object):
         d.addCallback(self.unpackage)
         return d
     
+    def interrupt(self, targets='all', block=True):
+        d = self.remote_reference.callRemote('interrupt', targets, block)
+        d.addCallback(self.unpackage)
+        return d
+    
     def queue_status(self, targets='all', block=True):
         d = self.remote_reference.callRemote('queue_status', targets, block)
         d.addCallback(self.unpackage)
@@ -489,16 +612,34 @@ class FCFullSynchronousMultiEngineClient(object):
         d.addCallback(create_targets)
         return d
     
+    def _create_map_object(self, engines, dist):
+        """Return a deferred to (engines, map object) for distribution dist.
+        
+        Map classes with a true `uses_properties` attribute are built from
+        the properties of the target engines, which lets weighted
+        distributions account for engine speed and core count.
+        """
+        try:
+            mapClass = Map.dists[dist]
+        except KeyError:
+            return defer.fail(failure.Failure(
+                ValueError("unknown distribution %r, valid choices are %r" %
+                           (dist, sorted(Map.dists.keys())))))
+        if getattr(mapClass, 'uses_properties', False):
+            d = self.get_properties(targets=engines, block=True)
+            d.addCallback(lambda props: (engines, mapClass.from_properties(props)))
+            return d
+        return defer.succeed((engines, mapClass()))
+    
     def scatter(self, key, seq, dist='b', flatten=False, targets='all', block=True):
         
         # Note: scatter and gather handle pending deferreds locally through self.pdm.
         # This enables us to collect a bunch fo deferred ids and make a secondary 
         # deferred id that corresponds to the entire group.  This logic is extremely
         # difficult to get right though.
-        def do_scatter(engines):
+        def do_scatter(engines_and_map):
+            engines, mapObject = engines_and_map
             nEngines = len(engines)
-            mapClass = Map.dists[dist]
-            mapObject = mapClass()
             d_list = []
             # Loop through and push to each engine in non-blocking mode.
             # This returns a set of deferreds to deferred_ids
@@ -552,6 +693,7 @@ class FCFullSynchronousMultiEngineClient(object):
                 return d_to_return
 
         d = self._process_targets(targets)
+        d.addCallback(self._create_map_object, dist)
         d.addCallback(do_scatter)
         return d
 
@@ -561,10 +703,9 @@ class FCFullSynchronousMultiEngineClient(object):
         # This enables us to collect a bunch fo deferred ids and make a secondary 
         # deferred id that corresponds to the entire group.  This logic is extremely
         # difficult to get right though.
-        def do_gather(engines):
+        def do_gather(engines_and_map):
+            engines, mapObject = engines_and_map
             nEngines = len(engines)
-            mapClass = Map.dists[dist]
-            mapObject = mapClass()
             d_list = []
             # Loop through and push to each engine in non-blocking mode.
             # This returns a set of deferreds to deferred_ids
@@ -615,6 +756,7 @@ class FCFullSynchronousMultiEngineClient(object):
                 return d_to_return
 
         d = self._process_targets(targets)
+        d.addCallback(self._create_map_object, dist)
         d.addCallback(do_gather)
         return d
 
@@ -642,11 +784,11 @@ class FCFullSynchronousMultiEngineClient(object):
         if isinstance(func, FunctionType):
             d = self.push_function(dict(_ipython_map_func=func), targets=targets, block=False)
             d.addCallback(lambda did: self.get_pending_deferred(did, True))
-            sourceToRun = '_ipython_map_seq_result = map(_ipython_map_func, *zip(*_ipython_map_seq))'
+            sourceToRun = '_ipython_map_seq_result = list(map(_ipython_map_func, *zip(*_ipython_map_seq)))'
         elif isinstance(func, str):
             d = defer.succeed(None)
             sourceToRun = \
-                '_ipython_map_seq_result = map(%s, *zip(*_ipython_map_seq))' % func
+                '_ipython_map_seq_result = list(map(%s, *zip(*_ipython_map_seq)))' % func
         else:
             raise TypeError("func must be a function or str")
         
@@ -656,6 +798,66 @@ class FCFullSynchronousMultiEngineClient(object):
         d.addCallback(lambda _: self.gather('_ipython_map_seq_result', dist, targets=targets, block=block))
         return d
 
+    def _save_local(self, d, block):
+        """Return d, or a local deferred id for it if block is False."""
+        if block:
+            return d
+        deferred_id = self.pdm.get_deferred_id()
+        self.pdm.save_pending_deferred(d, deferred_id)
+        return defer.succeed(deferred_id)
+
+    def reduce(self, func, key, partitioned=True, targets='all', block=True):
+        """
+        Reduce the object key of targets with func, moving one value per engine.
+        
+        See `IMultiEngineCoordinator.reduce`.  Engines don't have a channel
+        between them, so the values of the engines are combined here.
+        """
+        try:
+            local_func = reduction.resolve(func)
+        except (ImportError, AttributeError):
+            return defer.fail(failure.Failure())
+        if isinstance(func, str):
+            d = defer.succeed(None)
+            funcName = repr(func)
+        elif isinstance(func, FunctionType):
+            d = self.push_function(dict(_ipython_reduce_func=func), targets=targets, block=False)
+            d.addCallback(lambda did: self.get_pending_deferred(did, True))
+            funcName = '_ipython_reduce_func'
+        else:
+            # Builtins and ufuncs are pickled by name
+            d = self.push(dict(_ipython_reduce_func=func), targets=targets, block=False)
+            d.addCallback(lambda did: self.get_pending_deferred(did, True))
+            funcName = '_ipython_reduce_func'
+        if partitioned:
+            sourceToRun = \
+                'from IPython.kernel.reduction import local_reduce as _ipython_local_reduce\n' \
+                '_ipython_reduce_result = _ipython_local_reduce(%s, %s)' % (funcName, key)
+            d.addCallback(lambda _: self.execute(sourceToRun, targets=targets, block=False))
+            d.addCallback(lambda did: self.get_pending_deferred(did, True))
+            d.addCallback(lambda _: self.pull('_ipython_reduce_result', targets=targets, block=False))
+            d.addCallback(lambda did: self.get_pending_deferred(did, True))
+            # Engines with empty partitions have no value
+            d.addCallback(lambda values: [v for value in values for v in value])
+        else:
+            d.addCallback(lambda _: self.pull(key, targets=targets, block=False))
+            d.addCallback(lambda did: self.get_pending_deferred(did, True))
+        d.addCallback(lambda values: reduction.tree_reduce(local_func, values))
+        return self._save_local(d, block)
+
+    def allreduce(self, func, key, result_key, partitioned=True, targets='all', block=True):
+        """
+        Like `reduce`, but also push the result to targets as result_key.
+        """
+        def push_result(result):
+            d = self.push({result_key: result}, targets=targets, block=False)
+            d.addCallback(lambda did: self.get_pending_deferred(did, True))
+            d.addCallback(lambda _: result)
+            return d
+        d = self.reduce(func, key, partitioned, targets=targets, block=True)
+        d.addCallback(push_result)
+        return self._save_local(d, block)
+
     def map(self, func, *sequences):
         """
         A parallel version of Python's builtin `map` function.
@@ -679,8 +881,8 @@ class FCFullSynchronousMultiEngineClient(object):
         
         :Parameters:
             dist : str
-                What decomposition to use, 'b' is the only one supported
-                currently
+                What decomposition to use: 'b' (block), 'r' (round robin)
+                or 'w' (blocks weighted by engine properties)
             targets : str, int, sequence of ints
                 Which engines to use for the map
             block : boolean
@@ -704,8 +906,8 @@ class FCFullSynchronousMultiEngineClient(object):
         
         :Parameters:
             dist : str
-                What decomposition to use, 'b' is the only one supported
-                currently
+                What decomposition to use: 'b' (block), 'r' (round robin)
+                or 'w' (blocks weighted by engine properties)
             targets : str, int, sequence of ints
                 Which engines to use for the map
             block : boolean
@@ -38,8 +38,8 @@ class IMultiEngineParallelDecorator(Interface):
         
         :Parameters:
             dist : str
-                What decomposition to use, 'b' is the only one supported
-                currently
+                What decomposition to use: 'b' (block), 'r' (round robin)
+                or 'w' (blocks weighted by engine properties)
             targets : str, int, sequence of ints
                 Which engines to use for the map
             block : boolean
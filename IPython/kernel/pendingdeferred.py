@@ -22,12 +22,48 @@ __docformat__ = "restructuredtext en"
 # Imports
 #-------------------------------------------------------------------------------
 
-from twisted.internet import defer
+from twisted.internet import defer, reactor
 from twisted.python import failure
 
 from IPython.kernel import error
 from IPython.external import guid
 
+class _GroupWaiter(object):
+    """Wait for one or all of a group of pending deferreds.
+    
+    Instances are created and driven by
+    `PendingDeferredManager.wait_pending_deferreds`.
+    """
+    
+    def __init__(self, pdm, deferred_ids, wait_all):
+        self.pdm = pdm
+        self.deferred_ids = set(deferred_ids)
+        self.wait_all = wait_all
+        self.deferred = defer.Deferred()
+        self.delayed_call = None
+    
+    def ready(self):
+        completed = [did for did in self.deferred_ids if did in self.pdm.results]
+        if self.wait_all:
+            return len(completed) == len(self.deferred_ids)
+        return len(completed) > 0
+    
+    def fire(self):
+        """Hand the completed results to the waiter and forget them."""
+        if self.delayed_call is not None and self.delayed_call.active():
+            self.delayed_call.cancel()
+        self.delayed_call = None
+        completed = {}
+        for did in self.deferred_ids:
+            if self.pdm._group_waiters.get(did) is self:
+                del self.pdm._group_waiters[did]
+            if did in self.pdm.results:
+                completed[did] = self.pdm.results[did]
+        for did in completed:
+            self.pdm.delete_pending_deferred(did)
+        self.deferred.callback(completed)
+
+
 class PendingDeferredManager(object):
     """A class to track pending deferreds.
     
@@ -35,15 +71,19 @@ class PendingDeferredManager(object):
     get a deferredID by calling `get_next_deferred_id`.  Then the user
     calls `save_pending_deferred` passing that id and the deferred to
     be tracked.  To later retrieve it, the user calls
-    `get_pending_deferred` passing the id.
+    `get_pending_deferred` passing the id.  Groups of pending deferreds
+    can be waited on in a single call with `wait_pending_deferreds`.
+    
+    Results are forgotten as soon as they are handed out.
     """
     
     def __init__(self):
         """Manage pending deferreds."""
 
         self.results = {} # Populated when results are ready
-        self.deferred_ids = [] # List of deferred ids I am managing
+        self.deferred_ids = set() # Set of deferred ids I am managing
         self.deferreds_to_callback = {} # dict of lists of deferreds to callback
+        self._group_waiters = {} # deferred_id -> _GroupWaiter
         
     def get_deferred_id(self):
         return guid.generate()
@@ -51,6 +91,10 @@ class PendingDeferredManager(object):
     def quick_has_id(self, deferred_id):
         return deferred_id in self.deferred_ids
     
+    def _is_claimed(self, deferred_id):
+        return deferred_id in self.deferreds_to_callback or \
+            deferred_id in self._group_waiters
+    
     def _save_result(self, result, deferred_id):
         if self.quick_has_id(deferred_id):
             self.results[deferred_id] = result
@@ -58,18 +102,23 @@ class PendingDeferredManager(object):
     
     def _trigger_callbacks(self, deferred_id):
         # Go through and call the waiting callbacks
-        result = self.results.get(deferred_id)
-        if result is not None:  # Only trigger if there is a result
-            try:
-                d = self.deferreds_to_callback.pop(deferred_id)
-            except KeyError:
-                d = None
-            if d is not None:
-                if isinstance(result, failure.Failure):
-                    d.errback(result)
-                else:
-                    d.callback(result)
-                self.delete_pending_deferred(deferred_id)
+        if deferred_id not in self.results:  # Only trigger if there is a result
+            return
+        result = self.results[deferred_id]
+        try:
+            d = self.deferreds_to_callback.pop(deferred_id)
+        except KeyError:
+            d = None
+        if d is not None:
+            if isinstance(result, failure.Failure):
+                d.errback(result)
+            else:
+                d.callback(result)
+            self.delete_pending_deferred(deferred_id)
+            return
+        waiter = self._group_waiters.get(deferred_id)
+        if waiter is not None and waiter.ready():
+            waiter.fire()
                    
     def save_pending_deferred(self, d, deferred_id=None):
         """Save the result of a deferred for later retrieval.
@@ -81,7 +130,7 @@ class PendingDeferredManager(object):
         """
         if deferred_id is None:
             deferred_id = self.get_deferred_id()
-        self.deferred_ids.append(deferred_id)
+        self.deferred_ids.add(deferred_id)
         d.addBoth(self._save_result, deferred_id)
         return deferred_id
     
@@ -104,16 +153,21 @@ class PendingDeferredManager(object):
             if d is not None:
                 d.errback(failure.Failure(error.AbortedPendingDeferredError("pending deferred has been deleted: %r"%deferred_id)))
             # Now delete all references to this deferred_id
-            ind = self.deferred_ids.index(deferred_id)
-            self._protected_del(ind, self.deferred_ids)
+            self.deferred_ids.discard(deferred_id)
             self._protected_del(deferred_id, self.deferreds_to_callback)
-            self._protected_del(deferred_id, self.results)            
+            self._protected_del(deferred_id, self.results)
+            # A group waiter just stops waiting for this id
+            waiter = self._group_waiters.pop(deferred_id, None)
+            if waiter is not None:
+                waiter.deferred_ids.discard(deferred_id)
+                if not waiter.deferred_ids or waiter.ready():
+                    waiter.fire()
         else:
             raise error.InvalidDeferredID('invalid deferred_id: %r' % deferred_id)
     
     def clear_pending_deferreds(self):
         """Remove all the deferreds I am tracking."""
-        for did in self.deferred_ids:
+        for did in list(self.deferred_ids):
             self.delete_pending_deferred(did)
         
     def _delete_and_pass_through(self, r, deferred_id):
@@ -121,10 +175,10 @@ class PendingDeferredManager(object):
         return r
         
     def get_pending_deferred(self, deferred_id, block):
-        if not self.quick_has_id(deferred_id) or self.deferreds_to_callback.get(deferred_id) is not None:
-            return defer.fail(failure.Failure(error.InvalidDeferredID('invalid deferred_id: %r' + deferred_id)))
-        result = self.results.get(deferred_id)
-        if result is not None:
+        if not self.quick_has_id(deferred_id) or self._is_claimed(deferred_id):
+            return defer.fail(failure.Failure(error.InvalidDeferredID('invalid deferred_id: %r' % deferred_id)))
+        if deferred_id in self.results:
+            result = self.results[deferred_id]
             self.delete_pending_deferred(deferred_id)
             if isinstance(result, failure.Failure):
                 return defer.fail(result)
@@ -137,6 +191,40 @@ class PendingDeferredManager(object):
                 return d
             else:
                 return defer.fail(failure.Failure(error.ResultNotCompleted("result not completed: %r" % deferred_id)))
+    
+    def wait_pending_deferreds(self, deferred_ids, wait_all=False, timeout=None):
+        """Wait for any or all of a group of pending deferreds.
+        
+        This replaces one `get_pending_deferred` call per deferred id with a
+        single call that fires as soon as results are available.
+        
+        :Parameters:
+            deferred_ids : list of str
+                The ids of deferreds that I am tracking.
+            wait_all : boolean
+                If False, fire as soon as at least one result is ready.  If
+                True, fire once all of them are ready.
+            timeout : float or None
+                Fire after this many seconds even if the condition has not
+                been met.  0 returns the results that are ready right away.
+        
+        :Returns: A deferred to a dict mapping each completed deferred id to
+            its result (a `Failure` if it raised).  Completed ids are
+            deleted; the others can be waited on again.
+        """
+        deferred_ids = list(deferred_ids)
+        for did in deferred_ids:
+            if not self.quick_has_id(did) or self._is_claimed(did):
+                return defer.fail(failure.Failure(error.InvalidDeferredID('invalid deferred_id: %r' % did)))
+        waiter = _GroupWaiter(self, deferred_ids, wait_all)
+        if not deferred_ids or waiter.ready() or timeout == 0:
+            waiter.fire()
+            return waiter.deferred
+        for did in deferred_ids:
+            self._group_waiters[did] = waiter
+        if timeout is not None:
+            waiter.delayed_call = reactor.callLater(timeout, waiter.fire)
+        return waiter.deferred
 
 def two_phase(wrapped_method):
     """Wrap methods that return a deferred into a two phase process.
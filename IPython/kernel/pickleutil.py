@@ -15,8 +15,88 @@ __docformat__ = "restructuredtext en"
 # Imports
 #-------------------------------------------------------------------------------
 
+import hashlib
+import marshal
+import weakref
+from collections import OrderedDict
 from types import FunctionType
 
+from IPython.kernel.error import FunctionCacheMiss
+
+#-------------------------------------------------------------------------------
+# The function cache
+#-------------------------------------------------------------------------------
+
+# {code:hash} so that the same code object is only marshalled and hashed once
+_code_hashes = weakref.WeakKeyDictionary()
+
+def code_hash(code):
+    """Return the content hash of a code object."""
+    try:
+        return _code_hashes[code]
+    except KeyError:
+        h = hashlib.sha1(marshal.dumps(code)).hexdigest()
+        _code_hashes[code] = h
+        return h
+
+
+class FunctionCache(object):
+    """A bounded LRU cache of uncanned functions, keyed by code hash.
+
+    Every process that uncans functions (engines and the controller) has one
+    of these, `function_cache`.  Once a function has been received in full,
+    later messages can refer to it by its hash alone (`CannedFunctionRef`).
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._functions = OrderedDict() # {hash:function}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, h):
+        return h in self._functions
+
+    def __len__(self):
+        return len(self._functions)
+
+    def put(self, h, f):
+        self._functions.pop(h, None)
+        self._functions[h] = f
+        while len(self._functions) > self.maxsize:
+            self._functions.popitem(last=False)
+
+    def get(self, h, g):
+        """Return the function with hash h bound to the globals g.
+
+        Raise `FunctionCacheMiss` if the hash is unknown.
+        """
+        try:
+            f = self._functions.pop(h)
+        except KeyError:
+            self.misses += 1
+            raise FunctionCacheMiss(h)
+        self.hits += 1
+        if f.__globals__ is not g:
+            f = FunctionType(f.__code__, g)
+        self._functions[h] = f
+        return f
+
+    def clear(self):
+        self._functions.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        return dict(size=len(self._functions), hits=self.hits,
+                    misses=self.misses)
+
+
+function_cache = FunctionCache()
+
+#-------------------------------------------------------------------------------
+# Canned objects
+#-------------------------------------------------------------------------------
+
 class CannedObject(object):
     pass
     
@@ -25,6 +105,7 @@ class CannedFunction(CannedObject):
     def __init__(self, f):
         self._checkType(f)    
         self.code = f.__code__
+        self.hash = code_hash(self.code)
     
     def _checkType(self, obj):
         assert isinstance(obj, FunctionType), "Not a function type"
@@ -33,31 +114,68 @@ class CannedFunction(CannedObject):
         if g is None:
             g = globals()
         newFunc = FunctionType(self.code, g)
+        function_cache.put(self.hash, newFunc)
         return newFunc
 
-def can(obj):
+class CannedFunctionRef(CannedObject):
+    """A function the receiver already has, sent as its code hash only."""
+
+    def __init__(self, h):
+        self.hash = h
+
+    def getFunction(self, g=None):
+        if g is None:
+            g = globals()
+        return function_cache.get(self.hash, g)
+
+def can(obj, known=None):
+    """Can a function for sending.
+
+    If the hash of the function's code is in the set known, the receiver
+    is assumed to have it cached and only the hash is sent.
+    """
     if isinstance(obj, FunctionType):
+        if known is not None:
+            h = code_hash(obj.__code__)
+            if h in known:
+                # Make sure we can uncan the reference ourselves too
+                function_cache.put(h, obj)
+                return CannedFunctionRef(h)
         return CannedFunction(obj)
     else:
         return obj
 
-def canDict(obj):
+def canDict(obj, known=None):
     if isinstance(obj, dict):
         for k, v in obj.items():
-            obj[k] = can(v)
+            obj[k] = can(v, known)
         return obj
     else:
         return obj
 
-def canSequence(obj):
+def canSequence(obj, known=None):
     if isinstance(obj, (list, tuple)):
         t = type(obj)
-        return t([can(i) for i in obj])
+        return t([can(i, known) for i in obj])
     else:
         return obj
 
+def canned_hashes(obj):
+    """Return the set of hashes of the functions canned in full in obj.
+
+    obj can be a canned object, or a dict or sequence of them.  After obj
+    has been delivered, these hashes can be added to the sender's known set.
+    """
+    if isinstance(obj, dict):
+        values = list(obj.values())
+    elif isinstance(obj, (list, tuple)):
+        values = obj
+    else:
+        values = [obj]
+    return set(v.hash for v in values if isinstance(v, CannedFunction))
+
 def uncan(obj, g=None):
-    if isinstance(obj, CannedFunction):
+    if isinstance(obj, CannedObject):
         return obj.getFunction(g)
     else:
         return obj
@@ -0,0 +1,109 @@
+# encoding: utf-8
+
+"""Functions used in reducing values distributed over engines.
+
+A reduction first reduces the partition of each engine on the engine itself
+(`local_reduce`), so that only one value per engine is moved, and then
+combines these values pairwise, in a tree (`tree_reduce`).
+
+With a NumPy ufunc like numpy.add, partitions that are arrays are reduced
+with the ufunc's `reduce` method and arrays are combined in place, without
+allocating a new array at each step.
+"""
+
+__docformat__ = "restructuredtext en"
+
+#-------------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+# Imports
+#-------------------------------------------------------------------------------
+
+import builtins
+import sys
+
+from IPython.utils.importstring import import_item
+
+#-------------------------------------------------------------------------------
+# Functions
+#-------------------------------------------------------------------------------
+
+def resolve(func):
+    """Return the function named func if it is a string, else func.
+
+    Names are either dotted names, like 'operator.add' or 'numpy.maximum', or
+    the names of builtins, like 'max'.
+    """
+    if not isinstance(func, str):
+        return func
+    if '.' in func:
+        return import_item(func)
+    return getattr(builtins, func)
+
+
+def _ufunc_and_array(func, value):
+    """Return the numpy module if func is a ufunc and value an array."""
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(func, numpy.ufunc) and \
+           isinstance(value, numpy.ndarray):
+        return numpy
+    return None
+
+
+def combine(func, a, b):
+    """Return func(a, b), accumulating into a if a is an array.
+
+    a must not be used elsewhere when it is an array, as it may be modified.
+    """
+    numpy = _ufunc_and_array(func, a)
+    if numpy is not None and a.flags.writeable and func.nin == 2 and \
+           numpy.broadcast(a, b).shape == a.shape and \
+           numpy.result_type(a, b) == a.dtype:
+        return func(a, b, out=a)
+    return func(a, b)
+
+
+def local_reduce(func, seq):
+    """Reduce the elements of seq with func.
+
+    Returns a list holding the result, or an empty list if seq is empty, so
+    that engines with empty partitions don't take part in the reduction.
+    """
+    func = resolve(func)
+    if len(seq) == 0:
+        return []
+    numpy = _ufunc_and_array(func, seq)
+    if numpy is not None and func.nin == 2:
+        return [func.reduce(seq, axis=0)]
+    items = iter(seq)
+    result = next(items)
+    if _ufunc_and_array(func, result) is not None:
+        # Don't accumulate into the caller's array
+        result = result.copy()
+    for item in items:
+        result = combine(func, result, item)
+    return [result]
+
+
+def tree_reduce(func, values):
+    """Combine values pairwise with func, in a balanced tree.
+
+    Adjacent values are combined, so func only needs to be associative.
+    The values may be modified, see `combine`.
+    """
+    func = resolve(func)
+    values = list(values)
+    if not values:
+        raise ValueError("no values to reduce")
+    while len(values) > 1:
+        paired = [combine(func, values[i], values[i+1])
+                  for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
@@ -0,0 +1,261 @@
+# encoding: utf-8
+# -*- test-case-name: IPython.kernel.tests.test_resultstore -*-
+
+"""Storage for the results of finished tasks.
+
+The `TaskController` hands every finished result to a result store.  The
+default `TieredResultStore` keeps the most recently used results in memory,
+spills older ones to a directory of pickles, and can forget results some
+time after a client has fetched them, so the controller's memory use stays
+bounded however many tasks go through it.
+"""
+
+__docformat__ = "restructuredtext en"
+
+#-------------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+# Imports
+#-------------------------------------------------------------------------------
+
+# Tell nose to skip the testing of this module
+__test__ = {}
+
+import atexit
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from collections import deque, OrderedDict
+
+import zope.interface as zi
+from twisted.python import log, failure
+
+#-------------------------------------------------------------------------------
+# Result stores
+#-------------------------------------------------------------------------------
+
+def result_status(result):
+    """Classify a task result as succeeded (True), failed (False) or neither.
+
+    `Failure` objects (aborted or timed out tasks) count as neither, like
+    they always have in `TaskController.queue_status`.
+    """
+    if isinstance(result, failure.Failure) or not hasattr(result, 'failure'):
+        return None
+    return result.failure is None
+
+
+class IResultStore(zi.Interface):
+    """A place for the `TaskController` to keep finished task results."""
+
+    def put(taskid, result):
+        """Store the result of task taskid."""
+
+    def fetch(taskid):
+        """Return the result of taskid for a client.  Raise KeyError if unknown.
+
+        This starts the expiry clock of the result, if the store has one.
+        """
+
+    def remove(taskid):
+        """Forget the result of taskid."""
+
+    def clear():
+        """Forget all results."""
+
+    def statuses():
+        """Return a dict of {taskid: status}, see `result_status`."""
+
+    def stats():
+        """Return a dict describing how much is stored and where."""
+
+
+class MemoryResultStore(object):
+    """Keep every result in a dict, forever (or until `clear`)."""
+
+    zi.implements(IResultStore)
+
+    def __init__(self):
+        self.results = {}
+        self._status = {}
+
+    def __contains__(self, taskid):
+        return taskid in self.results
+
+    def __len__(self):
+        return len(self.results)
+
+    def put(self, taskid, result):
+        self.results[taskid] = result
+        self._status[taskid] = result_status(result)
+
+    def fetch(self, taskid):
+        return self.results[taskid]
+
+    def remove(self, taskid):
+        self.results.pop(taskid, None)
+        self._status.pop(taskid, None)
+
+    def clear(self):
+        self.results = {}
+        self._status = {}
+
+    def statuses(self):
+        return dict(self._status)
+
+    def stats(self):
+        return dict(memory=len(self.results), disk=0, disk_bytes=0)
+
+
+class TieredResultStore(object):
+    """An in-memory LRU tier backed by a directory of pickles.
+
+    At most `max_memory` results are kept in memory; the least recently
+    used ones beyond that are pickled to `directory`.  If `fetched_ttl` is
+    not None, results are forgotten that many seconds after a client first
+    fetched them.
+    """
+
+    zi.implements(IResultStore)
+
+    def __init__(self, max_memory=10000, directory=None, fetched_ttl=None):
+        self.max_memory = max_memory
+        self.fetched_ttl = fetched_ttl
+        self._directory = directory
+        self._own_directory = False
+        self._memory = OrderedDict() # {taskid:result}, in LRU order
+        self._pinned = {} # results that could not be pickled
+        self._disk = {} # {taskid:nbytes}
+        self._disk_bytes = 0
+        self._status = {}
+        self._expiry = deque() # (expire_time, taskid) in fetch order
+        self._fetched = set()
+
+    def __contains__(self, taskid):
+        self._expire()
+        return taskid in self._status
+
+    def __len__(self):
+        return len(self._status)
+
+    #---------------------------------------------------------------------------
+    # The disk tier
+    #---------------------------------------------------------------------------
+
+    def _get_directory(self):
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='ipython-taskresults-')
+            self._own_directory = True
+            atexit.register(self.close)
+        elif not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+        return self._directory
+
+    def _path(self, taskid):
+        return os.path.join(self._get_directory(), '%s.pickle' % taskid)
+
+    def _spill(self, taskid, result):
+        try:
+            data = pickle.dumps(result, 2)
+        except Exception:
+            log.msg("Result of task %r can't be pickled, keeping it in memory" % taskid)
+            self._pinned[taskid] = result
+            return
+        with open(self._path(taskid), 'wb') as f:
+            f.write(data)
+        self._disk[taskid] = len(data)
+        self._disk_bytes += len(data)
+
+    def _load(self, taskid):
+        with open(self._path(taskid), 'rb') as f:
+            return pickle.load(f)
+
+    def _unlink(self, taskid):
+        nbytes = self._disk.pop(taskid)
+        self._disk_bytes -= nbytes
+        try:
+            os.remove(self._path(taskid))
+        except OSError:
+            pass
+
+    #---------------------------------------------------------------------------
+    # Expiry
+    #---------------------------------------------------------------------------
+
+    def _expire(self):
+        now = time.time()
+        while self._expiry and self._expiry[0][0] <= now:
+            expire_time, taskid = self._expiry.popleft()
+            if taskid in self._fetched:
+                log.msg("Expiring result of task %r" % taskid)
+                self.remove(taskid)
+
+    #---------------------------------------------------------------------------
+    # IResultStore
+    #---------------------------------------------------------------------------
+
+    def put(self, taskid, result):
+        self._expire()
+        self.remove(taskid)
+        self._status[taskid] = result_status(result)
+        self._memory[taskid] = result
+        while len(self._memory) > self.max_memory:
+            old_taskid, old_result = self._memory.popitem(last=False)
+            self._spill(old_taskid, old_result)
+
+    def fetch(self, taskid):
+        self._expire()
+        if taskid in self._memory:
+            result = self._memory.pop(taskid)
+            self._memory[taskid] = result
+        elif taskid in self._pinned:
+            result = self._pinned[taskid]
+        elif taskid in self._disk:
+            result = self._load(taskid)
+        else:
+            raise KeyError(taskid)
+        if self.fetched_ttl is not None and taskid not in self._fetched:
+            self._fetched.add(taskid)
+            self._expiry.append((time.time() + self.fetched_ttl, taskid))
+        return result
+
+    def remove(self, taskid):
+        self._memory.pop(taskid, None)
+        self._pinned.pop(taskid, None)
+        self._status.pop(taskid, None)
+        self._fetched.discard(taskid)
+        if taskid in self._disk:
+            self._unlink(taskid)
+
+    def clear(self):
+        for taskid in list(self._disk):
+            self._unlink(taskid)
+        self._memory.clear()
+        self._pinned.clear()
+        self._status.clear()
+        self._expiry.clear()
+        self._fetched.clear()
+
+    def statuses(self):
+        self._expire()
+        return dict(self._status)
+
+    def stats(self):
+        self._expire()
+        return dict(memory=len(self._memory) + len(self._pinned),
+                    disk=len(self._disk), disk_bytes=self._disk_bytes)
+
+    def close(self):
+        """Remove all results, and the directory if I created it."""
+        self.clear()
+        if self._own_directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+            self._own_directory = False
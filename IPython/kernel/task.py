@@ -29,8 +29,9 @@ from twisted.python import components, log, failure
 from IPython.kernel import engineservice as es, error
 from IPython.kernel import controllerservice as cs
 from IPython.kernel.twistedutil import DeferredList
+from IPython.kernel.resultstore import TieredResultStore
 
-from IPython.kernel.pickleutil import can, uncan
+from IPython.kernel.pickleutil import can, canned_hashes, uncan
 
 #-----------------------------------------------------------------------------
 # Definition of the Task objects
@@ -56,6 +57,8 @@ class ITask(zi.Interface):
     zi.Attribute('retries','How many times to retry the task')
     zi.Attribute('recovery_task','A task to try if the initial one fails')
     zi.Attribute('taskid','the id of the task')
+    zi.Attribute('locality','the names of the objects the task uses in '
+                 'the engine namespace, or a dict of these names to values')
     
     def start_time(result):
         """
@@ -169,7 +172,7 @@ class BaseTask(object):
     zi.implements(ITask)
     
     def __init__(self, clear_before=False, clear_after=False, retries=0,
-            recovery_task=None, depend=None):
+            recovery_task=None, depend=None, locality=None):
         """
         Make a generic task.
         
@@ -187,12 +190,27 @@ class BaseTask(object):
             depend : FunctionType
                 A function that is called to test for properties.  This function
                 must take one argument, the properties dict and return a boolean
+            locality : sequence of str or dict
+                The names of the objects the task uses in the engine
+                namespace, like data scattered to the engines.  A
+                `LocalityScheduler` runs the task on an engine that already
+                holds them.  With a dict of names to values, the values are
+                pushed to an engine that doesn't hold them, so the task can
+                run on any engine.
         """
         self.clear_before = clear_before
         self.clear_after = clear_after
         self.retries = retries
         self.recovery_task = recovery_task
         self.depend = depend
+        if locality is None:
+            self.locality = ()
+        elif isinstance(locality, str):
+            self.locality = (locality,)
+        elif isinstance(locality, (list, tuple, set, frozenset, dict)):
+            self.locality = locality
+        else:
+            raise TypeError('locality must be a str, a sequence of strs or a dict')
         self.taskid = None
     
     def start_time(self, result):
@@ -216,10 +234,21 @@ class BaseTask(object):
     
     def pre_task(self, d, queued_engine):
         """
-        Clear the engine before running the task if clear_before is set.
+        Clear the engine before running the task if clear_before is set,
+        then push the values of `locality` the engine doesn't hold.
         """
         if self.clear_before:
             d.addCallback(lambda r: queued_engine.reset())
+        if isinstance(self.locality, dict):
+            d.addCallback(lambda r: self.push_missing(queued_engine))
+    
+    def push_missing(self, queued_engine):
+        """Push the values of `locality` that queued_engine doesn't hold."""
+        resident = getattr(queued_engine, 'resident', ())
+        missing = dict((k, v) for k, v in self.locality.items()
+                       if k not in resident)
+        if missing:
+            return queued_engine.push(missing)
     
     def post_task(self, d, queued_engine):
         """
@@ -255,10 +284,18 @@ class BaseTask(object):
         else:
             return True
 
-    def can_task(self):
-        self.depend = can(self.depend)
+    def can_task(self, known=None):
+        """Can the functions of the task, see `pickleutil.can`."""
+        self.depend = can(self.depend, known)
         if isinstance(self.recovery_task, BaseTask):
-            self.recovery_task.can_task()
+            self.recovery_task.can_task(known)
+
+    def canned_hashes(self):
+        """The hashes of the functions this canned task carries in full."""
+        hashes = canned_hashes(self.depend)
+        if isinstance(self.recovery_task, BaseTask):
+            hashes.update(self.recovery_task.canned_hashes())
+        return hashes
             
     def uncan_task(self):
         self.depend = uncan(self.depend)
@@ -273,7 +310,8 @@ class MapTask(BaseTask):
     zi.implements(ITask)
     
     def __init__(self, function, args=None, kwargs=None, clear_before=False, 
-            clear_after=False, retries=0, recovery_task=None, depend=None):
+            clear_after=False, retries=0, recovery_task=None, depend=None,
+            locality=None):
         """
         Create a task based on a function, args and kwargs.
         
@@ -284,7 +322,7 @@ class MapTask(BaseTask):
         exception is the task result for this type of task.
         """
         BaseTask.__init__(self, clear_before, clear_after, retries, 
-            recovery_task, depend)
+            recovery_task, depend, locality)
         if not isinstance(function, FunctionType):
             raise TypeError('a task function must be a FunctionType')
         self.function = function
@@ -313,9 +351,14 @@ class MapTask(BaseTask):
         )
         d.addCallback(lambda r: queued_engine.pull('_ipython_task_result'))
     
-    def can_task(self):
-        self.function = can(self.function)
-        BaseTask.can_task(self)
+    def can_task(self, known=None):
+        self.function = can(self.function, known)
+        BaseTask.can_task(self, known)
+
+    def canned_hashes(self):
+        hashes = BaseTask.canned_hashes(self)
+        hashes.update(canned_hashes(self.function))
+        return hashes
     
     def uncan_task(self):
         self.function = uncan(self.function)
@@ -329,7 +372,7 @@ class StringTask(BaseTask):
 
     def __init__(self, expression, pull=None, push=None,
             clear_before=False, clear_after=False, retries=0, 
-            recovery_task=None, depend=None):
+            recovery_task=None, depend=None, locality=None):
         """
         Create a task based on a Python expression and variables
         
@@ -363,7 +406,7 @@ class StringTask(BaseTask):
             raise TypeError('push must be a dict')
         
         BaseTask.__init__(self, clear_before, clear_after, retries, 
-            recovery_task, depend)
+            recovery_task, depend, locality)
 
     def submit_task(self, d, queued_engine):
         if self.push is not None:
@@ -551,6 +594,11 @@ class WorkerFromQueuedEngine(object):
     
     properties = property(_get_properties, lambda self, _:None)
     
+    def _get_resident(self):
+        return getattr(self.queuedEngine, 'resident', frozenset())
+    
+    resident = property(_get_resident, lambda self, _:None)
+    
     def run(self, task):
         """Run task in worker's namespace.
         
@@ -649,7 +697,6 @@ class FIFOScheduler(object):
     """
     A basic First-In-First-Out (Queue) Scheduler.
     
-    This is the default Scheduler for the `TaskController`.
     See the docstrings for `IScheduler` for interface details.
     """
     
@@ -738,6 +785,67 @@ class LIFOScheduler(FIFOScheduler):
         # self.workers.reverse()
     
 
+class LocalityScheduler(FIFOScheduler):
+    """
+    A FIFO Scheduler running tasks where the data they use already is.
+    
+    A task is run on the idle worker holding the most of the names of its
+    `locality`, see `QueuedEngine.resident`.  If no idle worker holds all
+    of them, a task whose `locality` is a dict runs on the best idle worker
+    anyway, and the missing values are pushed to it.  Otherwise the task
+    waits for a busy worker holding the names, unless there is none.
+    
+    Tasks without `locality` are scheduled like with `FIFOScheduler`.  This
+    is the default Scheduler for the `TaskController`, which sets
+    `all_workers`, its dict of the registered workers, idle or not.
+    """
+    
+    def __init__(self):
+        FIFOScheduler.__init__(self)
+        self.all_workers = {}
+        # Counters of the tasks with a locality run on a worker holding
+        # their data, or on one their data was pushed to
+        self.local = 0
+        self.transferred = 0
+    
+    def _held_by_busy_worker(self, names):
+        idle = set(self.workerids)
+        for w in list(self.all_workers.values()):
+            if w.workerid not in idle and \
+                   names <= set(getattr(w, 'resident', ())):
+                return True
+        return False
+    
+    def schedule(self):
+        for t in self.tasks:
+            names = set(getattr(t, 'locality', ()))
+            best, best_score = None, -1
+            for w in self.workers:
+                try:
+                    cando = t.check_depend(w.properties)
+                except:
+                    cando = False
+                if not cando:
+                    continue
+                score = len(names.intersection(getattr(w, 'resident', ())))
+                if score > best_score:
+                    best, best_score = w, score
+                    if score == len(names):
+                        break
+            if best is None:
+                continue
+            if best_score < len(names):
+                if isinstance(t.locality, dict):
+                    # The missing values are pushed, see push_missing
+                    self.transferred += 1
+                elif self._held_by_busy_worker(names):
+                    continue
+            elif names:
+                self.local += 1
+            return self.pop_worker(best.workerid), self.pop_task(t.taskid)
+        return None, None
+
+
 class ITaskController(cs.IControllerBase):
     """
     The Task based interface to a `ControllerService` object
@@ -804,17 +912,21 @@ class ITaskController(cs.IControllerBase):
         Get a dictionary with the current state of the task queue.
         
         If verbose is True, then return lists of taskids, otherwise, 
-        return the number of tasks with each status.
+        return the number of tasks with each status.  The 'results' key
+        holds the number of stored results in memory and on disk and the
+        size of the disk tier in bytes.  With a `LocalityScheduler`, the
+        'locality' key holds the number of tasks with a `locality` run on an
+        engine holding their data ('local') or on one their values were
+        pushed to ('transferred').
         """
     
     def clear():
         """
         Clear all previously run tasks from the task controller.
         
-        This is needed because the task controller keep all task results
-        in memory.  This can be a problem is there are many completed
-        tasks.  Users should call this periodically to clean out these
-        cached task results.
+        Unfetched task results are kept by the task controller (in memory
+        or on disk) until they are cleared.  Users should call this
+        periodically to clean out these cached task results.
         """
     
 
@@ -823,10 +935,16 @@ class TaskController(cs.ControllerAdapterBase):
     
     If you want to use a different scheduler, just subclass this and set
     the `SchedulerClass` member to the *class* of your chosen scheduler.
+    
+    Finished results are kept in an `IResultStore`, created by calling
+    `ResultStoreClass` with `result_store_args`.  By default the most
+    recent results stay in memory and older ones are spilled to disk.
     """
     
     zi.implements(ITaskController)
-    SchedulerClass = FIFOScheduler
+    SchedulerClass = LocalityScheduler
+    ResultStoreClass = TieredResultStore
+    result_store_args = dict(max_memory=10000, directory=None, fetched_ttl=None)
     
     timeout = 30
     
@@ -839,11 +957,12 @@ class TaskController(cs.ControllerAdapterBase):
                                 # a worker for failing a task
         self.pendingTasks = {} # dict of {workerid:(taskid, task)}
         self.deferredResults = {} # dict of {taskid:deferred}
-        self.finishedResults = {} # dict of {taskid:actualResult}
+        self.finishedResults = self.ResultStoreClass(**self.result_store_args)
         self.workers = {} # dict of {workerid:worker}
         self.abortPending = [] # dict of {taskid:abortDeferred}
         self.idleLater = None # delayed call object for timeout
         self.scheduler = self.SchedulerClass()
+        self.scheduler.all_workers = self.workers
         
         for id in list(self.controller.engines.keys()):
                 self.workers[id] = IWorker(self.controller.engines[id])
@@ -898,7 +1017,7 @@ class TaskController(cs.ControllerAdapterBase):
         """
         log.msg("Getting task result: %i" % taskid)
         if taskid in self.finishedResults:
-            tr = self.finishedResults[taskid]
+            tr = self.finishedResults.fetch(taskid)
             return defer.succeed(tr)
         elif taskid in self.deferredResults:
             if block:
@@ -919,7 +1038,7 @@ class TaskController(cs.ControllerAdapterBase):
         try:
             self.scheduler.pop_task(taskid)
         except IndexError as e:
-            if taskid in list(self.finishedResults.keys()):
+            if taskid in self.finishedResults:
                 d = defer.fail(IndexError("Task Already Completed"))
             elif taskid in self.abortPending:
                 d = defer.fail(IndexError("Task Already Aborted"))
@@ -951,13 +1070,11 @@ class TaskController(cs.ControllerAdapterBase):
         pending = self._pendingTaskIDs()
         failed = []
         succeeded = []
-        for k,v in self.finishedResults.items():
-            if not isinstance(v, failure.Failure):
-                if hasattr(v,'failure'):
-                    if v.failure is None:
-                        succeeded.append(k)
-                    else:
-                        failed.append(k)
+        for k, status in self.finishedResults.statuses().items():
+            if status is True:
+                succeeded.append(k)
+            elif status is False:
+                failed.append(k)
         scheduled = self.scheduler.taskids
         if verbose:
             result = dict(pending=pending, failed=failed, 
@@ -965,6 +1082,10 @@ class TaskController(cs.ControllerAdapterBase):
         else:
             result = dict(pending=len(pending),failed=len(failed),
                 succeeded=len(succeeded),scheduled=len(scheduled))
+        result['results'] = self.finishedResults.stats()
+        if isinstance(self.scheduler, LocalityScheduler):
+            result['locality'] = dict(local=self.scheduler.local,
+                                      transferred=self.scheduler.transferred)
         return defer.succeed(result)
     
     #---------------------------------------------------------------------------
@@ -984,7 +1105,7 @@ class TaskController(cs.ControllerAdapterBase):
     def _finishTask(self, taskid, result):
         dlist = self.deferredResults.pop(taskid)
         # result.taskid = taskid   # The TaskResult should save the taskid
-        self.finishedResults[taskid] = result
+        self.finishedResults.put(taskid, result)
         for d in dlist:
             d.callback(result)
     
@@ -1103,12 +1224,11 @@ class TaskController(cs.ControllerAdapterBase):
         """
         Clear all previously run tasks from the task controller.
         
-        This is needed because the task controller keep all task results
-        in memory.  This can be a problem is there are many completed
-        tasks.  Users should call this periodically to clean out these
-        cached task results.
+        The result store bounds the memory used by finished results, but
+        unfetched results are kept (in memory or on disk) until they are
+        cleared.
         """
-        self.finishedResults = {}
+        self.finishedResults.clear()
         return defer.succeed(None)
         
     
@@ -29,6 +29,7 @@ try:
 except ImportError:
     from foolscap import Referenceable
 
+from IPython.kernel import error
 from IPython.kernel import task as taskmodule
 from IPython.kernel.clientinterfaces import (
     IFCClientInterfaceProvider, 
@@ -109,6 +110,8 @@ class FCTaskControllerFromTaskController(Referenceable):
         try:
             task = pickle.loads(ptask)
             task.uncan_task()
+        except error.FunctionCacheMiss:
+            d = defer.fail()
         except:
             d = defer.fail(pickle.UnpickleableError("Could not unmarshal task"))
         else:
@@ -182,6 +185,8 @@ class FCTaskClient(object):
     
     def __init__(self, remote_reference):
         self.remote_reference = remote_reference
+        # Hashes of the functions the controller has received in full
+        self._known_functions = set()
     
     #---------------------------------------------------------------------------
     # Non interface methods
@@ -189,6 +194,20 @@ class FCTaskClient(object):
     
     def unpackage(self, r):
         return pickle.loads(r)
+
+    def _run(self, task, known):
+        task.can_task(known)
+        sent = task.canned_hashes()
+        ptask = pickle.dumps(task, 2)
+        task.uncan_task()
+        d = self.remote_reference.callRemote('run', ptask)
+        d.addCallback(self.unpackage)
+        d.addCallback(self._functions_received, sent)
+        return d
+
+    def _functions_received(self, result, hashes):
+        self._known_functions.update(hashes)
+        return result
     
     #---------------------------------------------------------------------------
     # ITaskController related methods
@@ -206,11 +225,14 @@ class FCTaskClient(object):
             `get_task_result` to get the `TaskResult` object.
         """
         assert isinstance(task, taskmodule.BaseTask), "task must be a Task object!"
-        task.can_task()
-        ptask = pickle.dumps(task, 2)
-        task.uncan_task()
-        d = self.remote_reference.callRemote('run', ptask)
-        d.addCallback(self.unpackage)
+        # The functions of the task that the controller already has are
+        # sent by hash.  If it has lost any of them, send them in full.
+        def resend(reason):
+            reason.trap(error.FunctionCacheMiss)
+            self._known_functions.clear()
+            return self._run(task, self._known_functions)
+        d = self._run(task, self._known_functions)
+        d.addErrback(resend)
         return d
     
     def get_task_result(self, taskid, block=False):
@@ -17,7 +17,7 @@ __docformat__ = "restructuredtext en"
 
 import pickle as pickle
 
-from twisted.internet import defer, reactor
+from twisted.internet import defer, reactor, task
 from twisted.python import failure
 from twisted.application import service
 import zope.interface as zi
@@ -307,7 +307,8 @@ class IEngineQueuedTestCase(object):
         result = self.engine.clear_queue()
         d1 = self.assertDeferredEquals(result, None)
         d1.addCallback(lambda _: self.engine.queue_status())
-        d2 = self.assertDeferredEquals(d1, {'queue':[], 'pending':'None'})
+        d1.addCallback(lambda r: (r['queue'], r['pending'], r['stats']['depth']))
+        d2 = self.assertDeferredEquals(d1, ([], 'None', 0))
         return d2
         
     def testQueueStatus(self):
@@ -375,3 +376,34 @@ class IEnginePropertiesTestCase(object):
         return d
         
 Parametric(IEnginePropertiesTestCase)
+
+
+class IEngineThreadedTestCase(object):
+    """Test an IEngineThreaded implementer."""
+    
+    def testIEngineThreadedInterface(self):
+        """Does self.engine claim to implement IEngineThreaded?"""
+        self.assert_(es.IEngineThreaded.providedBy(self.engine))
+    
+    def testExecuteStats(self):
+        d = self.engine.execute('a = 5')
+        d.addCallback(lambda r: sorted(r['stats']))
+        d = self.assertDeferredEquals(d,
+            ['cpu_time', 'max_rss', 'peak_memory', 'wall_time'])
+        return d
+    
+    def testInterrupt(self):
+        d = self.engine.execute('while True: pass')
+        # The engine answers while the command runs
+        d2 = task.deferLater(reactor, 0.2, self.engine.running_command)
+        d2.addCallback(lambda r: r['method'])
+        d2 = self.assertDeferredEquals(d2, 'execute')
+        d2.addCallback(lambda r: self.engine.interrupt())
+        d2 = self.assertDeferredEquals(d2, True)
+        return self.assertDeferredRaises(d, KeyboardInterrupt, d2)
+    
+    def testInterruptIdle(self):
+        d = self.engine.execute('a = 5')
+        d.addCallback(lambda r: self.engine.interrupt())
+        d = self.assertDeferredEquals(d, False)
+        return d
@@ -721,6 +721,53 @@ class IMultiEngineCoordinatorTestCase(object):
         d.addCallback(lambda r: self.assertEquals(r,[f(x) for x in data]))
         return d
 
+    def testReduce(self):
+        self.addEngine(4)
+        def add(x, y):
+            return x + y
+        d= self.multiengine.scatter('a', list(range(10)))
+        d.addCallback(lambda r: self.multiengine.reduce(add, 'a'))
+        d.addCallback(lambda r: self.assertEquals(r, 45))
+        d.addCallback(lambda _: self.multiengine.reduce('max', 'a'))
+        d.addCallback(lambda r: self.assertEquals(r, 9))
+        d.addCallback(lambda _: self.multiengine.push(dict(b=2)))
+        d.addCallback(lambda _: self.multiengine.reduce('operator.mul', 'b',
+                                                        partitioned=False))
+        d.addCallback(lambda r: self.assertEquals(r, 16))
+        d.addCallback(lambda _: self.multiengine.reduce(add, 'asdf'))
+        d.addErrback(lambda f: self.assertRaises(NameError, _raise_it, f))
+        return d
+
+    def testReduceEmptyPartitions(self):
+        self.addEngine(4)
+        d= self.multiengine.scatter('a', list(range(2)))
+        d.addCallback(lambda r: self.multiengine.reduce('operator.add', 'a'))
+        d.addCallback(lambda r: self.assertEquals(r, 1))
+        return d
+
+    def testReduceNumpy(self):
+        try:
+            import numpy
+            from numpy.testing.utils import assert_array_equal
+        except:
+            return
+        else:
+            self.addEngine(4)
+            a = numpy.arange(32.0).reshape(8, 4)
+            d = self.multiengine.scatter('a', a)
+            d.addCallback(lambda r: self.multiengine.reduce(numpy.add, 'a'))
+            d.addCallback(lambda r: assert_array_equal(r, a.sum(axis=0)))
+            return d
+
+    def testAllReduce(self):
+        self.addEngine(4)
+        d= self.multiengine.scatter('a', list(range(10)))
+        d.addCallback(lambda r: self.multiengine.allreduce('operator.add', 'a', 'total'))
+        d.addCallback(lambda r: self.assertEquals(r, 45))
+        d.addCallback(lambda _: self.multiengine.pull('total'))
+        d.addCallback(lambda r: self.assertEquals(r, [45]*4))
+        return d
+
 
 class ISynchronousMultiEngineCoordinatorTestCase(IMultiEngineCoordinatorTestCase):
 
@@ -749,6 +796,17 @@ class ISynchronousMultiEngineCoordinatorTestCase(IMultiEngineCoordinatorTestCase
             d.addCallback(lambda r: assert_array_equal(r, a))
             return d
     
+    def testReduceNonblocking(self):
+        self.addEngine(4)
+        d= self.multiengine.scatter('a', list(range(10)))
+        d.addCallback(lambda r: self.multiengine.reduce('operator.add', 'a', block=False))
+        d.addCallback(lambda did: self.multiengine.get_pending_deferred(did, True))
+        d.addCallback(lambda r: self.assertEquals(r, 45))
+        d.addCallback(lambda r: self.multiengine.allreduce('max', 'a', 'm', block=False))
+        d.addCallback(lambda did: self.multiengine.get_pending_deferred(did, True))
+        d.addCallback(lambda r: self.assertEquals(r, 9))
+        return d
+    
     def test_clear_pending_deferreds(self):
         self.addEngine(4)
         did_list = []
@@ -175,6 +175,26 @@ class ITaskControllerTestCase(TaskTestBase):
         self.assertRaises(TypeError, task.MapTask, lambda x: x, 10)
         self.assertRaises(TypeError, task.MapTask, lambda x: x, (10,),30)
     
+    def test_locality(self):
+        self.addEngine(2)
+        tasks = [task.StringTask('s = sum(data)', pull='s', locality='data')
+                 for i in range(3)]
+        d = self.multiengine.push(dict(data=[1, 2]), targets=1)
+        for t in tasks:
+            d.addCallback(lambda _, t=t: self.tc.run(t))
+            d.addCallback(self.tc.get_task_result, block=True)
+            d.addCallback(lambda tr: self.assertEquals((tr.engineid, tr.ns.s),
+                                                       (1, 3)))
+        return d
+    
+    def test_locality_transfer(self):
+        self.addEngine(1)
+        t = task.MapTask(lambda : len(data), locality=dict(data=[1, 2]))
+        d = self.tc.run(t)
+        d.addCallback(self.tc.get_task_result, block=True)
+        d.addCallback(lambda r: self.assertEquals(r, 2))
+        return d
+    
     def test_clear(self):
         self.addEngine(1)
         t1 = task.MapTask(lambda x: 2*x,(10,))
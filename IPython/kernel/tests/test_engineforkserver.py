@@ -0,0 +1,90 @@
+# encoding: utf-8
+
+"""Tests for the engine fork server."""
+
+__docformat__ = "restructuredtext en"
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+# Tell nose to skip this module
+__test__ = {}
+
+import os
+import signal
+import time
+import types
+
+from twisted.trial import unittest
+
+from IPython.kernel import engineforkserver
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+def fork_exit(status):
+    """Fork a child that exits at once with status, return its pid."""
+    pid = os.fork()
+    if pid == 0:
+        if status < 0:
+            os.kill(os.getpid(), signal.SIGKILL)
+        os._exit(status)
+    return pid
+
+
+class ForkServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # start installs handlers forwarding these signals to the children
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self.addCleanup(signal.signal, sig, signal.getsignal(sig))
+        self.events = []
+        self.patch(engineforkserver, 'fork_engine', self.fork_engine)
+        clock = types.ModuleType('time')
+        clock.time = time.time
+        clock.sleep = lambda t: self.events.append(('sleep', t))
+        self.patch(engineforkserver, 'time', clock)
+
+    def fork_engine(self, engine_argv):
+        self.events.append(('fork', engine_argv))
+        return 1000 + len(self.events)
+
+    def testBatches(self):
+        server = engineforkserver.ForkServer(5, ['-x'], batch_size=2,
+                                             batch_delay=0.25)
+        server.start()
+        fork = ('fork', ['-x'])
+        sleep = ('sleep', 0.25)
+        self.assertEquals(self.events,
+                          [fork, fork, sleep, fork, fork, sleep, fork])
+        self.assertEquals(sorted(server.children.values()), list(range(5)))
+
+    def testAllAtOnce(self):
+        server = engineforkserver.ForkServer(3, [], batch_delay=0.25)
+        server.start()
+        self.assertEquals([e[0] for e in self.events], ['fork']*3)
+
+    def testWaitCountsFailures(self):
+        server = engineforkserver.ForkServer(4, [])
+        for i, status in enumerate([0, 3, 0, -1]):
+            server.children[fork_exit(status)] = i
+        self.assertEquals(server.wait(), 2)
+        self.assertEquals(server.children, {})
+
+    def testWaitNoFailures(self):
+        server = engineforkserver.ForkServer(2, [])
+        for i in range(2):
+            server.children[fork_exit(0)] = i
+        self.assertEquals(server.wait(), 0)
+
+if not hasattr(os, 'fork'):
+    ForkServerTestCase.skip = "the fork server needs os.fork"
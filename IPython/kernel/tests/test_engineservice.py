@@ -30,12 +30,14 @@ from twisted.internet import defer
 from twisted.application.service import IService
 
 from IPython.kernel import engineservice as es
+from IPython.kernel import error
 from IPython.testing.util import DeferredTestCase
 from IPython.kernel.tests.engineservicetest import \
     IEngineCoreTestCase, \
     IEngineSerializedTestCase, \
     IEngineQueuedTestCase, \
-    IEnginePropertiesTestCase
+    IEnginePropertiesTestCase, \
+    IEngineThreadedTestCase
 
 
 class BasicEngineServiceTest(DeferredTestCase,
@@ -53,7 +55,8 @@ class BasicEngineServiceTest(DeferredTestCase,
 class ThreadedEngineServiceTest(DeferredTestCase,
                              IEngineCoreTestCase, 
                              IEngineSerializedTestCase,
-                             IEnginePropertiesTestCase):
+                             IEnginePropertiesTestCase,
+                             IEngineThreadedTestCase):
 
     def setUp(self):
         self.engine = es.ThreadedEngineService()
@@ -77,3 +80,81 @@ class QueuedEngineServiceTest(DeferredTestCase,
         return self.rawEngine.stopService()
 
 
+class QueuedEngineLimitsTest(DeferredTestCase):
+    """Test the bounds on the queue and the history of QueuedEngine."""
+    
+    def setUp(self):
+        # A threaded engine, so that commands wait in the queue
+        self.rawEngine = es.ThreadedEngineService()
+        self.rawEngine.startService()
+    
+    def tearDown(self):
+        return self.rawEngine.stopService()
+    
+    def testRejectWhenFull(self):
+        engine = es.QueuedEngine(self.rawEngine, max_queue_depth=1)
+        dList = [engine.execute('import time; time.sleep(0.2)'),
+                 engine.execute('a = 1')]
+        d = self.assertDeferredRaises(engine.execute('a = 2'), error.QueueFull)
+        d.addCallback(lambda _: defer.gatherResults(dList))
+        d.addCallback(lambda _: engine.queue_status())
+        d.addCallback(lambda r: [r['stats'][k] for k in
+                                 ('rejected', 'completed', 'max_depth')])
+        d.addCallback(lambda r: self.assertEquals(r, [1, 2, 1]))
+        return d
+    
+    def testDropOldest(self):
+        engine = es.QueuedEngine(self.rawEngine, max_queue_depth=1,
+                                 queue_full_policy='drop_oldest')
+        d1 = engine.execute('import time; time.sleep(0.2)')
+        d2 = engine.execute('a = 1')
+        d3 = engine.execute('a = 2')
+        d = self.assertDeferredRaises(d2, error.QueueFull)
+        d.addCallback(lambda _: defer.gatherResults([d1, d3]))
+        d.addCallback(lambda _: engine.pull('a'))
+        d.addCallback(lambda r: self.assertEquals(r, 2))
+        return d
+    
+    def testHistorySize(self):
+        engine = es.QueuedEngine(self.rawEngine, history_size=2)
+        d = defer.gatherResults([engine.execute('a = %i' % i)
+                                 for i in range(3)])
+        d.addCallback(lambda r: self.assertEquals(list(engine.history),
+                                                  [r[1]['number'],
+                                                   r[2]['number']]))
+        return d
+
+
+class QueuedEngineResidentTest(DeferredTestCase):
+    """Test the tracking of the names resident in a QueuedEngine."""
+    
+    def setUp(self):
+        self.rawEngine = es.EngineService()
+        self.rawEngine.startService()
+        self.engine = es.QueuedEngine(self.rawEngine)
+    
+    def tearDown(self):
+        return self.rawEngine.stopService()
+    
+    def testBoundNames(self):
+        bound, deleted = es.bound_names(
+            'a = b = 1\nimport os.path, sys as s\nfor i in []: pass\n'
+            'def f(x):\n    y = x\nz = [w for w in ()]\ndel c')
+        self.assertEquals(bound, set(['a', 'b', 'os', 's', 'i', 'f', 'z']))
+        self.assertEquals(deleted, set(['c']))
+        self.assertEquals(es.bound_names('a = ('), (set(), set()))
+    
+    def testResident(self):
+        engine = self.engine
+        d = engine.push(dict(a=1, b=2))
+        d.addCallback(lambda _: engine.execute('c = a + b\ndel a'))
+        d.addCallback(lambda _: self.assertEquals(engine.resident,
+                                                  set(['b', 'c'])))
+        # Failed commands don't change the resident names
+        d.addCallback(lambda _: engine.execute('d = 1\nraise ValueError'))
+        d.addErrback(lambda f: self.assertRaises(ValueError, f.raiseException))
+        d.addCallback(lambda _: self.assertEquals(engine.resident,
+                                                  set(['b', 'c'])))
+        d.addCallback(lambda _: engine.reset())
+        d.addCallback(lambda _: self.assertEquals(engine.resident, set()))
+        return d
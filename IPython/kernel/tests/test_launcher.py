@@ -0,0 +1,61 @@
+# encoding: utf-8
+
+"""Tests for the launchers in kernel.launcher."""
+
+__docformat__ = "restructuredtext en"
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+# Tell nose to skip this module
+__test__ = {}
+
+import time
+
+from twisted.trial import unittest
+
+from IPython.kernel.launcher import LocalProcessLauncher
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+class ReadyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.launcher = LocalProcessLauncher()
+        self.launcher.start_time = time.time()
+        self.launcher.expected_ready = 2
+
+    def testReadyLines(self):
+        results = []
+        self.launcher.observe_ready().addCallback(results.append)
+        # Lines may arrive split over several reads
+        self.launcher.notify_ready(b'ready 12\nrea')
+        self.assertEquals(list(self.launcher.ready_times), [12])
+        self.assertEquals(results, [])
+        self.launcher.notify_ready(b'dy 13\n')
+        self.assertEquals(len(results), 1)
+        self.assertEquals(sorted(results[0]), [12, 13])
+        for seconds in results[0].values():
+            self.assert_(seconds >= 0)
+        # Later observers get the times at once
+        d = self.launcher.observe_ready()
+        d.addCallback(lambda r: self.assertEquals(sorted(r), [12, 13]))
+        return d
+
+    def testBadLines(self):
+        self.launcher.notify_ready(b'ready\nready x\nstarted 5\n\nready 7 8\n')
+        self.assertEquals(self.launcher.ready_times, {})
+        self.launcher.notify_ready(b'ready 7')
+        self.assertEquals(self.launcher.ready_times, {})
+        self.launcher.notify_ready(b'\n')
+        self.assertEquals(list(self.launcher.ready_times), [7])
@@ -0,0 +1,87 @@
+# encoding: utf-8
+
+"""Tests for the partitioning classes in kernel.map."""
+
+__docformat__ = "restructuredtext en"
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+# Tell nose to skip this module
+__test__ = {}
+
+from twisted.trial import unittest
+
+from IPython.kernel import map as Map
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+class MapTestCase(unittest.TestCase):
+
+    def roundtrip(self, mapObject, seq, q):
+        parts = [mapObject.getPartition(seq, p, q) for p in range(q)]
+        return parts, mapObject.joinPartitions(parts)
+
+    def testBlockPartition(self):
+        parts, joined = self.roundtrip(Map.Map(), list(range(10)), 3)
+        self.assertEquals(parts, [[0,1,2,3],[4,5,6],[7,8,9]])
+        self.assertEquals(joined, list(range(10)))
+
+    def testBlockMorePartitionsThanElements(self):
+        parts, joined = self.roundtrip(Map.Map(), list(range(3)), 5)
+        self.assertEquals(parts, [[0],[1],[2],[],[]])
+        self.assertEquals(joined, list(range(3)))
+
+    def testRoundRobin(self):
+        parts, joined = self.roundtrip(Map.RoundRobinMap(), list(range(10)), 3)
+        self.assertEquals(parts, [[0,3,6,9],[1,4,7],[2,5,8]])
+        self.assertEquals(joined, list(range(10)))
+
+    def testRoundRobinTuples(self):
+        seq = list(zip(range(7), range(7)))
+        parts, joined = self.roundtrip(Map.RoundRobinMap(), seq, 4)
+        self.assertEquals(joined, seq)
+
+    def testRoundRobinArray(self):
+        try:
+            import numpy
+        except ImportError:
+            raise unittest.SkipTest("numpy is not installed")
+        a = numpy.arange(11.0)
+        parts, joined = self.roundtrip(Map.RoundRobinMap(), a, 3)
+        self.assert_((joined == a).all())
+        self.assertEquals(joined.dtype, a.dtype)
+
+    def testWeighted(self):
+        m = Map.WeightedMap([1, 3])
+        parts, joined = self.roundtrip(m, list(range(8)), 2)
+        self.assertEquals(parts, [[0,1],[2,3,4,5,6,7]])
+        self.assertEquals(joined, list(range(8)))
+
+    def testWeightedFallsBackToBlock(self):
+        seq = list(range(10))
+        for m in (Map.WeightedMap(), Map.WeightedMap([1, 2])):
+            parts = [m.getPartition(seq, p, 3) for p in range(3)]
+            self.assertEquals(parts, [[0,1,2,3],[4,5,6],[7,8,9]])
+
+    def testWeightedFromProperties(self):
+        props = [{}, {'ncores':2}, {'speed':0.5, 'ncores':4}, {'weight':3}]
+        m = Map.WeightedMap.from_properties(props)
+        self.assertEquals(m.weights, [1.0, 2.0, 2.0, 3.0])
+
+    def testWeightedRejectsBadWeights(self):
+        self.assertRaises(ValueError, Map.WeightedMap, [0, 0])
+        self.assertRaises(ValueError, Map.WeightedMap, [1, -1])
+
+    def testDists(self):
+        self.assertEquals(sorted(Map.dists.keys()), ['b', 'r', 'w'])
@@ -17,7 +17,10 @@ __docformat__ = "restructuredtext en"
 # Tell nose to skip this module
 __test__ = {}
 
+import pickle
+
 from twisted.internet import defer, reactor
+from twisted.trial import unittest
 
 from IPython.kernel.fcutil import Tub, UnauthenticatedTub
 
@@ -25,7 +28,10 @@ from IPython.testing.util import DeferredTestCase
 from IPython.kernel.controllerservice import ControllerService
 from IPython.kernel.multiengine import IMultiEngine
 from IPython.kernel.tests.multienginetest import IFullSynchronousMultiEngineTestCase
-from IPython.kernel.multienginefc import IFCSynchronousMultiEngine
+from IPython.kernel.multienginefc import (
+    IFCSynchronousMultiEngine, FCFullSynchronousMultiEngineClient
+)
+from IPython.kernel.pendingdeferred import PendingDeferredManager
 from IPython.kernel import multiengine as me
 from IPython.kernel.clientconnector import AsyncClientConnector
 from IPython.kernel.parallelfunction import ParallelFunction
@@ -144,3 +150,62 @@ class FullSynchronousMultiEngineTestCase(
         d.addBoth(lambda f: self.assertRaises(ZeroDivisionError, _raise_it, f))
         return d
 
+
+class FakeControllerReference(object):
+    """Answer the client's wait_pending_deferreds calls from a local pdm."""
+
+    def __init__(self):
+        self.pdm = PendingDeferredManager()
+        self.waits = []
+
+    def callRemote(self, method, deferred_ids, wait_all, timeout):
+        self.waits.append(timeout)
+        d = self.pdm.wait_pending_deferreds(deferred_ids, wait_all, timeout)
+        d.addCallback(lambda r: pickle.dumps(r, 2))
+        return d
+
+
+class MixedWaitTestCase(unittest.TestCase):
+
+    timeout = 10
+
+    def setUp(self):
+        self.remote = FakeControllerReference()
+        self.client = FCFullSynchronousMultiEngineClient(self.remote)
+        self.client.wait_poll_interval = 0.05
+        self.local_d = defer.Deferred()
+        self.local_id = self.client.pdm.save_pending_deferred(self.local_d)
+        self.remote_d = defer.Deferred()
+        self.remote_id = self.remote.pdm.save_pending_deferred(self.remote_d)
+
+    def test_local_completes_first(self):
+        # The remote result never arrives during the wait
+        reactor.callLater(0.1, self.local_d.callback, 'local')
+        d = self.client.wait_pending_deferreds(
+            [self.local_id, self.remote_id], wait_all=False, timeout=None)
+        def check(r):
+            self.assertEquals(r, {self.local_id: 'local'})
+            # The controller was only waited on for short periods
+            self.assert_(max(self.remote.waits) <= 0.05)
+            self.assert_(self.remote.pdm.quick_has_id(self.remote_id))
+        d.addCallback(check)
+        return d
+
+    def test_remote_completes_first(self):
+        reactor.callLater(0.1, self.remote_d.callback, 'remote')
+        d = self.client.wait_pending_deferreds(
+            [self.local_id, self.remote_id], wait_all=False, timeout=None)
+        def check(r):
+            self.assertEquals(r, {self.remote_id: 'remote'})
+            # The local id can be waited on again
+            self.local_d.callback('local')
+            return self.client.pdm.wait_pending_deferreds([self.local_id])
+        d.addCallback(check)
+        d.addCallback(lambda r: self.assertEquals(r, {self.local_id: 'local'}))
+        return d
+
+    def test_timeout(self):
+        d = self.client.wait_pending_deferreds(
+            [self.local_id, self.remote_id], wait_all=False, timeout=0.12)
+        d.addCallback(lambda r: self.assertEquals(r, {}))
+        return d
@@ -184,3 +184,66 @@ class PendingDeferredManagerTest(DeferredTestCase):
         d3 = self.pdm.get_pending_deferred(did,False)
         d3.addCallback(lambda r: self.assertEquals(r,'bar'))
 
+
+    def test_none_result(self):
+        d = defer.Deferred()
+        did = self.pdm.save_pending_deferred(d)
+        d.callback(None)
+        d2 = self.pdm.get_pending_deferred(did,False)
+        d2.addCallback(lambda r: self.assertEquals(r,None))
+        self.assert_(not self.pdm.quick_has_id(did))
+
+    def test_wait_any(self):
+        ds = [defer.Deferred() for i in range(3)]
+        dids = [self.pdm.save_pending_deferred(d) for d in ds]
+        d2 = self.pdm.wait_pending_deferreds(dids, wait_all=False)
+        self.assert_(not d2.called)
+        ds[1].callback('foo')
+        d2.addCallback(lambda r: self.assertEquals(r, {dids[1]:'foo'}))
+        self.assert_(not self.pdm.quick_has_id(dids[1]))
+        self.assert_(self.pdm.quick_has_id(dids[0]))
+        # The ids that were not completed can be waited on again
+        d3 = self.pdm.wait_pending_deferreds([dids[0], dids[2]], wait_all=False)
+        ds[2].callback('bar')
+        d3.addCallback(lambda r: self.assertEquals(r, {dids[2]:'bar'}))
+        return d2
+
+    def test_wait_all(self):
+        class MyError(Exception):
+            pass
+        ds = [defer.Deferred() for i in range(3)]
+        dids = [self.pdm.save_pending_deferred(d) for d in ds]
+        d2 = self.pdm.wait_pending_deferreds(dids, wait_all=True)
+        ds[0].callback(0)
+        ds[2].errback(failure.Failure(MyError('bam')))
+        self.assert_(not d2.called)
+        ds[1].callback(1)
+        def check(r):
+            self.assertEquals(r[dids[0]], 0)
+            self.assertEquals(r[dids[1]], 1)
+            self.assertRaises(MyError, r[dids[2]].raiseException)
+            for did in dids:
+                self.assert_(not self.pdm.quick_has_id(did))
+        d2.addCallback(check)
+        return d2
+
+    def test_wait_timeout(self):
+        ds = [defer.Deferred() for i in range(2)]
+        dids = [self.pdm.save_pending_deferred(d) for d in ds]
+        ds[0].callback('foo')
+        d2 = self.pdm.wait_pending_deferreds(dids, wait_all=True, timeout=0)
+        d2.addCallback(lambda r: self.assertEquals(r, {dids[0]:'foo'}))
+        self.assert_(self.pdm.quick_has_id(dids[1]))
+        d3 = self.pdm.wait_pending_deferreds(dids[1:], wait_all=True, timeout=0.01)
+        d3.addCallback(lambda r: self.assertEquals(r, {}))
+        return d3
+
+    def test_wait_claimed_id(self):
+        d = defer.Deferred()
+        did = self.pdm.save_pending_deferred(d)
+        d2 = self.pdm.wait_pending_deferreds([did])
+        d3 = self.pdm.get_pending_deferred(did,True)
+        d3.addErrback(lambda f: self.assertRaises(error.InvalidDeferredID, f.raiseException))
+        self.pdm.delete_pending_deferred(did)
+        d2.addCallback(lambda r: self.assertEquals(r, {}))
+        return d2
@@ -0,0 +1,106 @@
+# encoding: utf-8
+
+"""Tests for canning functions and the function cache in kernel.pickleutil."""
+
+__docformat__ = "restructuredtext en"
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+# Tell nose to skip this module
+__test__ = {}
+
+import pickle
+
+from twisted.trial import unittest
+
+from IPython.kernel import pickleutil
+from IPython.kernel.error import FunctionCacheMiss
+from IPython.kernel.task import MapTask
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+def square(x):
+    return x*x
+
+def cube(x):
+    return x*x*x
+
+
+class PickleUtilTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pickleutil.function_cache.clear()
+
+    def roundtrip(self, obj):
+        return pickle.loads(pickle.dumps(obj, 2))
+
+    def testCanUncan(self):
+        canned = pickleutil.can(square)
+        self.assert_(isinstance(canned, pickleutil.CannedFunction))
+        self.assertEquals(pickleutil.uncan(canned)(3), 9)
+        self.assert_(canned.hash in pickleutil.function_cache)
+
+    def testHashIsContentBased(self):
+        self.assertEquals(pickleutil.can(square).hash,
+                          pickleutil.can(square).hash)
+        self.assertNotEquals(pickleutil.can(square).hash,
+                             pickleutil.can(cube).hash)
+
+    def testKnownFunctionsAreSentByHash(self):
+        known = set()
+        canned = pickleutil.can(square, known)
+        self.assert_(isinstance(canned, pickleutil.CannedFunction))
+        known.update(pickleutil.canned_hashes(canned))
+        ref = self.roundtrip(pickleutil.can(square, known))
+        self.assert_(isinstance(ref, pickleutil.CannedFunctionRef))
+        self.assertEquals(pickleutil.canned_hashes(ref), set())
+        g = {}
+        f = pickleutil.uncan(ref, g)
+        self.assertEquals(f(4), 16)
+        self.assert_(f.__globals__ is g)
+        self.assertEquals(pickleutil.function_cache.stats()['hits'], 1)
+
+    def testCacheMiss(self):
+        ref = pickleutil.CannedFunctionRef(pickleutil.can(square).hash)
+        self.assertRaises(FunctionCacheMiss, pickleutil.uncan, ref)
+        self.assertEquals(pickleutil.function_cache.stats()['misses'], 1)
+
+    def testCacheIsBounded(self):
+        cache = pickleutil.FunctionCache(maxsize=1)
+        cache.put('a', square)
+        cache.put('b', cube)
+        self.assertEquals(len(cache), 1)
+        self.assertRaises(FunctionCacheMiss, cache.get, 'a', {})
+        self.assertEquals(cache.get('b', cube.__globals__), cube)
+
+    def testCanDict(self):
+        known = set([pickleutil.can(square).hash])
+        ns = pickleutil.canDict(dict(a=square, b=cube, c=1), known)
+        self.assert_(isinstance(ns['a'], pickleutil.CannedFunctionRef))
+        self.assert_(isinstance(ns['b'], pickleutil.CannedFunction))
+        self.assertEquals(pickleutil.canned_hashes(ns), set([ns['b'].hash]))
+
+    def testMapTask(self):
+        known = set()
+        task = MapTask(square, (2,))
+        task.can_task(known)
+        hashes = task.canned_hashes()
+        self.assertEquals(len(hashes), 1)
+        task.uncan_task()
+        known.update(hashes)
+        task.can_task(known)
+        self.assertEquals(task.canned_hashes(), set())
+        task = self.roundtrip(task)
+        task.uncan_task()
+        self.assertEquals(task.function(*task.args), 4)
@@ -0,0 +1,73 @@
+# encoding: utf-8
+
+"""Tests for the reduction functions in kernel.reduction."""
+
+__docformat__ = "restructuredtext en"
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+# Tell nose to skip this module
+__test__ = {}
+
+import operator
+
+from twisted.trial import unittest
+
+from IPython.kernel import reduction
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+class ReductionTestCase(unittest.TestCase):
+
+    def testResolve(self):
+        self.assertEquals(reduction.resolve('max'), max)
+        self.assertEquals(reduction.resolve('operator.add'), operator.add)
+        self.assertEquals(reduction.resolve(min), min)
+        self.assertRaises(AttributeError, reduction.resolve, 'nosuchbuiltin')
+
+    def testLocalReduce(self):
+        self.assertEquals(reduction.local_reduce('operator.add', [1, 2, 3]), [6])
+        self.assertEquals(reduction.local_reduce(max, [1, 3, 2]), [3])
+        self.assertEquals(reduction.local_reduce(max, []), [])
+
+    def testTreeReduce(self):
+        # Concatenation checks that the order of the values is kept
+        for n in range(1, 10):
+            values = [[i] for i in range(n)]
+            self.assertEquals(reduction.tree_reduce(operator.add, values),
+                              list(range(n)))
+        self.assertRaises(ValueError, reduction.tree_reduce, max, [])
+
+    def testNumpy(self):
+        try:
+            import numpy
+        except ImportError:
+            raise unittest.SkipTest("numpy is not installed")
+        a = numpy.arange(12.0).reshape(4, 3)
+        result = reduction.local_reduce(numpy.add, a)[0]
+        self.assert_((result == a.sum(axis=0)).all())
+        rows = [a[i].copy() for i in range(4)]
+        first = rows[0]
+        result = reduction.tree_reduce(numpy.add, rows)
+        self.assert_((result == a.sum(axis=0)).all())
+        # The sum is accumulated into the first row
+        self.assert_(result is first)
+        # Integers are not added in place into a float array
+        ints = numpy.arange(3)
+        result = reduction.combine(numpy.add, ints, numpy.ones(3) / 2)
+        self.assertEquals(result.dtype, numpy.float64)
+        # The elements of a list are not modified
+        rows = [a[0], a[1]]
+        reduction.local_reduce(numpy.add, rows)
+        self.assertEquals(a[0, 0], 0.0)
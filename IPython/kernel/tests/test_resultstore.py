@@ -0,0 +1,100 @@
+# encoding: utf-8
+
+"""Tests for the task result stores in kernel.resultstore."""
+
+__docformat__ = "restructuredtext en"
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2008  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+# Tell nose to skip this module
+__test__ = {}
+
+import os
+import time
+
+from twisted.trial import unittest
+from twisted.python import failure
+
+from IPython.kernel import resultstore as rs
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+class FakeResult(object):
+
+    def __init__(self, value, failed=False):
+        self.value = value
+        self.failure = 'error' if failed else None
+
+
+class TieredResultStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = self.mktemp()
+        self.store = rs.TieredResultStore(max_memory=2, directory=self.directory)
+
+    def tearDown(self):
+        self.store.close()
+
+    def testSpillToDisk(self):
+        for i in range(5):
+            self.store.put(i, FakeResult(i))
+        self.assertEquals(len(self.store), 5)
+        stats = self.store.stats()
+        self.assertEquals(stats['memory'], 2)
+        self.assertEquals(stats['disk'], 3)
+        self.assert_(stats['disk_bytes'] > 0)
+        self.assertEquals(len(os.listdir(self.directory)), 3)
+        for i in range(5):
+            self.assertEquals(self.store.fetch(i).value, i)
+
+    def testLRUOrder(self):
+        self.store.put(0, FakeResult(0))
+        self.store.put(1, FakeResult(1))
+        self.store.fetch(0)
+        self.store.put(2, FakeResult(2))
+        # 1 was the least recently used result
+        self.assertEquals(sorted(self.store._disk), [1])
+
+    def testStatuses(self):
+        self.store.put(0, FakeResult(0))
+        self.store.put(1, FakeResult(1, failed=True))
+        self.store.put(2, failure.Failure(ValueError('aborted')))
+        self.assertEquals(self.store.statuses(), {0:True, 1:False, 2:None})
+
+    def testRemoveAndClear(self):
+        for i in range(4):
+            self.store.put(i, FakeResult(i))
+        self.store.remove(0)
+        self.assert_(0 not in self.store)
+        self.assertRaises(KeyError, self.store.fetch, 0)
+        self.store.clear()
+        self.assertEquals(self.store.stats(), dict(memory=0, disk=0, disk_bytes=0))
+        self.assertEquals(os.listdir(self.directory), [])
+
+    def testFetchedTTL(self):
+        self.store.fetched_ttl = 0.01
+        self.store.put(0, FakeResult(0))
+        self.store.put(1, FakeResult(1))
+        self.store.fetch(0)
+        time.sleep(0.02)
+        self.assert_(0 not in self.store)
+        # Results that were never fetched are kept
+        self.assert_(1 in self.store)
+
+    def testUnpicklableResultStaysInMemory(self):
+        self.store.put(0, FakeResult(lambda: None))
+        self.store.put(1, FakeResult(1))
+        self.store.put(2, FakeResult(2))
+        self.assertEquals(self.store.stats()['memory'], 3)
+        self.assert_(self.store.fetch(0).value is not None)
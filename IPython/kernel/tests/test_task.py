@@ -49,3 +49,73 @@ class BasicTaskControllerTestCase(DeferredTestCase, ITaskControllerTestCase):
             e.stopService()
 
 
+class FakeWorker(object):
+
+    def __init__(self, workerid, resident=()):
+        self.workerid = workerid
+        self.resident = set(resident)
+        self.properties = {}
+
+
+class LocalitySchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = task.LocalityScheduler()
+        self.workers = dict((i, FakeWorker(i)) for i in range(3))
+        self.scheduler.all_workers = self.workers
+
+    def add(self, taskid, **kw):
+        t = task.StringTask('', **kw)
+        t.taskid = taskid
+        self.scheduler.add_task(t)
+
+    def testNoLocalityIsFIFO(self):
+        for w in list(self.workers.values()):
+            self.scheduler.add_worker(w)
+        self.add(0)
+        worker, t = self.scheduler.schedule()
+        self.assertEquals((worker.workerid, t.taskid), (0, 0))
+        # Tasks without locality aren't counted
+        self.assertEquals((self.scheduler.local, self.scheduler.transferred),
+                          (0, 0))
+
+    def testRunsWhereDataIs(self):
+        self.workers[2].resident.add('data')
+        for w in list(self.workers.values()):
+            self.scheduler.add_worker(w)
+        self.add(0, locality='data')
+        worker, t = self.scheduler.schedule()
+        self.assertEquals(worker.workerid, 2)
+        self.assertEquals(self.scheduler.local, 1)
+
+    def testWaitsForBusyHolder(self):
+        self.workers[2].resident.add('data')
+        self.scheduler.add_worker(self.workers[0])
+        self.add(0, locality=['data'])
+        self.add(1)
+        # Task 0 waits for worker 2, task 1 can run
+        worker, t = self.scheduler.schedule()
+        self.assertEquals((worker.workerid, t.taskid), (0, 1))
+        self.assertEquals(self.scheduler.taskids, [0])
+
+    def testTransfersWhenHolderBusy(self):
+        self.workers[2].resident.add('data')
+        self.scheduler.add_worker(self.workers[0])
+        self.add(0, locality=dict(data=[1, 2]))
+        worker, t = self.scheduler.schedule()
+        self.assertEquals((worker.workerid, t.taskid), (0, 0))
+        self.assertEquals(self.scheduler.transferred, 1)
+
+    def testNoHolderFallsBack(self):
+        self.scheduler.add_worker(self.workers[1])
+        self.add(0, locality='data')
+        worker, t = self.scheduler.schedule()
+        self.assertEquals((worker.workerid, t.taskid), (1, 0))
+        # Nothing is pushed for a locality that isn't a dict
+        self.assertEquals((self.scheduler.local, self.scheduler.transferred),
+                          (0, 0))
+
+    def testBadLocality(self):
+        self.assertRaises(TypeError, task.StringTask, '', locality=1)
+
+
@@ -12,6 +12,11 @@ itself from the command line. There are two ways of running this script:
    the script simply calls nose, but with special command line flags and
    plugins loaded.
 
+`iptest all` also accepts a few options of its own: ``-j N`` runs N test
+groups at a time, ``--slowest N`` reports the N slowest tests and
+``--rerun-failed`` only runs the tests that failed last time.  The duration
+and failures of every test are kept in ``--results-file``.
+
 For now, this script requires that both nose and twisted are installed.  This
 will change in the future.
 """
@@ -28,14 +33,17 @@ will change in the future.
 #-----------------------------------------------------------------------------
 
 # Stdlib
+import json
 import os
 import os.path as path
+import shutil
 import signal
 import sys
 import subprocess
 import tempfile
 import time
 import warnings
+from multiprocessing.pool import ThreadPool
 
 # Note: monkeypatch!
 # We need to monkeypatch a small problem in nose itself first, before importing
@@ -47,12 +55,14 @@ import nose.plugins.builtin
 from nose.core import TestProgram
 
 # Our own imports
-from IPython.utils.path import get_ipython_module_path
+from IPython.external.argparse import ArgumentParser
+from IPython.utils.path import get_ipython_dir, get_ipython_module_path
 from IPython.utils.process import find_cmd, pycmd2argv
 from IPython.utils.sysinfo import sys_info
 
 from IPython.testing import globalipapp
 from IPython.testing.plugin.ipdoctest import IPythonDoctest
+from IPython.testing.plugin.durations import TestTimer
 
 pjoin = path.join
 
@@ -212,13 +222,30 @@ class IPTester(object):
     call_args = None
     #: list, process ids of subprocesses we start (for cleanup)
     pids = None
+    #: bool, whether to keep the output of the test runner in `output`
+    #: instead of letting it through (for running several at once)
+    capture_output = False
+    #: string, the output of the last run if capture_output is set
+    output = ''
+    #: string, the JSON file the durations and failures of tests are
+    #: written to, or None.  Only nose test runners honor it.
+    results_file = None
+    #: float, the duration of the last run in seconds
+    duration = None
     
-    def __init__(self, runner='iptest', params=None):
-        """Create new test runner."""
+    def __init__(self, runner='iptest', params=None, runner_args=None):
+        """Create new test runner.
+
+        runner_args are extra arguments for the runner, by default the
+        arguments this script was called with (for iptest only).
+        """
         p = os.path
+        self.runner_type = runner
         if runner == 'iptest':
+            if runner_args is None:
+                runner_args = sys.argv[1:]
             iptest_app = get_ipython_module_path('IPython.testing.iptest')
-            self.runner = pycmd2argv(iptest_app) + sys.argv[1:]
+            self.runner = pycmd2argv(iptest_app) + runner_args
         elif runner == 'trial':
             # For trial, it needs to be installed system-wide
             self.runner = pycmd2argv(p.abspath(find_cmd('trial')))
@@ -260,14 +287,53 @@ class IPTester(object):
             self.pids.pop()
             return retcode
         
+    def _run_captured(self):
+        # Every runner gets its own directory, so that runners going at the
+        # same time don't trip on each other's leftover files.
+        workdir = tempfile.mkdtemp(prefix='iptest-')
+        try:
+            subp = subprocess.Popen(self.call_args, cwd=workdir,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT)
+            self.pids.append(subp.pid)
+            output = subp.communicate()[0]
+            self.pids.remove(subp.pid)
+            self.output = output.decode(sys.getdefaultencoding(), 'replace')
+            return subp.returncode
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
     def run(self):
         """Run the stored commands"""
+        if self.results_file is not None and self.runner_type == 'iptest':
+            self.call_args = self.runner + self.params + \
+                ['--with-testtimer', '--testtimer-file=%s' % self.results_file]
+        start = time.time()
         try:
+            if self.capture_output:
+                return self._run_captured()
             return self._run_cmd()
         except:
             import traceback
             traceback.print_exc()
             return 1  # signal failure
+        finally:
+            self.duration = time.time() - start
+
+    def results(self):
+        """Load the durations and failures written by the last run.
+
+        Returns a dict with 'durations' and 'failed' keys (see the
+        :mod:`~IPython.testing.plugin.durations` plugin), or None if
+        there are none.
+        """
+        if self.results_file is None:
+            return None
+        try:
+            with open(self.results_file) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
 
     def __del__(self):
         """Cleanup on exit by killing any leftover processes."""
@@ -285,8 +351,10 @@ class IPTester(object):
                 pass     
 
 
-def make_runners():
+def make_runners(runner_args=None):
     """Define the top-level packages that need to be tested.
+
+    runner_args are passed on to every iptest runner, see :class:`IPTester`.
     """
 
     # Packages to be tested via nose, that only depend on the stdlib
@@ -311,7 +379,8 @@ def make_runners():
     trial_packages = ['IPython.%s' % m for m in trial_pkg_names ]
 
     # Make runners
-    runners = [ (v, IPTester('iptest', params=v)) for v in nose_packages ]
+    runners = [ (v, IPTester('iptest', params=v, runner_args=runner_args))
+                for v in nose_packages ]
     runners.extend([ (v, IPTester('trial', params=v)) for v in trial_packages ])
     
     return runners
@@ -358,7 +427,7 @@ def run_iptest():
 
     # Construct list of plugins, omitting the existing doctest plugin, which
     # ours replaces (and extends).
-    plugins = [IPythonDoctest(make_exclude())]
+    plugins = [IPythonDoctest(make_exclude()), TestTimer()]
     for p in nose.plugins.builtin.plugins:
         plug = p()
         if plug.name == 'doctest':
@@ -371,6 +440,55 @@ def run_iptest():
     TestProgram(argv=argv, plugins=plugins)
 
 
+def load_results(filename):
+    """Load the results of a previous `iptest all` run, see save_results."""
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return dict(groups={}, durations={}, failed={})
+
+
+def save_results(filename, results):
+    """Save the results of an `iptest all` run.
+
+    results is a dict with the keys 'groups' ({name: seconds}), 'durations'
+    ({test id: seconds}) and 'failed' ({group name: [test names]}, where an
+    empty list means the whole group failed).
+    """
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+
+
+def rerun_failed_runners(runners, failed, runner_args=None):
+    """Return runners for only the failed tests of runners.
+
+    failed is the 'failed' dict of the last results.  Groups that failed
+    without naming tests, or that aren't run by nose, are run entirely.
+    """
+    rerun = []
+    for name, runner in runners:
+        if name not in failed:
+            continue
+        tests = failed[name]
+        if tests and runner.runner_type == 'iptest':
+            runner = IPTester('iptest', params=tests, runner_args=runner_args)
+        rerun.append((name, runner))
+    return rerun
+
+
+def report_slowest(durations, n):
+    """Print the n slowest of the tests in durations."""
+    slowest = sorted(list(durations.items()), key=lambda item: item[1],
+                     reverse=True)[:n]
+    if not slowest:
+        return
+    print('%s slowest tests:' % len(slowest))
+    for test, seconds in slowest:
+        print('%8.3fs  %s' % (seconds, test))
+    print()
+
+
 def run_iptestall():
     """Run the entire IPython test suite by calling nose and trial.
     
@@ -378,34 +496,91 @@ def run_iptestall():
     modules and package and then runs each of them.  This causes the modules
     and packages of IPython to be tested each in their own subprocess using
     nose or twisted.trial appropriately.
-    """
 
-    runners = make_runners()
+    With ``-j N``, N test groups are run at a time; the output of each group
+    is shown once it has finished.  The durations of all tests and the names
+    of the failing ones are saved in the results file, which ``--slowest``
+    and ``--rerun-failed`` use.
+    """
+    parser = ArgumentParser(add_help=False)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+        help='The number of test groups to run at a time.')
+    parser.add_argument('--slowest', type=int, default=10,
+        help='Report this many of the slowest tests (0 for none).')
+    parser.add_argument('--rerun-failed', action='store_true',
+        help='Only run the tests that failed in the last run.')
+    parser.add_argument('--results-file',
+        default=pjoin(get_ipython_dir(), 'iptest_results.json'),
+        help='Where to keep the test durations and failures.')
+    opts, runner_args = parser.parse_known_args(sys.argv[1:])
+    results_file = os.path.abspath(opts.results_file)
+    jobs = max(opts.jobs, 1)
+
+    runners = make_runners(runner_args)
+    results = load_results(results_file)
+    if opts.rerun_failed:
+        runners = rerun_failed_runners(runners, results['failed'],
+                                       runner_args)
+        if not runners:
+            print('No failed tests recorded in %s' % results_file)
+            return
 
     # Run the test runners in a temporary dir so we can nuke it when finished
     # to clean up any junk files left over by accident.  This also makes it
     # robust against being run in non-writeable directories by mistake, as the
     # temp dir will always be user-writeable.
     curdir = os.getcwd()
-    testdir = tempfile.gettempdir()
-    os.chdir(testdir)
+    testdir = tempfile.mkdtemp(prefix='iptest-results-')
+    os.chdir(tempfile.gettempdir())
+
+    for i, (name, runner) in enumerate(runners):
+        runner.results_file = pjoin(testdir, '%i.json' % i)
+        runner.capture_output = jobs > 1
+
+    def run_runner(name_runner):
+        name, runner = name_runner
+        if jobs == 1:
+            print('*'*70)
+            print('IPython test group:',name)
+        return runner.run()
 
     # Run all test runners, tracking execution time
     failed = []
     t_start = time.time()
+    if jobs > 1:
+        pool = ThreadPool(jobs)
+        outcomes = pool.imap(run_runner, runners)
+    else:
+        pool = None
+        outcomes = map(run_runner, runners)
     try:
-        for (name, runner) in runners:
-            print('*'*70)
-            print('IPython test group:',name)
-            res = runner.run()
+        for (name, runner), res in zip(runners, outcomes):
+            if jobs > 1:
+                print('*'*70)
+                print('IPython test group:',name)
+                sys.stdout.write(runner.output)
             if res:
                 failed.append( (name, runner) )
+            results['groups'][name] = runner.duration
+            group_results = runner.results()
+            if group_results is not None:
+                results['durations'].update(group_results['durations'])
+            if res:
+                # No test names means that the whole group has to be rerun
+                results['failed'][name] = \
+                    group_results and group_results['failed'] or []
+            else:
+                results['failed'].pop(name, None)
     finally:
+        if pool is not None:
+            pool.terminate()
         os.chdir(curdir)
+        shutil.rmtree(testdir, ignore_errors=True)
     t_end = time.time()
     t_tests = t_end - t_start
     nrunners = len(runners)
     nfail = len(failed)
+    save_results(results_file, results)
     # summarize results
     print()
     print('*'*70)
@@ -413,6 +588,8 @@ def run_iptestall():
     print(report())
     print('Ran %s test groups in %.3fs' % (nrunners, t_tests))
     print()
+    if opts.slowest:
+        report_slowest(results['durations'], opts.slowest)
     print('Status:')
     if not failed:
         print('OK')
@@ -424,8 +601,9 @@ def run_iptestall():
             print('-'*40)
             print('Runner failed:',name)
             print('You may wish to rerun this one individually, with:')
-            print(' '.join(failed_runner.call_args))
+            print(' '.join(failed_runner.runner + failed_runner.params))
             print()
+        print('To rerun only the failed tests, use: iptest all --rerun-failed')
 
 
 def main():
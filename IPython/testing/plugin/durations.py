@@ -0,0 +1,104 @@
+"""Nose plugin that records how long each test takes and which ones fail.
+
+When enabled with ``--with-testtimer``, the plugin writes a JSON file (given
+by ``--testtimer-file``) at the end of the run with two keys:
+
+- ``durations``: a dict mapping each test id to its run time in seconds.
+- ``failed``: a sorted list of the nose names (``module:callable``) of the
+  tests that failed or raised an error, suitable to run them again.  A
+  module that fails to import is listed by its own name.  If an error can't
+  be tied to any test or module, this is None instead.
+
+:func:`IPython.testing.iptest.run_iptestall` uses it to report the slowest
+tests of the suite and to re-run only the tests that failed last time.
+"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import json
+import os
+import time
+
+from nose.plugins import Plugin
+from nose.plugins.skip import SkipTest
+from nose.plugins.deprecated import DeprecatedTest
+
+#-----------------------------------------------------------------------------
+# Classes and functions
+#-----------------------------------------------------------------------------
+
+def nose_name(test):
+    """Return the name nose needs to run test again, or None."""
+    try:
+        filename, module, call = test.address()
+    except Exception:
+        return None
+    if module is None:
+        return None
+    if call is None:
+        return module
+    return '%s:%s' % (module, call)
+
+
+class TestTimer(Plugin):
+    """Record the duration of every test and the names of failing tests."""
+
+    name = 'testtimer'   # call nosetests with --with-testtimer
+    enabled = False
+    score = 1000
+
+    def options(self, parser, env=os.environ):
+        Plugin.options(self, parser, env)
+        parser.add_option('--testtimer-file', action='store',
+                          dest='testtimer_file',
+                          default=env.get('NOSE_TESTTIMER_FILE',
+                                          'testtimes.json'),
+                          help="Write the test durations and failures to "
+                          "this JSON file [NOSE_TESTTIMER_FILE]")
+
+    def configure(self, options, config):
+        Plugin.configure(self, options, config)
+        self.filename = os.path.abspath(options.testtimer_file)
+        self.durations = {}
+        self.failed = set()
+        self.unknown_failure = False
+        self._start = {}
+
+    def startTest(self, test):
+        self._start[test.id()] = time.time()
+
+    def stopTest(self, test):
+        tid = test.id()
+        start = self._start.pop(tid, None)
+        if start is not None:
+            self.durations[tid] = self.durations.get(tid, 0.0) + \
+                time.time() - start
+
+    def addError(self, test, err):
+        if not issubclass(err[0], (SkipTest, DeprecatedTest)):
+            self._add_failed(test)
+
+    def addFailure(self, test, err):
+        self._add_failed(test)
+
+    def _add_failed(self, test):
+        name = nose_name(test)
+        if name is None:
+            self.unknown_failure = True
+        else:
+            self.failed.add(name)
+
+    def finalize(self, result):
+        failed = None if self.unknown_failure else sorted(self.failed)
+        with open(self.filename, 'w') as f:
+            json.dump(dict(durations=self.durations, failed=failed), f,
+                      indent=1)
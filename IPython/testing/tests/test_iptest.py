@@ -0,0 +1,70 @@
+# encoding: utf-8
+"""
+Tests for the result bookkeeping of testing.iptest
+"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+
+import nose.tools as nt
+
+from IPython.testing import iptest
+from IPython.testing.plugin import durations
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+def test_results_roundtrip():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'results.json')
+        nt.assert_equal(iptest.load_results(fname),
+                        dict(groups={}, durations={}, failed={}))
+        results = dict(groups={'IPython.core': 1.5},
+                       durations={'IPython.core.tests.test_a.test_b': 0.5},
+                       failed={'IPython.core': ['IPython.core.tests.test_a']})
+        iptest.save_results(fname, results)
+        nt.assert_equal(iptest.load_results(fname), results)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_rerun_failed_runners():
+    runners = [('IPython.core', iptest.IPTester('iptest', 'IPython.core', [])),
+               ('IPython.utils', iptest.IPTester('iptest', 'IPython.utils', [])),
+               ('IPython.lib', iptest.IPTester('iptest', 'IPython.lib', []))]
+    failed = {'IPython.core': ['IPython.core.tests.test_a:test_b'],
+              'IPython.lib': []}
+    rerun = iptest.rerun_failed_runners(runners, failed, [])
+    nt.assert_equal([name for name, runner in rerun],
+                    ['IPython.core', 'IPython.lib'])
+    nt.assert_equal(rerun[0][1].params, ['IPython.core.tests.test_a:test_b'])
+    # A group without test names is run entirely
+    nt.assert_true(rerun[1][1] is runners[2][1])
+
+
+class FakeTest(object):
+    def __init__(self, address):
+        self._address = address
+
+    def address(self):
+        return self._address
+
+
+def test_nose_name():
+    nt.assert_equal(durations.nose_name(FakeTest(('a.py', 'a', 'f'))), 'a:f')
+    nt.assert_equal(durations.nose_name(FakeTest(('a.py', 'a', None))), 'a')
+    nt.assert_equal(durations.nose_name(FakeTest((None, None, None))), None)
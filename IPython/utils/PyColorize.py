@@ -29,13 +29,15 @@ scan Python source code and re-emit it with no changes to its original
 formatting (which is the hard part).
 """
 
-__all__ = ['ANSICodeColors','Parser']
+__all__ = ['ANSICodeColors','Parser','ColoredLinesCache']
 
 _scheme_default = 'Linux'
 
 # Imports
+import collections
 import io
 import keyword
+import linecache
 import os
 import optparse
 import sys
@@ -121,6 +123,24 @@ class Parser:
     def format(self, raw, out = None, scheme = ''):
         return self.format2(raw, out, scheme)[0]
 
+    def format_lines(self, raw, scheme = ''):
+        """Return the lines of raw colored, or None if it can't be parsed.
+
+        The source is colored as a whole, so that strings and other tokens
+        spanning several lines are colored right, and then split in lines.
+        Each line is colored on its own and, like the output of format2 for
+        one line, ends with the normal color and a newline."""
+        scheme = self.color_table[scheme].name
+        nlines = raw.count('\n') + (not raw.endswith('\n'))
+        if scheme == 'NoColor':
+            return [line + '\n' for line in raw.split('\n')[:nlines]]
+        output, error = self.format2(raw, 'str', scheme)
+        if error:
+            return None
+        normal = self.color_table[scheme].colors.normal
+        return ['%s%s\n' % (line.rstrip('\r'), normal)
+                for line in output.split('\n')[:nlines]]
+
     def format2(self, raw, out = None, scheme = ''):
         """ Parse and send the colored source.
 
@@ -253,6 +273,61 @@ class Parser:
         # send text
         owrite('%s%s%s' % (color,toktext,colors.normal))
             
+class ColoredLinesCache(object):
+    """A cache of the colored lines of source files.
+
+    A file is colored as a whole (see Parser.format_lines) the first time
+    its lines are asked for, with the source linecache has for it.  The
+    lines are colored again when the file's modification time or the lines
+    in linecache change.  Beyond maxsize files, the least recently used are
+    dropped.
+    """
+
+    def __init__(self, parser=None, maxsize=20):
+        self.parser = parser or Parser()
+        self.maxsize = maxsize
+        # (filename, scheme) -> (mtime, source lines, colored lines), the
+        # most recently used last
+        self._cache = collections.OrderedDict()
+
+    def getlines(self, filename, scheme=''):
+        """Return the colored lines of filename, or None.
+
+        None is returned if linecache has no source for filename or if it
+        can't be parsed."""
+        key = (filename, self.parser.color_table[scheme].name)
+        try:
+            mtime = os.stat(filename).st_mtime
+        except OSError:
+            mtime = None
+        entry = self._cache.pop(key, None)
+        if entry is None or entry[0] != mtime:
+            # linecache doesn't notice changed files by itself
+            linecache.checkcache(filename)
+        lines = linecache.getlines(filename)
+        if not lines:
+            return None
+        if entry is None or entry[0] != mtime or entry[1] is not lines:
+            entry = (mtime, lines, self.parser.format_lines(''.join(lines),
+                                                            key[1]))
+        self._cache[key] = entry
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return entry[2]
+
+    def getrange(self, filename, first, last, scheme=''):
+        """Return the colored lines first to last (1-based, included)."""
+        colored = self.getlines(filename, scheme)
+        if colored is None:
+            return None
+        return colored[max(first, 1) - 1:last]
+
+    def clear(self):
+        self._cache.clear()
+
+#: The cache used for the default color schemes
+colored_lines = ColoredLinesCache()
+
 def main(argv=None):
     """Run as a command-line script: colorize a python file or stdin using ANSI
     color escapes and print to stdout.
@@ -0,0 +1,190 @@
+# encoding: utf-8
+"""Utilities for measuring how much memory objects use.
+"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import collections
+import sys
+import time
+import types
+
+#-----------------------------------------------------------------------------
+# Code
+#-----------------------------------------------------------------------------
+
+# Objects of these types are shared by the whole program, they aren't counted
+# in the size of the objects referring to them.
+shared_types = (type, types.ModuleType, types.FunctionType,
+                types.BuiltinFunctionType, types.MethodType,
+                types.CodeType, types.FrameType)
+
+# Containers whose items are counted
+item_types = (list, tuple, set, frozenset, collections.deque)
+
+
+def format_size(nbytes):
+    """Return a size in bytes in a short human readable form."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if nbytes < 1024 or unit == 'GB':
+            break
+        nbytes /= 1024.0
+    if unit == 'B':
+        return '%i B' % nbytes
+    return '%.1f %s' % (nbytes, unit)
+
+
+class DeepSizer(object):
+    """Compute the deep size of objects, noting the objects they share.
+
+    The size of an object includes everything it refers to: the items of
+    containers, the attributes of instances, the data of NumPy arrays (the
+    array they view, for views) and the object a memoryview is on.  Classes,
+    modules and functions are not followed.
+
+    The objects counted for one object are remembered, so that `sizeof` can
+    report how much of the next objects was already counted.
+
+    Parameters
+    ----------
+    time_limit : float
+        If computing the size of an object takes longer than this many
+        seconds, the traversal stops and its size is a lower bound.  0 means
+        no limit.
+    """
+
+    def __init__(self, time_limit=0.0):
+        self.time_limit = time_limit
+        # id -> object, for all objects counted so far.  The objects are kept
+        # so that their ids aren't reused.
+        self.counted = {}
+
+    def sizeof(self, obj):
+        """Return (size, shared, complete) for obj.
+
+        size is the deep size of obj in bytes and shared the part of it that
+        was already counted by an earlier call.  complete is False if the
+        time limit was hit.
+        """
+        ndarray = getattr(sys.modules.get('numpy'), 'ndarray', None)
+        seen = set()
+        stack = [obj]
+        size = shared = 0
+        start = time.time()
+        visited = 0
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen or isinstance(obj, shared_types):
+                continue
+            seen.add(id(obj))
+            visited += 1
+            if self.time_limit and not visited % 256 and \
+                   time.time() - start > self.time_limit:
+                return size, shared, False
+            try:
+                nbytes = sys.getsizeof(obj)
+            except TypeError:
+                nbytes = 0
+            size += nbytes
+            if id(obj) in self.counted:
+                shared += nbytes
+            else:
+                self.counted[id(obj)] = obj
+            stack.extend(self.referents(obj, ndarray))
+        return size, shared, True
+
+    def referents(self, obj, ndarray=None):
+        """Return the objects counted in the size of obj."""
+        if isinstance(obj, (str, bytes, bytearray, int, float, complex)):
+            return ()
+        if isinstance(obj, dict):
+            return list(obj.keys()) + list(obj.values())
+        if isinstance(obj, item_types):
+            return list(obj)
+        if isinstance(obj, memoryview):
+            return [obj.obj]
+        if ndarray is not None and isinstance(obj, ndarray):
+            # An array owning its data includes it in its getsizeof
+            return obj.base is not None and [obj.base] or []
+        refs = []
+        d = getattr(obj, '__dict__', None)
+        if isinstance(d, dict):
+            refs.append(d)
+        for klass in type(obj).__mro__:
+            slots = klass.__dict__.get('__slots__', ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            for name in slots:
+                if name in ('__dict__', '__weakref__'):
+                    continue
+                try:
+                    refs.append(getattr(obj, name))
+                except AttributeError:
+                    pass
+        return refs
+
+
+MemoryRow = collections.namedtuple('MemoryRow',
+                    ['name', 'type', 'size', 'shared', 'complete', 'info'])
+
+
+class MemoryTable(object):
+    """The memory used by a set of named objects, largest first.
+
+    The rows are MemoryRow tuples (name, type, size, shared, complete,
+    info), see DeepSizer.sizeof for size, shared and complete.  `total` is
+    the memory used by all the objects together, counting what they share
+    once.  Its repr is the table as printed by %whos --memory.
+
+    The rows are kept in the given order if sort is False, and labels are
+    the titles of the five columns of the table.
+    """
+
+    labels = ('Variable', 'Type', 'Size', 'Shared', 'Data/Info')
+
+    def __init__(self, rows, sort=True, labels=None):
+        if sort:
+            rows = sorted(rows, key=lambda row: row.size, reverse=True)
+        self.rows = list(rows)
+        if labels is not None:
+            self.labels = labels
+
+    @property
+    def total(self):
+        return sum(row.size - row.shared for row in self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __repr__(self):
+        labels = self.labels
+        cells = [(row.name, row.type,
+                  (not row.complete and '>' or '') + format_size(row.size),
+                  row.shared and format_size(row.shared) or '',
+                  row.info)
+                 for row in self.rows]
+        widths = [max([len(labels[i])] + [len(c[i]) for c in cells]) + 3
+                  for i in range(4)]
+        def line(cell):
+            return (cell[0].ljust(widths[0]) + cell[1].ljust(widths[1]) +
+                    cell[2].rjust(widths[2] - 3) + '   ' +
+                    cell[3].rjust(widths[3] - 3) + '   ' + cell[4]).rstrip()
+        lines = [line(labels), '-'*(sum(widths) + len(labels[4]))]
+        lines.extend(line(cell) for cell in cells)
+        lines.append('Total: %s' % format_size(self.total))
+        return '\n'.join(lines)
@@ -2,15 +2,30 @@
 """
 
 # Stdlib imports
+import collections
 import re
 
 # Our own modules
 from IPython.core.hooks import CommandChainDispatcher
 
 # Code begins
+
+# The flags of a regexp without inline flags
+default_flags = re.compile('').flags
+
+# Numbered group references: backreferences, like \1, and conditionals
+group_reference = re.compile(r'\\[1-9]|\(\?\(')
+
 class StrDispatch(object):
     """Dispatch (lookup) a set of strings / regexps for match.
 
+    The regexps are compiled once and joined in a single alternation,
+    except those with flags, named groups or references to their groups.
+    Its first matching branch tells which of these regexps can't match, so
+    that a key usually matching none of them is rejected in a single call.
+    The chains matching a key are remembered for the last `cache_size` keys,
+    until a target is added.
+
     Example:
 
     >>> dis = StrDispatch()
@@ -20,46 +35,102 @@ class StrDispatch(object):
     >>> print(list(dis.flat_matches('hei')))
     [123, 34, 686]
     """
-    
+
+    cache_size = 256
+
     def __init__(self):
         self.strs = {}
         self.regexs = {}
+        self._matchers = None
+        # key -> list of chains, the most recently used last
+        self._cache = collections.OrderedDict()
 
     def add_s(self, s, obj, priority= 0 ):
         """ Adds a target 'string' for dispatching """
-        
+
         chain = self.strs.get(s, CommandChainDispatcher())
         chain.add(obj,priority)
         self.strs[s] = chain
+        self._cache.clear()
 
     def add_re(self, regex, obj, priority= 0 ):
         """ Adds a target regexp for dispatching """
-        
+
         chain = self.regexs.get(regex, CommandChainDispatcher())
         chain.add(obj,priority)
         self.regexs[regex] = chain
+        self._matchers = None
+        self._cache.clear()
+
+    def _compile(self):
+        """Return (combined, branches, matchers) for the regexps.
+
+        matchers has an item (joined, pattern, chain) per regexp, in the
+        order they were added; joined tells if the regexp is a branch of
+        the combined alternation.  branches maps the number of the group
+        wrapping each branch to the index of its regexp in matchers.
+        """
+        parts = []
+        branches = {}
+        matchers = []
+        # The number of the group wrapping the next branch
+        group = 1
+        for regex, chain in self.regexs.items():
+            pattern = re.compile(regex)
+            joined = not (pattern.flags != default_flags or
+                          pattern.groupindex or
+                          group_reference.search(pattern.pattern))
+            if joined:
+                parts.append('(%s)' % pattern.pattern)
+                branches[group] = len(matchers)
+                group += 1 + pattern.groups
+            matchers.append((joined, pattern, chain))
+        combined = parts and re.compile('|'.join(parts)) or None
+        return combined, branches, matchers
+
+    def _match(self, key):
+        """Return the chains that match key, strings first."""
+        chains = []
+        if key in self.strs:
+            chains.append(self.strs[key])
+        if self.regexs:
+            if self._matchers is None:
+                self._matchers = self._compile()
+            combined, branches, matchers = self._matchers
+            # The joined regexps before the first matching branch don't
+            # match, nor any of them if no branch does.
+            first = len(matchers)
+            if combined is not None:
+                m = combined.match(key)
+                if m is not None:
+                    # The group wrapping the branch is the last one closed
+                    first = branches[m.lastindex]
+            for i, (joined, pattern, chain) in enumerate(matchers):
+                if joined and i < first:
+                    continue
+                if (joined and i == first) or pattern.match(key):
+                    chains.append(chain)
+        return chains
 
     def dispatch(self, key):
         """ Get a seq of Commandchain objects that match key """
-        if key in self.strs:
-            yield self.strs[key]
-        
-        for r, obj in list(self.regexs.items()):
-            if re.match(r, key):
-                yield obj
-            else: 
-                #print "nomatch",key  # dbg
-                pass
+        chains = self._cache.pop(key, None)
+        if chains is None:
+            chains = self._match(key)
+        self._cache[key] = chains
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return iter(chains)
 
     def __repr__(self):
         return "<Strdispatch %s, %s>" % (self.strs, self.regexs)
-    
+
     def s_matches(self, key):
         if key not in self.strs:
              return
         for el in self.strs[key]:
             yield el[1]
-        
+
     def flat_matches(self, key):
         """ Yield all 'value' targets, without priority """
         for val in self.dispatch(key):
@@ -0,0 +1,74 @@
+# encoding: utf-8
+"""Tests for IPython.utils.memory"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import sys
+
+import nose.tools as nt
+
+from IPython.utils import memory
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+class Slotted(object):
+    __slots__ = ('data',)
+    def __init__(self, data):
+        self.data = data
+
+class Plain(object):
+    def __init__(self, data):
+        self.data = data
+
+def test_deep_size():
+    data = 'x'*10000
+    sizer = memory.DeepSizer()
+    size, shared, complete = sizer.sizeof([data])
+    nt.assert_equal(size, sys.getsizeof([data]) + sys.getsizeof(data))
+    nt.assert_equal(shared, 0)
+    nt.assert_true(complete)
+    # Both kinds of instances count their data, which was counted already
+    for obj in (Slotted(data), Plain(data)):
+        size, shared, complete = sizer.sizeof(obj)
+        nt.assert_true(size > sys.getsizeof(data))
+        nt.assert_equal(shared, sys.getsizeof(data))
+
+def test_shared_types_not_followed():
+    size, shared, complete = memory.DeepSizer().sizeof([sys, len, Plain])
+    nt.assert_equal(size, sys.getsizeof([sys, len, Plain]))
+
+def test_time_limit():
+    sizer = memory.DeepSizer(time_limit=1e-9)
+    size, shared, complete = sizer.sizeof([[i] for i in range(1000)])
+    nt.assert_false(complete)
+
+def test_format_size():
+    nt.assert_equal(memory.format_size(10), '10 B')
+    nt.assert_equal(memory.format_size(2048), '2.0 KB')
+    nt.assert_equal(memory.format_size(3*2**30), '3.0 GB')
+
+def test_memory_table():
+    rows = [memory.MemoryRow('a', 'list', 100, 0, True, '2'),
+            memory.MemoryRow('b', 'list', 2000, 100, False, '3')]
+    table = memory.MemoryTable(rows)
+    nt.assert_equal([row.name for row in table], ['b', 'a'])
+    nt.assert_equal(table.total, 2000)
+    lines = repr(table).splitlines()
+    nt.assert_true(lines[2].startswith('b'))
+    nt.assert_true('>2.0 KB' in lines[2])
+    nt.assert_equal(lines[-1], 'Total: 2.0 KB')
+    table = memory.MemoryTable(rows, sort=False,
+                               labels=('Script', 'Names', 'Size', 'Shared', 'Dir'))
+    nt.assert_equal([row.name for row in table], ['a', 'b'])
+    nt.assert_true(repr(table).startswith('Script'))
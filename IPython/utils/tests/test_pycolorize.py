@@ -0,0 +1,77 @@
+# encoding: utf-8
+"""Tests for the cached colorization of IPython.utils.PyColorize"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import linecache
+import os
+import shutil
+import tempfile
+import token
+
+import nose.tools as nt
+
+from IPython.utils import PyColorize
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+source = '''\
+def f(x):
+    """A docstring
+    on two lines"""
+    return x + 1
+'''
+
+def test_format_lines():
+    parser = PyColorize.Parser()
+    lines = parser.format_lines(source, 'Linux')
+    nt.assert_equal(len(lines), 4)
+    normal = parser.color_table['Linux'].colors.normal
+    string = parser.color_table['Linux'].colors[token.STRING]
+    for line in lines:
+        nt.assert_true(line.endswith(normal + '\n'))
+    # The second line of the docstring is colored as a string
+    nt.assert_true(lines[2].startswith(string))
+    nt.assert_equal(parser.format_lines(source, 'NoColor'),
+                    source.splitlines(True))
+    nt.assert_equal(parser.format_lines('x = (', 'Linux'), None)
+
+
+def test_colored_lines_cache():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'colored.py')
+        with open(fname, 'w') as f:
+            f.write(source)
+        cache = PyColorize.ColoredLinesCache(maxsize=1)
+        lines = cache.getlines(fname, 'Linux')
+        nt.assert_equal(len(lines), 4)
+        nt.assert_true(cache.getlines(fname, 'Linux') is lines)
+        nt.assert_equal(cache.getrange(fname, 2, 3, 'Linux'), lines[1:3])
+        # Only one file is kept
+        nt.assert_equal(len(cache.getlines(fname, 'NoColor')), 4)
+        nt.assert_equal(len(cache._cache), 1)
+        # A changed file is read and colored again
+        with open(fname, 'w') as f:
+            f.write(source + 'y = 2\n')
+        os.utime(fname, (0, 0))
+        lines = cache.getlines(fname, 'NoColor')
+        nt.assert_equal(len(lines), 5)
+        nt.assert_equal(lines[-1], 'y = 2\n')
+        nt.assert_equal(len(cache.getlines(fname, 'Linux')), 5)
+        nt.assert_equal(cache.getlines(os.path.join(tmpdir, 'missing.py')),
+                        None)
+    finally:
+        shutil.rmtree(tmpdir)
+        linecache.checkcache()
@@ -0,0 +1,74 @@
+# encoding: utf-8
+"""Tests for IPython.utils.strdispatch"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import re
+
+import nose.tools as nt
+
+from IPython.utils.strdispatch import StrDispatch
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+def test_dispatch_regexs():
+    dis = StrDispatch()
+    dis.add_re(r'import\s', 'import')
+    dis.add_re(r'(%run|run)\s', 'run')
+    dis.add_re(r'(?i)CD\s', 'cd')
+    dis.add_re(re.compile(r'.*\.py$'), 'py')
+    dis.add_re(r'', 'all')
+    dis.add_s('import ', 'str')
+    nt.assert_equal(list(dis.flat_matches('import ')),
+                    ['str', 'import', 'all'])
+    nt.assert_equal(list(dis.flat_matches('%run a.py')),
+                    ['run', 'py', 'all'])
+    nt.assert_equal(list(dis.flat_matches('cd ')), ['cd', 'all'])
+    # Only the start of the key has to match
+    nt.assert_equal(list(dis.flat_matches('xrun ')), ['all'])
+
+
+
+def test_combined_groups():
+    dis = StrDispatch()
+    dis.add_re(r'(a)(b)?c', 'abc')
+    dis.add_re(r'x(y|z)', 'xy')
+    dis.add_re(r'(q)\1', 'backref')
+    dis.add_re(r'(?P<n>w)', 'named')
+    dis.add_re(r'x', 'x')
+    combined, branches, matchers = dis._compile()
+    # Regexps referring to their groups aren't joined, the groups of the
+    # others are numbered after those of the previous branches
+    nt.assert_equal([m[0] for m in matchers], [True, True, False, False, True])
+    nt.assert_equal(branches, {1: 0, 4: 1, 6: 4})
+    nt.assert_equal(list(dis.flat_matches('xz')), ['xy', 'x'])
+    nt.assert_equal(list(dis.flat_matches('xa')), ['x'])
+    nt.assert_equal(list(dis.flat_matches('ac')), ['abc'])
+    nt.assert_equal(list(dis.flat_matches('qq')), ['backref'])
+    nt.assert_equal(list(dis.flat_matches('qa')), [])
+    nt.assert_equal(list(dis.flat_matches('w')), ['named'])
+
+
+def test_dispatch_cache():
+    dis = StrDispatch()
+    dis.cache_size = 2
+    dis.add_re('a', 1)
+    nt.assert_equal(list(dis.flat_matches('ab')), [1])
+    # Adding a target drops the cached matches
+    dis.add_re('ab', 2, priority=1)
+    dis.add_re('a', 3, priority=2)
+    nt.assert_equal(list(dis.flat_matches('ab')), [1, 3, 2])
+    for key in ('b', 'c', 'd'):
+        list(dis.dispatch(key))
+    nt.assert_equal(list(dis._cache), ['c', 'd'])
@@ -0,0 +1,63 @@
+# encoding: utf-8
+"""Tests for IPython.utils.timing"""
+
+#-----------------------------------------------------------------------------
+#  Copyright (C) 2010  The IPython Development Team
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#-----------------------------------------------------------------------------
+
+#-----------------------------------------------------------------------------
+# Imports
+#-----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+
+import nose.tools as nt
+
+from IPython.utils.timing import RunTimings
+
+#-----------------------------------------------------------------------------
+# Tests
+#-----------------------------------------------------------------------------
+
+def test_run_timings_stats():
+    t = RunTimings('script.py', [(1.0, 0.5, 0.1), (3.0, 1.5, 0.1),
+                                 (2.0, 1.0, 0.1)])
+    wall = t.stats('wall')
+    nt.assert_equal(wall['total'], 6.0)
+    nt.assert_equal(wall['mean'], 2.0)
+    nt.assert_equal(wall['min'], 1.0)
+    nt.assert_equal(wall['median'], 2.0)
+    nt.assert_almost_equal(wall['stddev'], 1.0)
+    nt.assert_equal(t.times('user'), [0.5, 1.5, 1.0])
+    nt.assert_equal(RunTimings(runs=[(1.0, 1.0, 0.0)]).stats('wall')['stddev'],
+                    0.0)
+    nt.assert_true('Median' in repr(t))
+    nt.assert_true('Wall time' in repr(RunTimings(runs=[(1.0, 1.0, 0.0)])))
+
+
+def test_run_timings_time():
+    t = RunTimings()
+    nt.assert_equal(t.time(lambda x: x + 1, 1), 2)
+    nt.assert_raises(ValueError, t.time, int, 'x')
+    nt.assert_equal(len(t), 2)
+    nt.assert_true(all(time >= 0 for time in t.runs[0]))
+
+
+def test_run_timings_save():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'timings.json')
+        t = RunTimings('script.py', [(1.0, 0.5, 0.25), (2.0, 1.0, 0.5)],
+                       fresh=True)
+        t.save(fname)
+        t2 = RunTimings.load(fname)
+        nt.assert_equal((t2.name, t2.runs, t2.fresh, t2.date),
+                        (t.name, t.runs, t.fresh, t.date))
+        nt.assert_equal(t2.to_dict()['stats']['wall']['median'], 1.5)
+    finally:
+        shutil.rmtree(tmpdir)
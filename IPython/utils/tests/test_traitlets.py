@@ -345,6 +345,49 @@ class TestHasTraitsNotify(TestCase):
 
         self.assertEquals(len(a._trait_notifiers['a']),0)
 
+    def test_notifiers_dont_accumulate(self):
+
+        class A(HasTraits):
+            a = Int
+            b = Int
+
+        a = A()
+        a.on_trait_change(self.notify1, 'a')
+        a.on_trait_change(self.notify2)
+        for i in range(1, 4):
+            a.a = i
+        self.assertEquals(len(a._trait_notifiers['a']), 1)
+        self.assertEquals(len(self._notify1), 3)
+        self.assertEquals(len(self._notify2), 3)
+
+    def test_bad_callback(self):
+
+        class A(HasTraits):
+            a = Int
+
+        a = A()
+        self.assertRaises(TraitError, a.on_trait_change, lambda w,x,y,z: 0, 'a')
+        self.assertRaises(TraitError, a.on_trait_change, 10, 'a')
+
+    def test_static_notify_added_later(self):
+
+        class A(HasTraits):
+            a = Int
+
+        class B(A):
+            pass
+
+        def _b_changed(self, name, old, new):
+            self.b_changed = (old, new)
+
+        A.b = Int
+        A._b_changed = _b_changed
+        b = B()
+        self.assertEquals(b.b, 0)
+        b.b = 3
+        self.assertEquals(b.b_changed, (0, 3))
+        self.assertEquals(sorted(b.trait_names()), ['a', 'b'])
+
 
 class TestHasTraits(TestCase):
 
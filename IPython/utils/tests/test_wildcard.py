@@ -5,6 +5,7 @@
 #-----------------------------------------------------------------------------
 # Stdlib
 import sys
+import types
 import unittest
 
 # Our own
@@ -115,3 +116,58 @@ class Tests (unittest.TestCase):
                                       show_all=True).keys())
             a.sort()
             self.assertEqual(a,res)
+
+    def test_module_prefix(self):
+        ns = {'wildcard': wildcard}
+        a = sorted(wildcard.list_namespace(ns, "all", "wildcard.is_*",
+                                           ignore_case=False).keys())
+        self.assertEqual(a, ["wildcard.is_type"])
+        a = sorted(wildcard.list_namespace(ns, "function", "wildcard.*",
+                                           ignore_case=False).keys())
+        self.assertTrue("wildcard.is_type" in a)
+        self.assertFalse("wildcard.NameSpace" in a)
+
+    def test_name_index(self):
+        index = wildcard.NameIndex()
+        mod = types.ModuleType('wildcard_test_mod')
+        mod.alpha = 1
+        names = index.names(mod)
+        self.assertTrue('alpha' in names)
+        self.assertTrue(index.names(mod) is names)
+        # New attributes invalidate the cached names
+        mod.beta = 2
+        self.assertTrue('beta' in index.names(mod))
+        # Instances with a __dict__ are not cached, others are by class
+        self.assertEqual(index.names(obj_t()), None)
+        self.assertTrue(index.names(1) is index.names(2))
+
+    def test_name_index_rename(self):
+        index = wildcard.NameIndex()
+        mod = types.ModuleType('wildcard_test_mod')
+        mod.a = 1
+        self.assertTrue('a' in index.names(mod))
+        # Same number of attributes, other names
+        del mod.a
+        mod.b = 1
+        names = index.names(mod)
+        self.assertTrue('b' in names)
+        self.assertFalse('a' in names)
+        class C(object):
+            a = 1
+        self.assertTrue('a' in index.names(C))
+        del C.a
+        C.b = 1
+        self.assertEqual(wildcard.list_namespace({'C': C}, "all", "C.b"),
+                         {'C.b': 1})
+
+    def test_name_index_base_class(self):
+        index = wildcard.NameIndex()
+        class Base(object):
+            __slots__ = ()
+        class Derived(Base):
+            __slots__ = ()
+        self.assertFalse('added' in index.names(Derived))
+        self.assertFalse('added' in index.names(Derived()))
+        Base.added = 1
+        self.assertTrue('added' in index.names(Derived))
+        self.assertTrue('added' in index.names(Derived()))
@@ -14,6 +14,8 @@ Utilities for timing code execution.
 # Imports
 #-----------------------------------------------------------------------------
 
+import json
+import math
 import time
 
 #-----------------------------------------------------------------------------
@@ -114,3 +116,128 @@ def timing(func,*args,**kw):
 
     return timings_out(1,func,*args,**kw)[0]
 
+
+
+def _median(values):
+    values = sorted(values)
+    n = len(values)
+    if n % 2:
+        return values[n//2]
+    return (values[n//2 - 1] + values[n//2]) / 2.0
+
+
+class RunTimings(object):
+    """The wall clock and CPU times of repeated runs of some code.
+
+    `runs` is a list of (wall, user, system) times in seconds, one per run,
+    see `clock2` for the CPU times.  The repr is the report printed by
+    ``%run -t``.  Timings can be saved as JSON and loaded back, to compare
+    them across versions of the code::
+
+        t = RunTimings('script.py')
+        for i in range(5):
+            t.time(func)
+        t.save('timings.json')
+        old = RunTimings.load('old_timings.json')
+
+    Parameters
+    ----------
+    name : str
+        What was run, the file name of a script for %run.
+    runs : list of (wall, user, system) tuples, optional
+    fresh : bool
+        Whether each run started from a fresh namespace.
+    date : str, optional
+        When the timings were taken, now by default.
+    """
+
+    kinds = ('wall', 'user', 'system')
+
+    def __init__(self, name='', runs=None, fresh=False, date=None):
+        self.name = name
+        self.runs = [tuple(run) for run in runs or []]
+        self.fresh = fresh
+        self.date = date or time.strftime('%Y-%m-%d %H:%M:%S')
+
+    def time(self, func, *args, **kw):
+        """Call func(*args, **kw) and add its times to the runs.
+
+        The run is recorded even if func raises an exception."""
+        u0, s0 = clock2()
+        w0 = time.time()
+        try:
+            return func(*args, **kw)
+        finally:
+            w1 = time.time()
+            u1, s1 = clock2()
+            self.runs.append((w1 - w0, u1 - u0, s1 - s0))
+
+    def times(self, kind):
+        """Return the list of the times of kind ('wall', 'user', 'system')."""
+        i = self.kinds.index(kind)
+        return [run[i] for run in self.runs]
+
+    def stats(self, kind):
+        """Return a dict of the total, mean, min, median and stddev of the
+        times of kind.
+
+        The standard deviation is the sample one, 0.0 for a single run."""
+        values = self.times(kind)
+        n = len(values)
+        if not n:
+            return dict(total=0.0, mean=0.0, min=0.0, median=0.0, stddev=0.0)
+        total = sum(values)
+        mean = total / n
+        if n > 1:
+            stddev = math.sqrt(sum((v - mean)**2 for v in values) / (n - 1))
+        else:
+            stddev = 0.0
+        return dict(total=total, mean=mean, min=min(values),
+                    median=_median(values), stddev=stddev)
+
+    def to_dict(self):
+        """Return the timings as a dict of JSON types."""
+        return dict(name=self.name, date=self.date, fresh=self.fresh,
+                    runs=[dict(list(zip(self.kinds, run))) for run in self.runs],
+                    stats=dict((kind, self.stats(kind)) for kind in self.kinds))
+
+    @classmethod
+    def from_dict(cls, d):
+        """Make timings from a dict made by `to_dict`."""
+        runs = [tuple(run[kind] for kind in cls.kinds) for run in d['runs']]
+        return cls(d.get('name', ''), runs, d.get('fresh', False),
+                   d.get('date'))
+
+    def save(self, fname):
+        """Save the timings to the file fname, as JSON."""
+        with open(fname, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, fname):
+        """Load timings saved with `save`."""
+        with open(fname) as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __repr__(self):
+        labels = dict(wall='Wall', user='User', system='System')
+        if len(self.runs) == 1:
+            wall, user, system = self.runs[0]
+            return ('IPython CPU timings (estimated):\n'
+                    '  User   : %10.6g s.\n'
+                    '  System : %10.6g s.\n'
+                    'Wall time: %10.6g s.' % (user, system, wall))
+        lines = ['IPython CPU timings (estimated):',
+                 'Total runs performed: %i%s' %
+                 (len(self.runs), self.fresh and ', in fresh namespaces' or ''),
+                 '  Times : %10s    %10s    %10s    %10s    %10s' %
+                 ('Total', 'Per run', 'Min', 'Median', 'Stddev')]
+        for kind in self.kinds:
+            st = self.stats(kind)
+            lines.append('  %-6s: %10.6g s, %10.6g s, %10.6g s, %10.6g s, '
+                         '%10.6g s.' % (labels[kind], st['total'], st['mean'],
+                                        st['min'], st['median'], st['stddev']))
+        return '\n'.join(lines)
@@ -54,7 +54,6 @@ import inspect
 import sys
 import types
 from types import FunctionType
-import collections
 from .importstring import import_item
 
 SequenceTypes = (list, tuple)
@@ -162,6 +161,25 @@ def getmembers(object, predicate=None):
     return results
 
 
+def callback_nargs(c):
+    """Return the number of arguments a trait change callback takes.
+
+    The 'self' argument of bound methods is not counted.
+    """
+    if not callable(c):
+        raise TraitError('a trait changed callback must be callable.')
+    if not isinstance(c, (FunctionType, types.MethodType)):
+        c = c.__call__
+    try:
+        nargs = len(inspect.getfullargspec(c).args)
+    except TypeError:
+        raise TraitError('a trait changed callback must be a function '
+                         'or method, got %r' % c)
+    if isinstance(c, types.MethodType):
+        nargs -= 1
+    return nargs
+
+
 #-----------------------------------------------------------------------------
 # Base TraitType for all traits
 #-----------------------------------------------------------------------------
@@ -372,12 +390,62 @@ class MetaHasTraits(type):
         """Finish initializing the HasTraits class.
         
         This sets the :attr:`this_class` attribute of each TraitType in the
-        class dict to the newly created class ``cls``.
+        class dict to the newly created class ``cls`` and builds the tables
+        of traits and static notifiers of the class.
         """
         for k, v in classdict.items():
             if isinstance(v, TraitType):
                 v.this_class = cls
         super(MetaHasTraits, cls).__init__(name, bases, classdict)
+        cls._build_trait_tables()
+
+    def __setattr__(cls, name, value):
+        """Keep the trait tables current when traits or handlers are added."""
+        if inspect.isclass(value) and issubclass(value, TraitType):
+            value = value()
+        if isinstance(value, TraitType):
+            value.name = name
+            value.this_class = cls
+        super(MetaHasTraits, cls).__setattr__(name, value)
+        if isinstance(value, TraitType) or name in cls._class_traits or \
+            (name.startswith('_') and name.endswith('_changed')):
+            cls._rebuild_trait_tables()
+
+    def __delattr__(cls, name):
+        super(MetaHasTraits, cls).__delattr__(name)
+        cls._rebuild_trait_tables()
+
+    def _build_trait_tables(cls):
+        """Find the traits and static ``_[traitname]_changed`` handlers.
+
+        Doing this once per class means that :meth:`HasTraits.__new__` and
+        :meth:`HasTraits._notify_trait` don't have to search the class on
+        every instantiation and trait change.
+        """
+        traits = dict([memb for memb in getmembers(cls) if
+                       isinstance(memb[1], TraitType)])
+        static_notifiers = {}
+        for name in traits:
+            meth_name = '_%s_changed' % name
+            try:
+                meth = inspect.getattr_static(cls, meth_name)
+            except AttributeError:
+                continue
+            if isinstance(meth, FunctionType):
+                # A plain method, which will be called bound to instances
+                static_notifiers[name] = (meth_name, callback_nargs(meth) - 1)
+            elif callable(getattr(cls, meth_name)):
+                static_notifiers[name] = (meth_name,
+                                          callback_nargs(getattr(cls, meth_name)))
+        type.__setattr__(cls, '_class_traits', traits)
+        type.__setattr__(cls, '_class_trait_list', sorted(traits.items()))
+        type.__setattr__(cls, '_static_notifiers', static_notifiers)
+
+    def _rebuild_trait_tables(cls):
+        cls._build_trait_tables()
+        for subclass in cls.__subclasses__():
+            if isinstance(subclass, MetaHasTraits):
+                subclass._rebuild_trait_tables()
 
 class HasTraits(object, metaclass=MetaHasTraits):
 
@@ -392,18 +460,10 @@ class HasTraits(object, metaclass=MetaHasTraits):
         inst._trait_values = {}
         inst._trait_notifiers = {}
         # Here we tell all the TraitType instances to set their default
-        # values on the instance. 
-        for key in dir(cls):
-            # Some descriptors raise AttributeError like zope.interface's
-            # __provides__ attributes even though they exist.  This causes
-            # AttributeErrors even though they are listed in dir(cls).
-            try:
-                value = getattr(cls, key)
-            except AttributeError:
-                pass
-            else:
-                if isinstance(value, TraitType):
-                    value.instance_init(inst)
+        # values on the instance.  The traits of the class were found by
+        # MetaHasTraits when the class was created.
+        for key, value in cls._class_trait_list:
+            value.instance_init(inst)
 
         return inst
 
@@ -416,47 +476,25 @@ class HasTraits(object, metaclass=MetaHasTraits):
 
     def _notify_trait(self, name, old_value, new_value):
 
-        # First dynamic ones
-        callables = self._trait_notifiers.get(name,[])
-        more_callables = self._trait_notifiers.get('anytrait',[])
-        callables.extend(more_callables)
-
-        # Now static ones
-        try:
-            cb = getattr(self, '_%s_changed' % name)
-        except:
-            pass
-        else:
-            callables.append(cb)
+        # First dynamic ones, then the static one.  The notifier lists hold
+        # (callable, nargs) pairs, see _add_notifiers.
+        callables = self._trait_notifiers.get(name, []) + \
+                    self._trait_notifiers.get('anytrait', [])
+        if name in self._static_notifiers:
+            meth_name, nargs = self._static_notifiers[name]
+            callables.append((getattr(self, meth_name), nargs))
 
         # Call them all now
-        for c in callables:
+        for c, nargs in callables:
             # Traits catches and logs errors here.  I allow them to raise
-            if isinstance(c, collections.Callable):
-                argspec = inspect.getargspec(c)
-                nargs = len(argspec[0])
-                # Bound methods have an additional 'self' argument
-                # I don't know how to treat unbound methods, but they
-                # can't really be used for callbacks.
-                if isinstance(c, types.MethodType):
-                    offset = -1
-                else:
-                    offset = 0
-                if nargs + offset == 0:
-                    c()
-                elif nargs + offset == 1:
-                    c(name)
-                elif nargs + offset == 2:
-                    c(name, new_value)
-                elif nargs + offset == 3:
-                    c(name, old_value, new_value)
-                else:
-                    raise TraitError('a trait changed callback '
-                                        'must have 0-3 arguments.')
+            if nargs == 0:
+                c()
+            elif nargs == 1:
+                c(name)
+            elif nargs == 2:
+                c(name, new_value)
             else:
-                raise TraitError('a trait changed callback '
-                                    'must be callable.')
-                
+                c(name, old_value, new_value)
 
     def _add_notifiers(self, handler, name):
         if name not in self._trait_notifiers:
@@ -464,18 +502,21 @@ class HasTraits(object, metaclass=MetaHasTraits):
             self._trait_notifiers[name] = nlist
         else:
             nlist = self._trait_notifiers[name]
-        if handler not in nlist:
-            nlist.append(handler)
+        if handler not in [c for c, nargs in nlist]:
+            # Work out how to call the handler now, not on every change
+            nargs = callback_nargs(handler)
+            if not 0 <= nargs <= 3:
+                raise TraitError('a trait changed callback '
+                                    'must have 0-3 arguments.')
+            nlist.append((handler, nargs))
 
     def _remove_notifiers(self, handler, name):
         if name in self._trait_notifiers:
             nlist = self._trait_notifiers[name]
-            try:
-                index = nlist.index(handler)
-            except ValueError:
-                pass
-            else:
-                del nlist[index]
+            for index, (c, nargs) in enumerate(nlist):
+                if c == handler:
+                    del nlist[index]
+                    break
 
     def on_trait_change(self, handler, name=None, remove=False):
         """Setup a handler to be called when a trait changes.
@@ -526,11 +567,10 @@ class HasTraits(object, metaclass=MetaHasTraits):
         exists, but has any value.  This is because get_metadata returns
         None if a metadata key doesn't exist.
         """
-        traits = dict([memb for memb in getmembers(self.__class__) if \
-                     isinstance(memb[1], TraitType)])
+        traits = self.__class__._class_traits
 
         if len(metadata) == 0:
-            return traits
+            return dict(traits)
 
         for meta_name, meta_eval in list(list(metadata.items())):
             if type(meta_eval) is not FunctionType:
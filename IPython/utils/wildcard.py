@@ -13,9 +13,12 @@ Authors
 #  the file COPYING, distributed as part of this software.
 #*****************************************************************************
 
+import bisect
 import builtins
+import functools
 import re
 import types
+import weakref
 
 from IPython.utils.dir2 import dir2
 
@@ -59,6 +62,71 @@ def show_hidden(str,show_all=False):
     """Return true for strings starting with single _ if show_all is true."""
     return show_all or str.startswith("__") or not str.startswith("_")
 
+def attribute_names(obj):
+    """Return the sorted, unique attribute names of obj, as given by dir2."""
+    return sorted(set(key for key in dir2(obj) if isinstance(key, str)))
+
+def class_keys(cls):
+    """Return the keys of the __dict__ of each class in cls.__mro__.
+
+    The attribute names of a class only change when these do.
+    """
+    return tuple(tuple(klass.__dict__) for klass in cls.__mro__)
+
+class NameIndex(object):
+    """A cache of the attribute names of modules, classes and instances.
+
+    Listing the attributes of an object (dir2) is the costly part of a
+    wildcard search into it, and the attributes of modules and classes
+    rarely change.  Their sorted names are kept here and listed again only
+    when the keys of their __dict__ change or, for classes, the keys of the
+    __dict__ of any class in their __mro__.  Instances without a __dict__
+    have the attributes of their class, their names are kept by class.
+    Entries go away with their objects.
+    """
+
+    def __init__(self):
+        self._names = weakref.WeakKeyDictionary()
+        self._instance_names = weakref.WeakKeyDictionary()
+
+    def names(self, obj):
+        """Return the sorted attribute names of obj, or None.
+
+        None is returned for the objects whose names aren't cached, which
+        are listed by the caller.
+        """
+        if isinstance(obj, types.ModuleType):
+            cache, key, token = self._names, obj, tuple(obj.__dict__)
+        elif isinstance(obj, type):
+            cache, key, token = self._names, obj, class_keys(obj)
+        elif not hasattr(obj, '__dict__') and \
+             not hasattr(obj, 'trait_names') and \
+             not hasattr(obj, '_getAttributeNames'):
+            key = type(obj)
+            cache, token = self._instance_names, class_keys(key)
+        else:
+            return None
+        try:
+            entry = cache.get(key)
+        except TypeError:
+            # Not hashable or not weakly referenceable
+            return None
+        if entry is None or entry[0] != token:
+            entry = (token, attribute_names(obj))
+            cache[key] = entry
+        return entry[1]
+
+    def clear(self):
+        self._names.clear()
+        self._instance_names.clear()
+
+#: The index used by all wildcard searches
+name_index = NameIndex()
+
+def literal_prefix(name_pattern):
+    """Return the part of name_pattern before its first wildcard."""
+    return re.split(r'[*?]', name_pattern, 1)[0]
+
 class NameSpace(object):
     """NameSpace holds the dictionary for a namespace and implements filtering
     on name and types"""
@@ -72,22 +140,23 @@ class NameSpace(object):
        
        # We should only match EXACT dicts here, so DON'T use isinstance()
        if type(obj) == dict:
-           self._ns = obj
+           self._names = list(obj.keys())
+           self._sorted = False
+           self._lookup = obj.__getitem__
        else:
-           kv = []
-           for key in dir2(obj):
-               if isinstance(key, str):
-                   # This seemingly unnecessary try/except is actually needed
-                   # because there is code out there with metaclasses that
-                   # create 'write only' attributes, where a getattr() call
-                   # will fail even if the attribute appears listed in the
-                   # object's dictionary.  Properties can actually do the same
-                   # thing.  In particular, Traits use this pattern
-                   try:
-                       kv.append((key,getattr(obj,key)))
-                   except AttributeError:
-                       pass
-           self._ns = dict(kv)
+           # Objects are only looked up for the names that match
+           self._names = name_index.names(obj)
+           self._sorted = self._names is not None
+           if self._names is None:
+               self._names = [key for key in set(dir2(obj))
+                              if isinstance(key, str)]
+           # This seemingly unnecessary try/except is actually needed
+           # because there is code out there with metaclasses that
+           # create 'write only' attributes, where a getattr() call
+           # will fail even if the attribute appears listed in the
+           # object's dictionary.  Properties can actually do the same
+           # thing.  In particular, Traits use this pattern
+           self._lookup = functools.partial(getattr, obj)
                
     def get_ns(self):
         """Return name space dictionary with objects matching type and name patterns."""
@@ -109,12 +178,24 @@ class NameSpace(object):
                 reg=re.compile(pattern+"$",re.I)
             else:
                 reg=re.compile(pattern+"$")
+                prefix = literal_prefix(name_pattern)
+                if prefix and self._sorted:
+                    # Only the names starting with the prefix can match
+                    start = bisect.bisect_left(lista, prefix)
+                    end = bisect.bisect_left(lista, prefix[:-1] +
+                                             chr(ord(prefix[-1])+1), start)
+                    lista = lista[start:end]
             result=[x for x in lista if reg.match(x) and show_hidden(x,hidehidden)]
             return result
-        ns=self._ns
         #Filter namespace by the name_pattern
-        all=[(x,ns[x]) for x in glob_filter(list(ns.keys()),name_pattern,
-                                            self.show_all,self.ignore_case)]
+        all = []
+        for name in glob_filter(self._names,name_pattern,
+                                self.show_all,self.ignore_case):
+            # AttributeError: see the comment in __init__
+            try:
+                all.append((name, self._lookup(name)))
+            except AttributeError:
+                pass
         #Filter namespace by type_pattern
         all=[(key,obj) for key,obj in all if is_type(obj,type_pattern)]
         all=dict(all)
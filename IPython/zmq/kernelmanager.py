@@ -194,7 +194,8 @@ class XReqSocketChannel(ZmqSocketChannel):
         raise NotImplementedError('call_handlers must be defined in a subclass.')
 
     def execute(self, code, silent=False,
-                user_variables=None, user_expressions=None):
+                user_variables=None, user_expressions=None,
+                accepted_types=None):
         """Execute code in the kernel.
 
         Parameters
@@ -215,6 +216,11 @@ class XReqSocketChannel(ZmqSocketChannel):
             namespace.  They will come back as a dict with these names as keys
             and their :func:`repr` as values.
 
+        accepted_types : list, optional
+            The format types (MIME types) this frontend can display.  The
+            kernel only computes these (and text/plain) for results.  By
+            default all format types are computed.
+
         Returns
         -------
         The msg_id of the message sent.
@@ -235,6 +241,9 @@ class XReqSocketChannel(ZmqSocketChannel):
         content = dict(code=code, silent=silent,
                        user_variables=user_variables,
                        user_expressions=user_expressions)
+        if accepted_types is not None:
+            validate_string_list(accepted_types)
+            content['accepted_types'] = accepted_types
         msg = self.session.msg('execute_request', content)
         self._queue_request(msg)
         return msg['header']['msg_id']
@@ -264,19 +273,22 @@ class XReqSocketChannel(ZmqSocketChannel):
         self._queue_request(msg)
         return msg['header']['msg_id']
 
-    def object_info(self, oname):
+    def object_info(self, oname, detail_level=0):
         """Get metadata information about an object.
 
         Parameters
         ----------
         oname : str
             A string specifying the object name.
+        detail_level : int, optional
+            0 is like 'x?' and 1 like 'x??'.  -1 only asks for what a call
+            tip needs, which is cheaper to compute.
         
         Returns
         -------
         The msg_id of the message sent.
         """
-        content = dict(oname=oname)
+        content = dict(oname=oname, detail_level=detail_level)
         msg = self.session.msg('object_info_request', content)
         self._queue_request(msg)
         return msg['header']['msg_id']
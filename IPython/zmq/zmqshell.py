@@ -30,7 +30,7 @@ from IPython.core.macro import Macro
 from IPython.core.payloadpage import install_payload_page
 from IPython.utils import io
 from IPython.utils.path import get_py_filename
-from IPython.utils.traitlets import Instance, Type, Dict
+from IPython.utils.traitlets import Instance, Type, Dict, List
 from IPython.utils.warn import warn
 from IPython.zmq.session import extract_header
 from .session import Session
@@ -52,9 +52,24 @@ class ZMQDisplayHook(DisplayHook):
     pub_socket = Instance('zmq.Socket')
     parent_header = Dict({})
 
+    # The format types the frontend that sent the current request can show,
+    # from its ``accepted_types``.  Empty if it didn't say.
+    accepted_types = List()
+
     def set_parent(self, parent):
         """Set the parent for outbound messages."""
         self.parent_header = extract_header(parent)
+        try:
+            self.accepted_types = list(parent['content']['accepted_types'])
+        except (KeyError, TypeError):
+            self.accepted_types = []
+
+    def compute_format_data(self, result):
+        """Compute only the formats the requesting frontend can show."""
+        include = None
+        if self.accepted_types:
+            include = self.accepted_types + ['text/plain']
+        return self.shell.display_formatter.format(result, include=include)
 
     def start_displayhook(self):
         self.msg = self.session.msg('pyout', {}, parent=self.parent_header)
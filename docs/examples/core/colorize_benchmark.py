@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Measure how long the debugger's list command takes on a large module.
+
+This writes a module of many small functions and lists 11 of its lines
+with IPython's Pdb, scrolling through the file like repeated ``list``
+commands do.  The first listing colors the whole file, the next ones are
+served from the colored lines cache.  For comparison, the same lines are
+also colored one by one with Parser.format2, as listings used to be::
+
+    python colorize_benchmark.py -l 10000 -n 100
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+from IPython.core import debugger
+from IPython.utils import PyColorize
+import IPython.utils.io
+
+function = '''\
+def f%i(x, y=None):
+    """Return a value computed from x."""
+    if y is None:
+        y = [x, 'text', 1.5]
+    return len(y) + x
+
+'''
+
+
+def write_module(fname, nlines):
+    with open(fname, 'w') as f:
+        for i in range(nlines // function.count('\n')):
+            f.write(function % i)
+
+
+def list_lines(deb, fname, nlines, count):
+    """Time count listings of 11 lines, spread over the file."""
+    times = []
+    for i in range(count):
+        first = 1 + (i*997) % max(nlines - 11, 1)
+        start = time.time()
+        deb.print_list_lines(fname, first, first + 10)
+        times.append(time.time() - start)
+    return times
+
+
+def format_lines(parser, fname, nlines, count):
+    """Time coloring the same lines one by one."""
+    with open(fname) as f:
+        lines = f.readlines()
+    start = time.time()
+    for i in range(count):
+        first = (i*997) % max(nlines - 11, 1)
+        for line in lines[first:first + 11]:
+            parser.format2(line, 'str', 'Linux')
+    return (time.time() - start) / count
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(lines=10000, count=100)
+    parser.add_option("-l", type='int', dest='lines',
+        help='the number of lines of the module')
+    parser.add_option("-n", type='int', dest='count',
+        help='the number of listings')
+    (opts, args) = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    cout = IPython.utils.io.Term.cout
+    try:
+        fname = os.path.join(tmpdir, 'bench_module.py')
+        write_module(fname, opts.lines)
+        deb = debugger.Pdb(color_scheme='Linux')
+        # Listings mark the line of the current frame
+        deb.curframe = sys._getframe()
+        IPython.utils.io.Term.cout = io.StringIO()
+        times = list_lines(deb, fname, opts.lines, opts.count)
+        IPython.utils.io.Term.cout = cout
+        per_line = format_lines(PyColorize.Parser(), fname, opts.lines,
+                                opts.count)
+    finally:
+        IPython.utils.io.Term.cout = cout
+        shutil.rmtree(tmpdir)
+    warm = times[1:] or times
+    print("%-32s %8.2f ms" % ('first list, colors the file', times[0]*1000))
+    print("%-32s %8.2f ms" % ('next lists, cached',
+                              sum(warm)/len(warm)*1000))
+    print("%-32s %8.2f ms" % ('lines colored one by one', per_line*1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Measure how long a script takes to run to a breakpoint under the debugger.
+
+This writes a small script doing some work, in a loop and in a function
+called in a loop, before calling a function holding a breakpoint.  It is
+run without the debugger, and under IPython's Pdb continuing from its first
+line to the breakpoint, with and without fast_breakpoints::
+
+    python debugger_benchmark.py -n 200000
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+from IPython.core import debugger
+
+script = '''\
+def target():
+    return 1
+
+def square(i):
+    return i*i
+
+def main(n):
+    total = 0
+    for i in range(n):
+        total += i*i
+    for i in range(n):
+        total += square(i)
+    return target()
+'''
+
+# The line of the breakpoint in target
+break_line = 2
+
+
+class BenchPdb(debugger.Pdb):
+    """Continue at the first stop, quit at the breakpoint."""
+
+    def interaction(self, frame, traceback):
+        if self.hit is None:
+            self.hit = False
+            self.set_continue()
+        else:
+            self.hit = time.time()
+            self.set_quit()
+
+
+def run_to_break(main, n, fast):
+    deb = BenchPdb()
+    deb.fast_breakpoints = fast
+    deb.hit = None
+    deb.set_break(main.__code__.co_filename, break_line)
+    start = time.time()
+    try:
+        deb.runcall(main, n)
+    except debugger.bdb.BdbQuit:
+        pass
+    sys.settrace(None)
+    return deb.hit - start
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(n=200000)
+    parser.add_option("-n", type='int', dest='n',
+        help='the number of iterations of the loops')
+    (opts, args) = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'bench_script.py')
+        with open(fname, 'w') as f:
+            f.write(script)
+        ns = {}
+        exec(compile(script, fname, 'exec'), ns)
+        start = time.time()
+        ns['main'](opts.n)
+        print("%-28s %8.3f s" % ('no debugger', time.time() - start))
+        print("%-28s %8.3f s" % ('Pdb', run_to_break(ns['main'], opts.n,
+                                                       False)))
+        print("%-28s %8.3f s" % ('Pdb, fast_breakpoints',
+                                 run_to_break(ns['main'], opts.n, True)))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Measure the time logging adds to each prompt.
+
+This times what the shell does for each input and output when logging is
+on, Logger.log and Logger.log_write of the output's repr, with logging off,
+with each flush policy of the background writer, and with the direct,
+synchronous writes the logger used to do::
+
+    python logger_benchmark.py -n 2000 -s 100000
+
+The time to write everything out at the end (Logger.flush) is reported
+separately, as the prompt doesn't wait for it.
+"""
+import os
+import shutil
+import tempfile
+import time
+from optparse import OptionParser
+
+from IPython.core.logger import Logger
+
+
+def prompts(logger, n, output):
+    for i in range(n):
+        logger.log('x = %i\n' % i, 'x = %i\n' % i)
+        logger.log_write(output, 'output')
+
+
+def direct_prompts(logfile, n, output):
+    """What Logger.log_write did before writing moved to a thread."""
+    for i in range(n):
+        logfile.write(time.strftime('# %a, %d %b %Y %H:%M:%S\n',
+                                    time.localtime()))
+        logfile.write('x = %i\n' % i)
+        logfile.flush()
+        odata = '\n'.join(['#[Out]# %s' % s for s in output.splitlines()])
+        logfile.write('%s\n' % odata)
+        logfile.flush()
+
+
+def report(label, n, seconds, flush=0.0):
+    print("%-24s %8.1f us per prompt  (flush at the end %.3f s)" %
+          (label, 1e6*seconds/n, flush))
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(n=2000, size=100000)
+    parser.add_option("-n", type='int', dest='n',
+        help='the number of prompts')
+    parser.add_option("-s", type='int', dest='size',
+        help='the size of the repr of each output')
+    (opts, args) = parser.parse_args()
+
+    n = opts.n
+    output = repr(list(range(opts.size)))[:opts.size]
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'ipython_log.py')
+        logger = Logger(tmpdir, fname, logmode='over')
+        start = time.time()
+        prompts(logger, n, output)
+        report('off', n, time.time() - start)
+
+        for policy in ('line', 'interval', 'exit'):
+            logger = Logger(tmpdir, fname, logmode='over', flush_policy=policy,
+                            max_output_length=0)
+            logger.logstart(log_output=True, timestamp=True)
+            start = time.time()
+            prompts(logger, n, output)
+            end = time.time()
+            logger.flush()
+            report('background, ' + policy, n, end - start, time.time() - end)
+            logger.logstop()
+
+        with open(fname, 'w') as logfile:
+            start = time.time()
+            direct_prompts(logfile, n, output)
+            report('direct writes', n, time.time() - start)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Measure how long it takes to pretty print large objects for display.
+
+This times PlainTextFormatter, which computes the text/plain output of the
+display hook, on a large list, a large dict and a nested structure, with
+and without limits on the output::
+
+    python pretty_benchmark.py -n 1000000
+"""
+import time
+from optparse import OptionParser
+
+from IPython.core.formatters import PlainTextFormatter
+
+
+def make_objects(n):
+    return [
+        ('list of %i ints' % n, list(range(n))),
+        ('dict of %i items' % n, dict((i, str(i)) for i in range(n))),
+        ('%i nested lists' % (n//10), [[i, [i, [i, (i,)]]] for i in range(n//10)]),
+    ]
+
+
+def time_format(formatter, obj):
+    start = time.time()
+    out = formatter(obj)
+    return time.time() - start, len(out)
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(n=1000000)
+    parser.add_option("-n", type='int', dest='n',
+        help='the number of elements in the large objects')
+    (opts, args) = parser.parse_args()
+
+    settings = [
+        ('no limits', dict(max_output_bytes=0)),
+        ('max_seq_length=1000', dict(max_seq_length=1000, max_output_bytes=0)),
+        ('max_depth=2', dict(max_depth=2, max_output_bytes=0)),
+        ('max_output_bytes=100000', dict(max_output_bytes=100000)),
+    ]
+    for label, obj in make_objects(opts.n):
+        print(label)
+        for name, limits in settings:
+            formatter = PlainTextFormatter(**limits)
+            seconds, size = time_format(formatter, obj)
+            print("    %-26s %8.3f s %12i characters" % (name, seconds, size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Measure how long %psearch takes on a big library namespace.
+
+This times the wildcard searches done by %psearch (list_namespace) on a
+namespace holding numpy and scipy, or some standard library packages if
+they aren't installed.  Each search is run once with an empty name index,
+as the first %psearch of a session, and then again with the index filled::
+
+    python psearch_benchmark.py -n 5 'n*.*' 'n*.*.*' 'n*.l*.* function'
+"""
+import importlib
+import time
+from optparse import OptionParser
+
+from IPython.utils import wildcard
+
+
+def namespace():
+    ns = {}
+    for name in ('numpy', 'scipy', 'scipy.linalg', 'scipy.sparse'):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        ns[name.split('.')[0]] = importlib.import_module(name.split('.')[0])
+    if not ns:
+        for name in ('os', 'email', 'json', 'xml', 'unittest'):
+            ns[name] = importlib.import_module(name)
+    return ns
+
+
+def search(ns, pattern):
+    args = pattern.split()
+    type_pattern = len(args) > 1 and args[1] or 'all'
+    return wildcard.list_namespace(ns, type_pattern, args[0],
+                                   ignore_case=False, show_all=False)
+
+
+def main():
+    parser = OptionParser(usage='%prog [options] [pattern ...]')
+    parser.set_defaults(n=5)
+    parser.add_option("-n", type='int', dest='n',
+        help='the number of searches with the index filled')
+    (opts, patterns) = parser.parse_args()
+    ns = namespace()
+    if not patterns:
+        initials = sorted(set(name[0] for name in ns))
+        patterns = ['%s*.*' % initials[0], '%s*.*.*' % initials[0],
+                    '%s*.*.* function' % initials[0]]
+    print('Namespace: %s' % ', '.join(sorted(ns)))
+    for pattern in patterns:
+        wildcard.name_index.clear()
+        start = time.time()
+        found = len(search(ns, pattern))
+        cold = time.time() - start
+        start = time.time()
+        for i in range(opts.n):
+            search(ns, pattern)
+        warm = (time.time() - start)/opts.n
+        print("%-24s %8i names  empty index %8.3f s  filled %8.3f s" %
+              (pattern, found, cold, warm))
+
+
+if __name__ == '__main__':
+    main()
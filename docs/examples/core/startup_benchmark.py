@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Measure how long ipython takes to start and exit.
+
+This runs ``ipython3 -c pass --quick`` in fresh processes, first with cold
+bytecode caches (a new, empty cache directory for each run) and then warm,
+and prints the fastest and the median time of each::
+
+    python startup_benchmark.py -n 10
+
+With -p, the startup profile of one more run (``--profile-startup``) is
+printed too, showing the slowest initialization steps and imports.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+
+def run_ipython(cmd, env, args=()):
+    start = time.time()
+    subprocess.check_call(cmd + ['-c', 'pass', '--quick'] + list(args),
+                          env=env, stdout=subprocess.PIPE)
+    return time.time() - start
+
+
+def report(label, times):
+    times = sorted(times)
+    print("%-8s min %7.3f s  median %7.3f s  (%i runs)" %
+          (label, times[0], times[len(times)//2], len(times)))
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(n=10, profile=False)
+    parser.add_option("-n", type='int', dest='n',
+        help='the number of runs of each kind')
+    parser.add_option("-p", action='store_true', dest='profile',
+        help='print the startup profile of one more run')
+    (opts, args) = parser.parse_args()
+
+    cmd = [sys.executable, '-c', 'from IPython.frontend.terminal.ipapp '
+           'import launch_new_instance; launch_new_instance()']
+    env = dict(os.environ)
+    cold = []
+    for i in range(opts.n):
+        cache = tempfile.mkdtemp()
+        try:
+            cold_env = dict(env, PYTHONPYCACHEPREFIX=cache)
+            cold.append(run_ipython(cmd, cold_env))
+        finally:
+            shutil.rmtree(cache)
+    run_ipython(cmd, env)   # Make sure the regular caches are filled
+    warm = [run_ipython(cmd, env) for i in range(opts.n)]
+    report('cold', cold)
+    report('warm', warm)
+    if opts.profile:
+        run_ipython(cmd, env, ['--profile-startup'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Measure how fast custom completers are looked up for a line.
+
+This registers many completers by regexp, like extensions do with
+set_hook('complete_command', ..., re_key=...), and times StrDispatch
+dispatching lines to them, as the completer does on every TAB.  Most lines
+match no completer, like most lines completed do.  The lines are dispatched
+once each (the matches aren't cached yet) and then again (from the cache).
+For comparison, they are also matched against each regexp in turn, as
+dispatch used to do::
+
+    python strdispatch_benchmark.py -c 200 -n 10000
+"""
+import re
+import time
+from optparse import OptionParser
+
+from IPython.utils.strdispatch import StrDispatch
+
+
+def completer(self, event):
+    return []
+
+
+def make_dispatcher(count):
+    dis = StrDispatch()
+    for i in range(count):
+        dis.add_re(r'(?:%%)?cmd%i\s' % i, completer)
+    return dis
+
+
+def make_lines(count, nlines):
+    """Lines for one completer in four, the others match none."""
+    return [i % 2 and 'obj%i.attr' % i or 'cmd%i arg%i' % (i % (4*count), i)
+            for i in range(nlines)]
+
+
+def dispatch(dis, lines):
+    start = time.time()
+    for line in lines:
+        list(dis.dispatch(line))
+    return time.time() - start
+
+
+def match_each(dis, lines):
+    start = time.time()
+    for line in lines:
+        [obj for r, obj in dis.regexs.items() if re.match(r, line)]
+    return time.time() - start
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(count=200, lines=10000)
+    parser.add_option("-c", type='int', dest='count',
+        help='the number of completers')
+    parser.add_option("-n", type='int', dest='lines',
+        help='the number of lines dispatched')
+    (opts, args) = parser.parse_args()
+
+    dis = make_dispatcher(opts.count)
+    dis.cache_size = opts.lines
+    lines = make_lines(opts.count, opts.lines)
+    times = [('regexps one by one', match_each(dis, lines)),
+             ('combined regexp', dispatch(dis, lines)),
+             ('cached matches', dispatch(dis, lines))]
+    for label, t in times:
+        print("%-24s %10.0f lines/s" % (label, opts.lines / max(t, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Measure how long verbose tracebacks take to build and how big they get.
+
+This formats the traceback of an exception raised at the bottom of a deep
+recursion, and of one raised in frames holding large data (a long string, a
+long list and, if NumPy is installed, a large array), both with the default
+limits of VerboseTB and with all of them turned off::
+
+    python traceback_benchmark.py -d 500 -s 1000000
+"""
+import sys
+import time
+from optparse import OptionParser
+
+from IPython.core.ultratb import VerboseTB
+
+
+def recurse(n):
+    if n == 0:
+        raise ValueError('bottom of the recursion')
+    recurse(n-1)
+
+
+def fail(*args):
+    raise ValueError('frame with big locals')
+
+
+def big_locals(size):
+    text = 'x'*size
+    items = list(range(size))
+    try:
+        import numpy
+        array = numpy.zeros(size)
+    except ImportError:
+        array = None
+    fail(text, items, array)
+
+
+def exc_info(f, *args):
+    try:
+        f(*args)
+    except ValueError:
+        return sys.exc_info()
+
+
+def unlimited_tb():
+    tb = VerboseTB(color_scheme='NoColor')
+    tb.max_cycle_length = 0
+    tb.max_repr_length = 0
+    tb.max_array_size = 0
+    tb.max_traceback_bytes = 0
+    return tb
+
+
+def report(label, tb, info):
+    start = time.time()
+    text = tb.text(*info)
+    print("%-32s %8.3f s %12i chars" % (label, time.time()-start, len(text)))
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(depth=500, size=1000000)
+    parser.add_option("-d", type='int', dest='depth',
+        help='the depth of the recursion')
+    parser.add_option("-s", type='int', dest='size',
+        help='the size of the big local variables')
+    (opts, args) = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), opts.depth + 100))
+
+    recursion = exc_info(recurse, opts.depth)
+    big = exc_info(big_locals, opts.size)
+    report('recursion, limited', VerboseTB(color_scheme='NoColor'), recursion)
+    report('recursion, unlimited', unlimited_tb(), recursion)
+    report('big locals, limited', VerboseTB(color_scheme='NoColor'), big)
+    report('big locals, unlimited', unlimited_tb(), big)
+
+
+if __name__ == '__main__':
+    main()
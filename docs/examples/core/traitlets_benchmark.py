@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Measure how fast HasTraits objects are created and their traits are set.
+
+This builds a HasTraits subclass with a number of traits (some with static
+``_[name]_changed`` handlers), then times creating instances, setting a
+trait without handlers, setting one with a static handler and setting one
+with a dynamic handler registered through on_trait_change::
+
+    python traitlets_benchmark.py -t 50 -n 20000
+"""
+import timeit
+from optparse import OptionParser
+
+from IPython.utils.traitlets import HasTraits, Int, Float, Str
+
+
+def make_class(ntraits):
+    """Return a HasTraits subclass with ntraits traits."""
+    classdict = {}
+    kinds = [Int, Float, Str]
+    for i in range(ntraits):
+        classdict['t%i' % i] = kinds[i % len(kinds)]()
+    classdict['counter'] = Int(0)
+    classdict['watched'] = Int(0)
+    def _watched_changed(self, name, old, new):
+        pass
+    classdict['_watched_changed'] = _watched_changed
+    return type(HasTraits)('Bench', (HasTraits,), classdict)
+
+
+def report(label, n, seconds):
+    print("%-32s %10.0f per second (%.3f us each)" % (label, n/seconds,
+                                                      1e6*seconds/n))
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(ntraits=50, n=20000)
+    parser.add_option("-t", type='int', dest='ntraits',
+        help='the number of traits on the class')
+    parser.add_option("-n", type='int', dest='n',
+        help='the number of repetitions of each operation')
+    (opts, args) = parser.parse_args()
+
+    Bench = make_class(opts.ntraits)
+    n = opts.n
+    report('construct (%i traits)' % opts.ntraits, n,
+           timeit.timeit(Bench, number=n))
+
+    obj = Bench()
+    values = iter(range(1, 4*n))
+    report('set, no handlers', n,
+           timeit.timeit(lambda: setattr(obj, 'counter', next(values)), number=n))
+    report('set, static handler', n,
+           timeit.timeit(lambda: setattr(obj, 'watched', next(values)), number=n))
+
+    def dynamic(name, old, new):
+        pass
+    obj.on_trait_change(dynamic, 'counter')
+    report('set, dynamic handler', n,
+           timeit.timeit(lambda: setattr(obj, 'counter', next(values)), number=n))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Measure how long it takes to bring up sets of engines.
+
+For each engine count, this script starts engines with both the regular
+LocalEngineSetLauncher and the ForkServerEngineSetLauncher, waits until all
+of them have registered with the controller, prints the time it took and
+stops them again.  A controller must already be running for the profile::
+
+    ipcontroller -p default
+
+and then::
+
+    python cluster_startup_profiler.py -n 1 -n 8 -n 64
+
+Use --batch-size and --batch-delay to see the effect of staggering the
+engine startup.
+"""
+from optparse import OptionParser
+
+from twisted.internet import reactor
+from twisted.internet.defer import inlineCallbacks
+
+from IPython.utils.path import get_ipython_dir
+from IPython.utils.timing import time
+from IPython.kernel.clusterdir import ClusterDir
+from IPython.kernel.launcher import (
+    LocalEngineSetLauncher,
+    ForkServerEngineSetLauncher
+)
+from IPython.kernel.twistedutil import sleep_deferred
+
+
+@inlineCallbacks
+def time_startup(launcher_class, n, cluster_dir, opts):
+    launcher = launcher_class(work_dir=cluster_dir)
+    launcher.batch_size = opts.batch_size
+    launcher.batch_delay = opts.batch_delay
+    start = time.time()
+    yield launcher.start(n, cluster_dir)
+    ready_times = yield launcher.observe_ready()
+    total = time.time() - start
+    yield launcher.stop()
+    yield launcher.observe_stop()
+    times = sorted(ready_times.values())
+    print("%-30s %4i engines: %7.3f s (per engine: min %.3f s, "
+          "median %.3f s, max %.3f s)" % (launcher_class.__name__, n, total,
+          times[0], times[len(times)//2], times[-1]))
+    # Give the controller a moment to unregister the engines
+    yield sleep_deferred(1.0)
+
+
+@inlineCallbacks
+def main_loop(cluster_dir, opts):
+    try:
+        for n in opts.n:
+            for launcher_class in (LocalEngineSetLauncher,
+                                   ForkServerEngineSetLauncher):
+                yield time_startup(launcher_class, n, cluster_dir, opts)
+    finally:
+        reactor.stop()
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(n=[], profile='default', batch_size=0, batch_delay=0.5)
+    parser.add_option("-n", type='int', dest='n', action='append',
+        help='a number of engines to start (can be given several times)')
+    parser.add_option("-p", type='string', dest='profile',
+        help='the profile of the running controller')
+    parser.add_option("--batch-size", type='int', dest='batch_size',
+        help='start the engines in batches of this size')
+    parser.add_option("--batch-delay", type='float', dest='batch_delay',
+        help='the delay in seconds between batches')
+    (opts, args) = parser.parse_args()
+    if not opts.n:
+        opts.n = [1, 8, 64]
+
+    cluster_dir = ClusterDir.find_cluster_dir_by_profile(
+        get_ipython_dir(), opts.profile).location
+    reactor.callWhenRunning(main_loop, cluster_dir, opts)
+    reactor.run()
+
+
+if __name__ == '__main__':
+    main()
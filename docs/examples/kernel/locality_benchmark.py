@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""Compare sending the data with each task with running tasks where it is.
+
+This scatters a dataset to the engines and runs an iterative computation on
+it: each iteration submits one task per chunk of the data.  The tasks either
+carry their chunk (``push``) or name it with ``locality``, so that the
+scheduler runs them on the engine holding it.  An IPython controller and
+engines must be running::
+
+    ipcluster -n 4
+    python locality_benchmark.py -s 4000000 -i 10
+"""
+from optparse import OptionParser
+
+from IPython.utils.timing import time
+from IPython.kernel import client
+
+
+def run_iterations(tc, make_task, nchunks, niterations):
+    """Run niterations of one task per chunk, return the time and results."""
+    start = time.time()
+    results = []
+    for i in range(niterations):
+        taskids = [tc.run(make_task(c)) for c in range(nchunks)]
+        tc.barrier(taskids)
+        results.append(sorted(tc.get_task_result(t).ns.s for t in taskids))
+    return time.time() - start, results
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(size=4000000, iterations=10)
+    parser.add_option("-s", type='int', dest='size',
+        help='the number of elements of the dataset')
+    parser.add_option("-i", type='int', dest='iterations',
+        help='the number of iterations')
+    (opts, args) = parser.parse_args()
+
+    mec = client.MultiEngineClient()
+    tc = client.TaskClient()
+    ids = mec.get_ids()
+    data = list(range(opts.size))
+    chunks = [data[i::len(ids)] for i in range(len(ids))]
+    # One chunk per engine, named after the engine it is on
+    for i, engine in enumerate(ids):
+        mec.push({'chunk%i' % i: chunks[i]}, targets=engine)
+    print("%i engines, %i elements" % (len(ids), opts.size))
+
+    push_time, expected = run_iterations(tc,
+        lambda c: client.StringTask('s = sum(chunk)', pull='s',
+                                    push=dict(chunk=chunks[c])),
+        len(ids), opts.iterations)
+    before = tc.queue_status().get('locality', {})
+    local_time, results = run_iterations(tc,
+        lambda c: client.StringTask('s = sum(chunk%i)' % c, pull='s',
+                                    locality='chunk%i' % c),
+        len(ids), opts.iterations)
+    after = tc.queue_status().get('locality', {})
+    assert results == expected
+    print("%-28s %8.3f s" % ('data pushed with each task', push_time))
+    print("%-28s %8.3f s" % ('tasks run where data is', local_time))
+    print("%-28s %8.1fx" % ('speedup', push_time/local_time))
+    if after:
+        print("local tasks: %i, transferred: %i" % (
+            after['local'] - before.get('local', 0),
+            after['transferred'] - before.get('transferred', 0)))
+    tc.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Compare gathering data to reduce it with reducing it on the engines.
+
+This scatters an array of doubles to the engines and sums it, first by
+gathering the array and summing it in the client, then with
+MultiEngineClient.reduce, which sums the partitions on the engines and only
+moves one value per engine.  An IPython controller and engines must be
+running, with NumPy installed::
+
+    ipcluster -n 4
+    python reduce_benchmark.py -s 1000000 -n 10
+
+The -c option sums the columns of a 2d array instead, so that each engine
+sends back a row of the given length.
+"""
+from optparse import OptionParser
+
+import numpy
+
+from IPython.utils.timing import time
+from IPython.kernel import client
+
+
+def timeit(f, count):
+    """Return the best time of count calls to f, and its result."""
+    best = None
+    for i in range(count):
+        start = time.time()
+        result = f()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    parser = OptionParser()
+    parser.set_defaults(size=1000000, count=10, columns=0)
+    parser.add_option("-s", type='int', dest='size',
+        help='the number of elements of the array')
+    parser.add_option("-n", type='int', dest='count',
+        help='the number of times to repeat each reduction')
+    parser.add_option("-c", type='int', dest='columns',
+        help='sum the columns of an array with this many columns')
+    (opts, args) = parser.parse_args()
+
+    mec = client.MultiEngineClient()
+    if opts.columns:
+        a = numpy.random.rand(opts.size // opts.columns, opts.columns)
+    else:
+        a = numpy.random.rand(opts.size)
+    mec.scatter('a', a)
+    print("%i engines, %.1f MB array" % (len(mec.get_ids()), a.nbytes/1e6))
+
+    gather_time, expected = timeit(
+        lambda: numpy.add.reduce(mec.gather('a'), axis=0), opts.count)
+    reduce_time, result = timeit(
+        lambda: mec.reduce(numpy.add, 'a'), opts.count)
+    assert numpy.allclose(result, expected)
+    print("%-28s %8.4f s" % ('gather, then reduce', gather_time))
+    print("%-28s %8.4f s" % ('reduce on the engines', reduce_time))
+    print("%-28s %8.1fx" % ('speedup', gather_time/reduce_time))
+
+
+if __name__ == '__main__':
+    main()